@@ -0,0 +1,91 @@
+import asyncio
+import time
+import zmq
+import zmq.asyncio
+
+class AsyncRuntime:
+    """
+    Runs the simulation frames, inbound traffic light messages and outbound publishing as
+    coroutines on a single asyncio loop, instead of the listener and publisher threads.
+    Inbound messages are handled as soon as they arrive between two frames, without polling.
+    The Messenger must be created with threaded=False and receive() must not be called.
+    """
+
+    def __init__(self, messenger, frame, fps=60):
+        """
+        Args:
+            messenger (Messenger): Messenger whose sockets and publisher queue are used.
+            frame (callable): Runs one frame, returns False to stop the runtime.
+            fps (int): Target frames per second, 0 runs frames as fast as possible.
+        """
+        self.messenger = messenger
+        self.frame = frame
+        self.frame_interval = 1.0 / fps if fps else 0
+        self._publish_event = None
+        self._stopping = False
+
+    def run(self):
+        """Run until the frame callback returns False. Pending messages are flushed afterwards."""
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._publish_event = asyncio.Event()
+        sub_socket = zmq.asyncio.Socket.from_socket(self.messenger.sub_socket)
+        pub_socket = zmq.asyncio.Socket.from_socket(self.messenger.pub_socket)
+
+        receiver = asyncio.create_task(self._receive_loop(sub_socket))
+        publisher = asyncio.create_task(self._publish_loop(pub_socket))
+        try:
+            await self._frame_loop()
+        finally:
+            receiver.cancel()
+            self._stopping = True
+            self._publish_event.set()
+            await publisher
+
+    async def _frame_loop(self):
+        next_frame = time.perf_counter()
+        while self.frame():
+            # Publish what this frame produced
+            self._publish_event.set()
+
+            next_frame += self.frame_interval
+            delay = next_frame - time.perf_counter()
+            if delay < 0:
+                # Behind schedule, start counting again instead of catching up
+                next_frame = time.perf_counter()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def _receive_loop(self, socket):
+        try:
+            while True:
+                frames = await socket.recv_multipart()
+                self.messenger.handle_frames(frames)
+                # A handshake may have queued a reply
+                self._publish_event.set()
+        except asyncio.CancelledError:
+            print("Listener gestopt.")
+        except Exception as e:
+            print(f"Fout in listener: {e}")
+
+    async def _publish_loop(self, socket):
+        publisher = self.messenger.publisher
+        timeout = None
+        while True:
+            try:
+                await asyncio.wait_for(self._publish_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass  # A rate limited message is due
+            self._publish_event.clear()
+
+            stopping = self._stopping
+            batch, timeout = publisher.take_pending(flush=stopping)
+            for topic, message in batch:
+                try:
+                    await socket.send_multipart(publisher.frames(topic, message))
+                except zmq.ZMQError as e:
+                    print(f"Fout bij versturen op topic '{topic}': {e}")
+
+            if stopping:
+                return
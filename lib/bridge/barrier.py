@@ -1,4 +1,5 @@
 import pygame
+from lib.rendering.texture_sprite import TextureSprite
 from lib.screen import screen, scale_to_display
 
 class Barrier:
@@ -31,6 +32,10 @@ class Barrier:
         self.is_open = True
         self.barrier_open_seconds = 5
 
+        # Every visible height in whole pixels is rendered once, drawing is a table lookup
+        self.frames = self.render_frames()
+        self.frame_position = self.frames[0].get_rect(center=self.pivot_px).topleft
+
     def update(self, delta_time):
         """
         Update the state of the barrier.
@@ -68,24 +73,69 @@ class Barrier:
         """
         self.is_open = False
 
-    def draw(self):
+    def render_frames(self):
         """
-        Draw the barrier onto the screen at its current position, angle, and height.
+        Render the barrier for every cropped height in screen pixels, rotated around its pivot point.
+
+        Returns:
+            list: Rotated surfaces indexed by the visible height in pixels.
+        """
+        frames = []
+        for crop_h in range(int(self.screen_base_h) + 1):
+            cropped = self.base_image.subsurface(
+                pygame.Rect(0, 0, self.screen_base_w, crop_h)
+            )
+
+            # The full-size surface keeps the pivot in the center at every height
+            pivot_surf = pygame.Surface(
+                (self.screen_base_w, self.screen_base_h),
+                flags=pygame.SRCALPHA
+            )
+            pivot_surf.blit(cropped, (0, 0))
+            frames.append(pygame.transform.rotate(pivot_surf, self.angle))
+        return frames
+
+    def sprite(self, height=None):
         """
-        frac = max(0.0, min(1.0, self.height / self.base_height))
+        Return the barrier image at a height and its angle, rotated around its pivot point.
+
+        Args:
+            height (float, optional): Visible height to draw, the current height by default.
+
+        Returns:
+            tuple: (pygame.Surface, (x, y)) ready to be blitted.
+        """
+        if height is None:
+            height = self.height
+        frac = max(0.0, min(1.0, height / self.base_height))
         crop_h = int(self.screen_base_h * frac)
+        return self.frames[crop_h], self.frame_position
 
-        cropped = self.base_image.subsurface(
-            pygame.Rect(0, 0, self.screen_base_w, crop_h)
-        ).copy()
+    def texture_sprite(self, height=None):
+        """
+        Return the cropped barrier image rotated around its pivot point, for the texture renderer.
 
-        pivot_surf = pygame.Surface(
-            (self.screen_base_w, self.screen_base_h),
-            flags=pygame.SRCALPHA
-        )
+        Args:
+            height (float, optional): Visible height to draw, the current height by default.
 
-        pivot_surf.blit(cropped, (0, 0))
+        Returns:
+            TextureSprite: The top of the unrotated image, as in render_frames.
+        """
+        if height is None:
+            height = self.height
+        frac = max(0.0, min(1.0, height / self.base_height))
+        width, full_height = self.base_image.get_size()
+        crop_h = int(self.screen_base_h * frac)
+        return TextureSprite(
+            self.base_image,
+            (self.pivot_px.x - width / 2, self.pivot_px.y - full_height / 2, width, crop_h),
+            self.angle,
+            origin=(width / 2, full_height / 2),
+            srcrect=(0, 0, width, crop_h),
+        )
 
-        rotated = pygame.transform.rotate(pivot_surf, self.angle)
-        rect = rotated.get_rect(center=self.pivot_px)
-        screen.blit(rotated, rect.topleft)
+    def draw(self):
+        """
+        Draw the barrier onto the screen at its current position, angle, and height.
+        """
+        screen.blit(*self.sprite())
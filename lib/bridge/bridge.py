@@ -1,8 +1,10 @@
+import math
 import pygame
-import time
 from lib.enums.topics import Topics
 from lib.enums.traffic_light_colors import TrafficLightColors
+from lib.rendering.texture_sprite import TextureSprite
 from lib.screen import screen, scale_to_display
+from lib.simulation_clock import simulation_clock
 from lib.bridge.barrier import Barrier
 
 class Bridge:
@@ -37,8 +39,12 @@ class Bridge:
             Barrier([1416, 970], 130)
         ]
         
+        # Rotated bridge sprites by display size, every height is rendered once
+        self.frames = {}
+        self.render_frames()
+
         # Track the last time bridge sensor data was sent
-        self.last_bridge_sensor_send_time = time.time()
+        self.last_bridge_sensor_send_time = simulation_clock.time()
         # Track the last bridge state
         self.last_bridge_state = "dicht"  # Default to closed state
 
@@ -54,9 +60,9 @@ class Bridge:
             barrier.update(delta_time)
         
         # Periodically send bridge state regardless of changes
-        current_time = time.time()
+        current_time = simulation_clock.time()
         if current_time - self.last_bridge_sensor_send_time >= 10:
-            self.send_bridge_state(self.last_bridge_state)
+            self.send_bridge_state(self.last_bridge_state, keyframe=True)
             self.last_bridge_sensor_send_time = current_time
 
     def update_bridge_height(self, delta_time):
@@ -98,16 +104,17 @@ class Bridge:
         if state:
             self.send_bridge_state(state)
     
-    def send_bridge_state(self, state):
+    def send_bridge_state(self, state, keyframe=False):
         """
         Send the bridge state to the messenger.
         
         Args:
             state (str): The current state of the bridge ("open", "dicht", or "onbekend").
+            keyframe (bool): Send the full state in delta mode, used for the periodic update.
         """
         self.last_bridge_state = state
-        self.last_bridge_sensor_send_time = time.time()
-        self.messenger.send(Topics.BRIDGE_SENSORS_UPDATE.value, {"81.1": {"state": state}})
+        self.last_bridge_sensor_send_time = simulation_clock.time()
+        self.messenger.send_state(Topics.BRIDGE_SENSORS_UPDATE.value, {"81.1": {"state": state}}, keyframe=keyframe)
 
     def open_barriers(self):
         """
@@ -143,22 +150,88 @@ class Bridge:
                 self.open_barriers()
             self.traffic_light_color = traffic_light_color
 
-    def draw(self):
+    def render_frames(self):
         """
-        Draw the bridge and its barriers on the screen at their current positions and states.
+        Render the bridge for every height in whole screen pixels at the current display scale,
+        so the opening and closing animation only looks up frames.
         """
-        for barrier in self.barriers:
-            barrier.draw()
+        screen_width, screen_height = scale_to_display(self.base_width, self.base_height)
+        for height in range(screen_height + 1):
+            self.frame((screen_width, height))
+
+    def frame(self, size):
+        """
+        Return the rotated bridge sprite for a display size, rendering it on first use.
+
+        Args:
+            size (tuple): (width, height) of the unrotated sprite in screen pixels.
+        """
+        key = (int(size[0]), int(size[1]))
+        rotated_sprite = self.frames.get(key)
+        if rotated_sprite is None:
+            transformed_sprite = pygame.transform.scale(self.bridge_sprite, key)
+            rotated_sprite = pygame.transform.rotate(transformed_sprite, self.angle)
+            self.frames[key] = rotated_sprite
+        return rotated_sprite
+
+    def sprites(self, height=None, barrier_heights=None):
+        """
+        Return the barriers and the bridge at their positions and states, in drawing order.
+
+        Args:
+            height (float, optional): Bridge height to draw, the current height by default.
+            barrier_heights (iterable, optional): Height per barrier, the current heights by default.
+
+        Returns:
+            list: (pygame.Surface, (x, y)) pairs ready to be blitted.
+        """
+        if height is None:
+            height = self.height
+        if barrier_heights is None:
+            barrier_heights = [barrier.height for barrier in self.barriers]
+        sprites = [barrier.sprite(barrier_height) for barrier, barrier_height in zip(self.barriers, barrier_heights)]
 
-        offset_factor = (self.base_height - self.height) / 10
+        offset_factor = (self.base_height - height) / 10
         x, y = self.position
         x = x - offset_factor
         y = y - offset_factor
 
-        transformed_sprite = pygame.transform.scale(
-            self.bridge_sprite, scale_to_display(self.width, self.height)
-        )
-        rotated_sprite = pygame.transform.rotate(transformed_sprite, self.angle)
+        rotated_sprite = self.frame(scale_to_display(self.width, height))
         rect = rotated_sprite.get_rect()
         rect.midtop = scale_to_display(x, y)
-        screen.blit(rotated_sprite, rect.topleft)
\ No newline at end of file
+        sprites.append((rotated_sprite, rect.topleft))
+        return sprites
+
+    def texture_sprites(self, height=None, barrier_heights=None):
+        """
+        Return the barriers and the bridge as TextureSprites in drawing order, for the texture
+        renderer. The unscaled bridge image is stretched and rotated while drawing, so no frames are needed.
+
+        Args:
+            height (float, optional): Bridge height to draw, the current height by default.
+            barrier_heights (iterable, optional): Height per barrier, the current heights by default.
+        """
+        if height is None:
+            height = self.height
+        if barrier_heights is None:
+            barrier_heights = [barrier.height for barrier in self.barriers]
+        sprites = [barrier.texture_sprite(barrier_height) for barrier, barrier_height in zip(self.barriers, barrier_heights)]
+
+        offset_factor = (self.base_height - height) / 10
+        x, y = self.position
+        width, height = scale_to_display(self.width, height)
+        width, height = int(width), int(height)
+
+        # As in sprites(), the top of the rotated bounds is centered on the position
+        radians = math.radians(self.angle)
+        rotated_height = abs(width * math.sin(radians)) + abs(height * math.cos(radians))
+        center_x, top = scale_to_display(x - offset_factor, y - offset_factor)
+        center_y = top + rotated_height / 2
+        sprites.append(TextureSprite(self.bridge_sprite, (center_x - width / 2, center_y - height / 2, width, height), self.angle))
+        return sprites
+
+    def draw(self):
+        """
+        Draw the bridge and its barriers on the screen at their current positions and states.
+        """
+        screen.blits(self.sprites(), doreturn=False)
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import math
+from lib.enums.collision_layers import CollisionLayers
 
 class Hitbox:
     """
@@ -40,6 +41,10 @@ class CollidableObject(ABC):
     """
     Base class for an object with one or more hitboxes.
     """
+    # Broad-phase layer of this object and the layers it can interact with
+    collision_layer = CollisionLayers.ALL
+    collision_mask = CollisionLayers.ALL
+
     @abstractmethod
     def hitboxes(self) -> list[Hitbox]:
         """
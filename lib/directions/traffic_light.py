@@ -1,9 +1,11 @@
-import pygame
-import time
 from lib.collidable_object import CollidableObject, Hitbox
 from lib.directions.sensor import Sensor
+from lib.enums.collision_layers import CollisionLayers
 from lib.enums.traffic_light_colors import TrafficLightColors
+from lib.rendering.sprite_atlas import display_atlas
+from lib.rendering.texture_sprite import TextureSprite
 from lib.screen import screen, scale_to_display
+from lib.simulation_clock import simulation_clock
 from lib.coordinate import Coordinate
 
 class TrafficLight(CollidableObject):
@@ -36,6 +38,7 @@ class TrafficLight(CollidableObject):
         self.previous_traffic_light_status = TrafficLightColors.RED
         self.approach_direction = approach_direction
         self.type = type
+        self.collision_layer = CollisionLayers.signal_for(type)
         self.controls_barrier = controls_barrier
         self.bridge_out_of_service = bridge_out_of_service
         self.light_initialized = False
@@ -56,32 +59,26 @@ class TrafficLight(CollidableObject):
 
     def get_sprite(self):
         """
-        Load and scale the correct sprites based on the traffic light type.
+        Look up the sprites for the traffic light type in the sprite atlas, already at the display scale.
         """
+        atlas = display_atlas()
         if self.type in ('pedestrian', 'bike'):
-            sprite_size = scale_to_display(6, 10)
-            green_light_img = pygame.image.load('assets/lights/small/groen.webp').convert_alpha()
-            orange_light_img = pygame.image.load('assets/lights/small/rood.webp').convert_alpha()
-            red_light_img = pygame.image.load('assets/lights/small/rood.webp').convert_alpha()
-        else:
-            sprite_size = scale_to_display(6, 14)
-            if self.type == 'boat':
-                green_light_img = pygame.image.load('assets/lights/boat/groen.webp').convert_alpha()
-                if self.bridge_out_of_service:
-                    orange_light_img = pygame.image.load('assets/lights/boat/gesloten.webp').convert_alpha()
-                    red_light_img = pygame.image.load('assets/lights/boat/gesloten.webp').convert_alpha()
-                else:
-                    orange_light_img = pygame.image.load('assets/lights/boat/rood.webp').convert_alpha()
-                    red_light_img = pygame.image.load('assets/lights/boat/rood.webp').convert_alpha()
+            self.green_light_img = atlas.sprite('lights/small/groen')
+            self.orange_light_img = atlas.sprite('lights/small/rood')
+            self.red_light_img = atlas.sprite('lights/small/rood')
+        elif self.type == 'boat':
+            self.green_light_img = atlas.sprite('lights/boat/groen')
+            if self.bridge_out_of_service:
+                self.orange_light_img = atlas.sprite('lights/boat/gesloten')
+                self.red_light_img = atlas.sprite('lights/boat/gesloten')
             else:
-                # Default to car type
-                green_light_img = pygame.image.load('assets/lights/car/groen.webp').convert_alpha()
-                orange_light_img = pygame.image.load('assets/lights/car/oranje.webp').convert_alpha()
-                red_light_img = pygame.image.load('assets/lights/car/rood.webp').convert_alpha()
-
-        self.green_light_img = pygame.transform.scale(green_light_img, sprite_size)
-        self.orange_light_img = pygame.transform.scale(orange_light_img, sprite_size)
-        self.red_light_img = pygame.transform.scale(red_light_img, sprite_size)
+                self.orange_light_img = atlas.sprite('lights/boat/rood')
+                self.red_light_img = atlas.sprite('lights/boat/rood')
+        else:
+            # Default to car type
+            self.green_light_img = atlas.sprite('lights/car/groen')
+            self.orange_light_img = atlas.sprite('lights/car/oranje')
+            self.red_light_img = atlas.sprite('lights/car/rood')
 
     def hitboxes(self):
         """
@@ -122,7 +119,7 @@ class TrafficLight(CollidableObject):
         if self.light_initialized and color != self.previous_traffic_light_status.value and self.controls_barrier and color == TrafficLightColors.GREEN.value:
             # Start the delay so the barrier can open beforehand
             self.is_changing_to_green = True
-            self.green_change_time = time.time() + self.barrier_delay
+            self.green_change_time = simulation_clock.time() + self.barrier_delay
         elif not self.is_changing_to_green:
             # For other traffic lights, update directly
             self.traffic_light_status = TrafficLightColors(color)
@@ -134,38 +131,60 @@ class TrafficLight(CollidableObject):
     def process_delayed_changes(self):
         """
         Process any delayed color changes (should be called in game loop).
+        The last commanded color is applied, which is no longer green if the
+        controller changed its mind during the delay.
         """
-        if self.is_changing_to_green and time.time() >= self.green_change_time:
+        if self.is_changing_to_green and simulation_clock.time() >= self.green_change_time:
             self.is_changing_to_green = False
-            self.traffic_light_status = TrafficLightColors.GREEN
+            self.traffic_light_status = self.previous_traffic_light_status
 
-    def draw(self):
+    def sprite(self, status=None):
         """
-        Draw the traffic light and sensors on the screen.
+        Return the sprite for a status, centered on the traffic light position.
 
         Args:
-            connected (bool): If False, show orange light regardless of current color.
+            status (TrafficLightColors, optional): Status to draw, the current status by default.
+
+        Returns:
+            tuple: (pygame.Surface, (x, y)) ready to be blitted.
         """
-        # Process any delayed changes before drawing
-        self.process_delayed_changes()
-            
-        self.front_sensor.draw()
-        if self.back_sensor is not None:
-            self.back_sensor.draw()
+        if status is None:
+            status = self.traffic_light_status
 
-        # # Select appropriate sprite based on status
+        # Select appropriate sprite based on status
         tf_sprite = self.red_light_img
-        if self.traffic_light_status == TrafficLightColors.GREEN:
+        if status == TrafficLightColors.GREEN:
             tf_sprite = self.green_light_img
-        elif self.traffic_light_status == TrafficLightColors.ORANGE:
+        elif status == TrafficLightColors.ORANGE:
             tf_sprite = self.orange_light_img
 
-        # # Center the sprite on the traffic light position
+        # Center the sprite on the traffic light position
         sprite_width, sprite_height = self.green_light_img.get_size()
         center_x, center_y = scale_to_display(self.traffic_light_position.x, self.traffic_light_position.y)
         draw_x = center_x - sprite_width // 2
         draw_y = center_y - sprite_height // 2
-        screen.blit(tf_sprite, (draw_x, draw_y))
+        return tf_sprite, (draw_x, draw_y)
+
+    def texture_sprite(self, status=None):
+        """
+        Return the sprite for a status as a TextureSprite, for the texture renderer.
+
+        Args:
+            status (TrafficLightColors, optional): Status to draw, the current status by default.
+        """
+        image, (draw_x, draw_y) = self.sprite(status)
+        return TextureSprite(image, (int(draw_x), int(draw_y), *image.get_size()))
+
+    def draw(self):
+        """
+        Draw the traffic light and sensors on the screen.
+        Delayed changes are processed by the simulation update, not here.
+        """
+        self.front_sensor.draw()
+        if self.back_sensor is not None:
+            self.back_sensor.draw()
+
+        screen.blit(*self.sprite())
 
         # hitboxes = self.hitboxes()
         # for hitbox in hitboxes:
@@ -0,0 +1,25 @@
+from enum import IntFlag
+
+
+class CollisionLayers(IntFlag):
+    NONE = 0
+    ROAD = 1
+    CYCLE_PATH = 2
+    SIDEWALK = 4
+    WATER = 8
+    ROAD_SIGNAL = 16
+    CYCLE_SIGNAL = 32
+    SIDEWALK_SIGNAL = 64
+    WATER_SIGNAL = 128
+    LAND = ROAD | CYCLE_PATH | SIDEWALK
+    ALL = 255
+
+    @classmethod
+    def signal_for(cls, traffic_light_type):
+        """Return the signal layer for a traffic light type from directions.yaml."""
+        return {
+            "car": cls.ROAD_SIGNAL,
+            "bike": cls.CYCLE_SIGNAL,
+            "pedestrian": cls.SIDEWALK_SIGNAL,
+            "boat": cls.WATER_SIGNAL,
+        }.get(traffic_light_type, cls.ALL)
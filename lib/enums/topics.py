@@ -4,4 +4,8 @@ class Topics(Enum):
     LANE_SENSORS_UPDATE = "sensoren_rijbaan"
     SPECIAL_SENSORS_UPDATE = "sensoren_speciaal"
     PRIORITY_VEHICLE = "voorrangsvoertuig"
-    BRIDGE_SENSORS_UPDATE = "sensoren_bruggen"
\ No newline at end of file
+    BRIDGE_SENSORS_UPDATE = "sensoren_bruggen"
+    TIME = "tijd"
+    WIRE_FORMAT = "formaat"
+    VEHICLE_STATES = "voertuigen"
+    PERFORMANCE = "prestaties"
\ No newline at end of file
@@ -0,0 +1,128 @@
+import time
+from lib.enums.topics import Topics
+from lib.vehicles.vehicle import Vehicle
+
+class FrameGovernor:
+    """
+    Watches the frame time against a budget and sheds load in steps when the machine cannot
+    keep up, instead of letting everything slow down:
+
+        1. draw only every other frame
+        2. switch off cosmetic effects (siren animation and horns)
+        3. spawn fewer regular vehicles
+
+    A step is taken after the frame time stayed over budget for a while and undone after the
+    frame time without it stayed well under budget for longer, so levels do not flap.
+    Every change is published on Topics.PERFORMANCE and shown in the HUD.
+    """
+    level_names = ["normaal", "frames overslaan", "geen effecten", "minder spawnen"]
+
+    smoothing = 0.1  # Weight of the newest frame in the averages
+    escalate_after = 1.0  # Seconds over budget before the next step
+    relax_after = 3.0  # Seconds well under budget before undoing a step
+    relax_margin = 0.75  # Fraction of the budget the frame time must stay under to undo a step
+
+    def __init__(self, simulation, messenger, budget=1 / 60, skip_rendering=True, spawn_rate_factor=0.5):
+        """
+        Args:
+            simulation (Simulation): Its spawner is throttled at the last level.
+            messenger (Messenger): Publishes the level changes.
+            budget (float): Seconds available per frame.
+            skip_rendering (bool): Whether drawing can be skipped, False when drawing runs on another thread.
+            spawn_rate_factor (float): Multiplier for the spawn rates at the last level.
+        """
+        self.simulation = simulation
+        self.messenger = messenger
+        self.budget = budget
+        self.skip_rendering = skip_rendering
+        self.spawn_rate_factor = spawn_rate_factor
+        self.level = 0
+        self.update_time = 0.0  # Averaged seconds per frame outside drawing
+        self.render_time = 0.0  # Averaged seconds per drawn frame
+        self.skipped_frames = 0
+        self.lost_time = 0.0  # Simulated seconds lost because vehicle steps are clamped
+        self._render_turn = True
+        self._last_frame = None
+        self._over_since = None
+        self._under_since = None
+
+    def should_render(self):
+        """Whether this frame should be drawn, every other frame is skipped from level 1."""
+        if self.level < 1 or not self.skip_rendering:
+            return True
+        self._render_turn = not self._render_turn
+        if not self._render_turn:
+            self.skipped_frames += 1
+        return self._render_turn
+
+    def frame_done(self, update_time, render_time=None):
+        """
+        Record the work of one frame and change the level when needed.
+
+        Args:
+            update_time (float): Seconds spent outside drawing, excluding the frame limiter.
+            render_time (float, optional): Seconds spent drawing, None if drawing was skipped.
+        """
+        now = time.monotonic()
+        if self._last_frame is not None:
+            self.lost_time += max(0.0, now - self._last_frame - Vehicle.max_step_time)
+        self._last_frame = now
+
+        self.update_time += (update_time - self.update_time) * self.smoothing
+        if render_time is not None:
+            self.render_time += (render_time - self.render_time) * self.smoothing
+
+        if self.frame_time(self.level) > self.budget:
+            self._under_since = None
+            if self._over_since is None:
+                self._over_since = now
+            elif now - self._over_since >= self.escalate_after and self.level < len(self.level_names) - 1:
+                self._over_since = now
+                self._set_level(self.level + 1)
+        elif self.level > 0 and self.frame_time(self._lower_level()) < self.budget * self.relax_margin:
+            self._over_since = None
+            if self._under_since is None:
+                self._under_since = now
+            elif now - self._under_since >= self.relax_after:
+                self._under_since = now
+                self._set_level(self._lower_level())
+        else:
+            self._over_since = None
+            self._under_since = None
+
+    def frame_time(self, level):
+        """Expected seconds per frame at a level, drawing costs half when every other frame is skipped."""
+        if self.skip_rendering and level >= 1:
+            return self.update_time + self.render_time / 2
+        return self.update_time + self.render_time
+
+    def _lower_level(self):
+        # Level 1 has no effect without skippable drawing, so it is skipped as well
+        if self.level == 2 and not self.skip_rendering:
+            return 0
+        return self.level - 1
+
+    def _set_level(self, level):
+        if level == 1 and not self.skip_rendering:
+            level = 2
+        self.level = level
+        Vehicle.cosmetic_effects = level < 2
+        self.simulation.vehicle_spawner.set_spawn_rate_factor(self.spawn_rate_factor if level >= 3 else 1.0)
+        print(f"Prestaties: niveau {level} ({self.level_names[level]}), frametijd {self.frame_time(0) * 1000:.1f}ms")
+        self.messenger.send(Topics.PERFORMANCE.value, self.status())
+
+    def status(self):
+        return {
+            "niveau": self.level,
+            "stap": self.level_names[self.level],
+            "frametijd_ms": round(self.frame_time(0) * 1000, 2),
+            "budget_ms": round(self.budget * 1000, 2),
+            "overgeslagen_frames": self.skipped_frames,
+            "tijdverlies_s": round(self.lost_time, 3),
+        }
+
+    def hud_lines(self):
+        """HUD line with the current level, only while load is being shed."""
+        if self.level == 0:
+            return []
+        return [f"Belasting: {self.level_names[self.level]} ({self.frame_time(0) * 1000:.1f}/{self.budget * 1000:.1f}ms)"]
@@ -0,0 +1,62 @@
+class DeltaMessage(dict):
+    """
+    A delta-mode message: {"volgnummer": int, "volledig": bool, "data": {...}}.
+    A dict subclass so it serialises as JSON unchanged, while encoders can recognise it.
+    """
+
+    @property
+    def sequence(self):
+        return self["volgnummer"]
+
+    @property
+    def keyframe(self):
+        return self["volledig"]
+
+    @property
+    def data(self):
+        return self["data"]
+
+
+class DeltaTracker:
+    """
+    Remembers the last state sent per topic and turns new states into DeltaMessages
+    that only contain the keys whose value changed. Keyframes contain the full state.
+    Sequence numbers are counted per topic, so subscribers can detect lost messages
+    and wait for the next keyframe to resync.
+    """
+
+    def __init__(self):
+        self._last_states = {}  # Topic -> last state sent
+        self._sequences = {}  # Topic -> sequence number of the last message
+
+    def reset(self):
+        """Forget all sent states, the next message of every topic becomes a keyframe."""
+        self._last_states.clear()
+
+    def update(self, topic, state, keyframe=False):
+        """
+        Compare a state to the last state sent on its topic.
+
+        Args:
+            topic (str): Topic of the state.
+            state (dict): Full state, keyed by lane or sensor name.
+            keyframe (bool): Send the full state regardless of changes.
+
+        Returns:
+            DeltaMessage or None: None when nothing changed and no keyframe is due.
+        """
+        previous = self._last_states.get(topic)
+        if previous is None:
+            keyframe = True
+
+        if keyframe:
+            data = dict(state)
+        else:
+            data = {key: value for key, value in state.items() if previous.get(key) != value}
+            if not data:
+                return None
+
+        self._last_states[topic] = state
+        sequence = (self._sequences.get(topic, -1) + 1) & 0xFFFFFFFF
+        self._sequences[topic] = sequence
+        return DeltaMessage(volgnummer=sequence, volledig=keyframe, data=data)
@@ -0,0 +1,101 @@
+import bisect
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram. Recording is O(log buckets) and allocation free,
+    so it can be used on the simulation and messaging hot paths.
+    """
+    # Upper bounds of the buckets in milliseconds, the last bucket is open ended
+    default_bounds_ms = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self, name="", bounds_ms=None):
+        """
+        Args:
+            name (str): Label used in summaries.
+            bounds_ms (tuple, optional): Sorted bucket upper bounds in milliseconds.
+        """
+        self.name = name
+        self.bounds_ms = tuple(bounds_ms or self.default_bounds_ms)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = None
+
+    def record(self, seconds):
+        """Record one latency, given in seconds."""
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        if self.min_ms is None or ms < self.min_ms:
+            self.min_ms = ms
+        if self.max_ms is None or ms > self.max_ms:
+            self.max_ms = ms
+
+    def merge(self, other):
+        """Add the samples of another histogram with the same buckets."""
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        if other.min_ms is not None:
+            self.min_ms = other.min_ms if self.min_ms is None else min(self.min_ms, other.min_ms)
+            self.max_ms = other.max_ms if self.max_ms is None else max(self.max_ms, other.max_ms)
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """
+        Estimate a percentile in milliseconds as the upper bound of the bucket it falls in.
+
+        Args:
+            p (float): Percentile between 0 and 100.
+        """
+        if not self.count:
+            return 0.0
+        rank = p / 100.0 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds_ms[i] if i < len(self.bounds_ms) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        """One line summary: count, mean, p50, p95, p99 and max."""
+        if not self.count:
+            return f"{self.name}: geen metingen"
+        return (
+            f"{self.name}: n={self.count} gem={self.mean_ms:.2f}ms p50<={self.percentile(50):g}ms "
+            f"p95<={self.percentile(95):g}ms p99<={self.percentile(99):g}ms max={self.max_ms:.2f}ms"
+        )
+
+    def format_buckets(self, width=40):
+        """Text bar chart of the non-empty buckets."""
+        lines = []
+        largest = max(self.counts) or 1
+        lower = 0
+        for i, count in enumerate(self.counts):
+            upper = self.bounds_ms[i] if i < len(self.bounds_ms) else None
+            if count:
+                label = f"{lower:g}-{upper:g}ms" if upper is not None else f">{lower:g}ms"
+                lines.append(f"{label:>14} {count:>8} {'#' * max(1, round(count / largest * width))}")
+            lower = upper
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "naam": self.name,
+            "grenzen_ms": list(self.bounds_ms),
+            "aantallen": list(self.counts),
+            "aantal": self.count,
+            "gemiddelde_ms": self.mean_ms,
+            "min_ms": self.min_ms,
+            "max_ms": self.max_ms,
+        }
@@ -0,0 +1,111 @@
+import json
+import threading
+from collections import OrderedDict
+from lib.messaging.latency_histogram import LatencyHistogram
+
+class LatencyTracker:
+    """
+    Measures how long it takes from a vehicle triggering a lane sensor until the controller's
+    green light for that lane is applied. A rising sensor edge on a lane that is not green opens
+    a measurement, the first green applied to that lane closes it. The arrival time of the light
+    change splits the latency into controller/network time and simulator time.
+
+    Controllers that echo the stamp frame of a sensor message on 'stoplichten' also give an
+    exact round trip per message.
+    """
+    max_open_stamps = 1024
+
+    def __init__(self):
+        self.total = LatencyHistogram("sensor -> licht")
+        self.arrival = LatencyHistogram("sensor -> ontvangst")
+        self.round_trip = LatencyHistogram("stempel rondreis")
+        self.per_lane = {}  # Lane id -> LatencyHistogram
+        self._edges = {}  # Lane id -> monotonic time of the rising edge
+        self._previous_demand = {}
+        self._sent_stamps = OrderedDict()  # Sequence -> monotonic send time
+        self._lock = threading.Lock()
+
+    def record_sensor_states(self, lane_states, now, is_green):
+        """
+        Detect rising sensor edges. Called every frame with the lane sensor payload.
+
+        Args:
+            lane_states (dict): {lane_id: {"voor": bool, "achter": bool}}
+            now (float): time.monotonic() of the sensor check.
+            is_green (callable): is_green(lane_id) -> bool
+        """
+        previous_demand = self._previous_demand
+        for lane_id, sensors in lane_states.items():
+            demand = sensors["voor"] or sensors["achter"]
+            if demand != previous_demand.get(lane_id, False):
+                previous_demand[lane_id] = demand
+                if demand:
+                    if lane_id not in self._edges and not is_green(lane_id):
+                        with self._lock:
+                            self._edges[lane_id] = now
+                else:
+                    # Demand went away before green, the measurement has no outcome
+                    with self._lock:
+                        self._edges.pop(lane_id, None)
+
+    def record_green(self, lane_id, applied_at, received_at=None):
+        """Close the open measurement of a lane when its green light is applied."""
+        with self._lock:
+            edge = self._edges.pop(lane_id, None)
+            if edge is None:
+                return
+            # The HUD reads per_lane on the render thread, new lanes are added under the lock
+            histogram = self.per_lane.get(lane_id)
+            if histogram is None:
+                histogram = self.per_lane[lane_id] = LatencyHistogram(lane_id)
+
+        latency = applied_at - edge
+        self.total.record(latency)
+        histogram.record(latency)
+        if received_at is not None and received_at >= edge:
+            self.arrival.record(received_at - edge)
+
+    def record_stamp_sent(self, sequence, sent_at):
+        with self._lock:
+            self._sent_stamps[sequence] = sent_at
+            if len(self._sent_stamps) > self.max_open_stamps:
+                self._sent_stamps.popitem(last=False)
+
+    def record_echo(self, sequence, received_at):
+        """Record the round trip of an echoed stamp, called from the listener."""
+        with self._lock:
+            sent_at = self._sent_stamps.pop(sequence, None)
+        if sent_at is not None:
+            self.round_trip.record(received_at - sent_at)
+
+    def hud_lines(self, worst=3):
+        """Short lines for the HUD: overall latency and the slowest lanes."""
+        if not self.total.count and not self.round_trip.count:
+            return []
+        lines = []
+        if self.total.count:
+            lines.append(f"Sensor->licht p50 {self.total.percentile(50):g}ms p95 {self.total.percentile(95):g}ms")
+        if self.round_trip.count:
+            lines.append(f"Rondreis p50 {self.round_trip.percentile(50):g}ms p95 {self.round_trip.percentile(95):g}ms")
+        with self._lock:
+            histograms = list(self.per_lane.values())
+        slowest = sorted(histograms, key=lambda h: h.mean_ms, reverse=True)[:worst]
+        for histogram in slowest:
+            lines.append(f"{histogram.name}: gem {histogram.mean_ms:.0f}ms max {histogram.max_ms:.0f}ms")
+        return lines
+
+    def to_dict(self):
+        with self._lock:
+            per_lane = sorted(self.per_lane.items())
+        return {
+            "totaal": self.total.to_dict(),
+            "ontvangst": self.arrival.to_dict(),
+            "rondreis": self.round_trip.to_dict(),
+            "per_baan": {lane: histogram.to_dict() for lane, histogram in per_lane},
+        }
+
+    def export(self, path):
+        """Write all histograms as JSON."""
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, indent=2)
+        print(f"Latentie geëxporteerd naar {path}")
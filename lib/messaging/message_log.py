@@ -0,0 +1,132 @@
+"""
+Append-only log of the messages exchanged with the controller, for offline replay.
+
+File layout: the magic b"SLOG" and a version byte, followed by records (big-endian):
+    direction (B), frame (I), time (d), topic length (B), payload length (I), topic, payload
+
+direction is INBOUND or OUTBOUND and time the seconds since recording started. frame is the
+simulation frame that sent an outbound message, or the frame whose update took an inbound
+message. Version 1 logs stored the running frame for inbound messages too, one frame early.
+"""
+
+import struct
+import threading
+import time
+
+MAGIC = b"SLOG"
+VERSION = 2
+RECORD = struct.Struct(">BIdBI")
+
+INBOUND = 0
+OUTBOUND = 1
+
+
+class MessageRecorder:
+    """Writes inbound and outbound messages to a log. Safe to use from several threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frame = 0  # Updated by the simulation every frame
+        self.records = 0
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + bytes([VERSION]))
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, direction, topic, payload, frame=None):
+        """
+        Args:
+            frame (int, optional): Frame to record the message with, the running frame by default.
+        """
+        topic = topic.encode('utf-8') if isinstance(topic, str) else topic
+        frame = self.frame if frame is None else frame
+        header = RECORD.pack(direction, frame, time.monotonic() - self._started, len(topic), len(payload))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(header + topic + payload)
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        print(f"{self.records} berichten opgenomen in {self.path}")
+
+
+def read_log(path):
+    """
+    Read a message log.
+
+    Yields:
+        tuple: (direction, frame, time, topic, payload) with topic as str and payload as bytes.
+    """
+    with open(path, 'rb') as file:
+        header = file.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is geen berichtenlog")
+        if header[len(MAGIC)] != VERSION:
+            raise ValueError(f"Niet ondersteunde logversie: {header[len(MAGIC)]}")
+
+        while True:
+            record = file.read(RECORD.size)
+            if len(record) < RECORD.size:
+                return  # End of file, or a record cut off while recording
+            direction, frame, elapsed, topic_length, payload_length = RECORD.unpack(record)
+            topic = file.read(topic_length)
+            payload = file.read(payload_length)
+            if len(payload) < payload_length:
+                return
+            yield direction, frame, elapsed, topic.decode('utf-8'), payload
+
+
+class MessageReplayer:
+    """
+    Feeds the recorded inbound messages of a log back into a Messenger, as if they came from
+    the controller. With a speed the recorded timing is followed (1.0 is real time); without
+    one every message is delivered in the frame it was recorded in, so the simulation can run
+    as fast as possible.
+    """
+
+    def __init__(self, path, messenger, speed=1.0):
+        """
+        Args:
+            path (str): Log written by MessageRecorder.
+            messenger (Messenger): Receives the messages through handle_frames.
+            speed (float, optional): Playback speed, None or 0 for frame-aligned fast replay.
+        """
+        self.messenger = messenger
+        self.speed = speed or None
+        self.inbound = [
+            (frame, elapsed, topic.encode('utf-8'), payload)
+            for direction, frame, elapsed, topic, payload in read_log(path)
+            if direction == INBOUND
+        ]
+        self.position = 0
+        self._started = None
+        print(f"Afspelen: {len(self.inbound)} berichten uit {path}")
+
+    @property
+    def finished(self):
+        return self.position >= len(self.inbound)
+
+    def update(self, frame):
+        """
+        Deliver the messages that are due. Called once per frame before the simulation update.
+
+        Args:
+            frame (int): The frame that is about to run, its update takes the delivered messages.
+        """
+        if self._started is None:
+            self._started = time.monotonic()
+        if self.speed is None:
+            due = lambda record: record[0] <= frame
+        else:
+            elapsed = (time.monotonic() - self._started) * self.speed
+            due = lambda record: record[1] <= elapsed
+
+        while self.position < len(self.inbound) and due(self.inbound[self.position]):
+            _, _, topic, payload = self.inbound[self.position]
+            self.messenger.handle_frames([topic, payload])
+            self.position += 1
@@ -0,0 +1,28 @@
+import struct
+
+# Third ZeroMQ frame on stamped messages: sequence number (I) and time.monotonic() in seconds (d)
+STAMP = struct.Struct(">Id")
+
+class StampedMessage:
+    """A message with a stamp frame. The publisher sends the stamp as a separate frame after the payload."""
+    __slots__ = ('message', 'sequence', 'sent_at')
+
+    def __init__(self, message, sequence, sent_at):
+        self.message = message
+        self.sequence = sequence
+        self.sent_at = sent_at
+
+    def stamp_frame(self):
+        return STAMP.pack(self.sequence, self.sent_at)
+
+
+def unpack_stamp(frame):
+    """
+    Read a stamp frame.
+
+    Returns:
+        tuple: (sequence, sent_at), or None if the frame is not a stamp.
+    """
+    if len(frame) != STAMP.size:
+        return None
+    return STAMP.unpack(frame)
@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+import zmq
+from collections import deque
+from lib.messaging.message_stamp import StampedMessage
+
+class OutboundPublisher:
+    """
+    Publishes outbound messages from a background thread, so serialisation and socket I/O
+    never run on the render thread. State topics are coalesced: only their latest value is
+    kept until it is sent. Other topics are sent in order from a bounded queue.
+    """
+
+    def __init__(self, socket, coalesced_topics=(), max_rates=None, max_queue_size=1000, encoder=None):
+        """
+        Initialize the publisher. Call start() to launch the publisher thread.
+
+        Args:
+            socket (zmq.Socket): PUB socket, only used from the publisher thread from now on.
+            coalesced_topics (iterable): Topics for which only the latest value matters.
+            max_rates (dict, optional): Maximum publish rate in Hz per topic. Rate limited
+                topics are always coalesced, intermediate values are dropped.
+            max_queue_size (int): Maximum number of queued messages for other topics.
+                The oldest message is dropped when the queue is full.
+            encoder (callable, optional): encoder(topic, message) -> bytes, JSON by default.
+        """
+        self.socket = socket
+        self.min_intervals = {topic: 1.0 / rate for topic, rate in (max_rates or {}).items() if rate > 0}
+        self.coalesced_topics = set(coalesced_topics) | set(self.min_intervals)
+        self.encoder = encoder or self.encode_json
+        self.dropped_messages = 0
+        self.sent_messages = 0  # Messages taken for sending, by the publisher thread or the AsyncRuntime
+
+        self._queue = deque(maxlen=max_queue_size)
+        self._latest = {}  # Coalesced topic -> latest unsent message
+        self._next_allowed = {}  # Topic -> earliest monotonic time of the next send
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    @staticmethod
+    def encode_json(topic, message):
+        """Default encoder: the message as UTF-8 JSON."""
+        return json.dumps(message).encode('utf-8')
+
+    def publish(self, topic, message, coalesce=True):
+        """
+        Hand a message to the publisher thread. Never blocks on I/O.
+        The message is serialised later, so it must not be modified afterwards.
+        Pass coalesce=False for messages that must not replace each other, such as deltas.
+        """
+        with self._condition:
+            if coalesce and topic in self.coalesced_topics:
+                self._latest[topic] = message
+            else:
+                if len(self._queue) == self._queue.maxlen:
+                    self.dropped_messages += 1
+                self._queue.append((topic, message))
+            self._condition.notify()
+
+    def start(self):
+        """Start the publisher thread."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Send everything that is still pending and stop the publisher thread."""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def take_due(self, now, flush=False):
+        """
+        Take the messages that may be sent now.
+
+        Returns:
+            tuple: (list of (topic, message), seconds until the next rate limited
+            message is due or None).
+        """
+        batch = list(self._queue)
+        self._queue.clear()
+
+        timeout = None
+        for topic in list(self._latest):
+            due = self._next_allowed.get(topic, 0)
+            if flush or now >= due:
+                batch.append((topic, self._latest.pop(topic)))
+                interval = self.min_intervals.get(topic)
+                if interval:
+                    self._next_allowed[topic] = now + interval
+            else:
+                wait = due - now
+                timeout = wait if timeout is None else min(timeout, wait)
+        self.sent_messages += len(batch)
+        return batch, timeout
+
+    def take_pending(self, flush=False):
+        """take_due for callers that send the messages themselves instead of the publisher thread."""
+        with self._condition:
+            return self.take_due(time.monotonic(), flush)
+
+    def frames(self, topic, message):
+        """Serialise a message into its ZeroMQ frames: topic, payload and an optional stamp."""
+        if isinstance(message, StampedMessage):
+            return [topic.encode('utf-8'), self.encoder(topic, message.message), message.stamp_frame()]
+        return [topic.encode('utf-8'), self.encoder(topic, message)]
+
+    def send_now(self, topic, message):
+        """Serialise and send a single message on the socket."""
+        try:
+            self.socket.send_multipart(self.frames(topic, message))
+        except zmq.ZMQError as e:
+            print(f"Fout bij versturen op topic '{topic}': {e}")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    running = self._running
+                    batch, timeout = self.take_due(time.monotonic(), flush=not running)
+                    if batch or not running:
+                        break
+                    self._condition.wait(timeout)
+
+            for topic, message in batch:
+                self.send_now(topic, message)
+
+            if not running:
+                return
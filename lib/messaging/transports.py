@@ -0,0 +1,106 @@
+import os
+import zmq
+
+class Transport:
+    """
+    Creates the PUB and SUB sockets of the Messenger. Subclasses decide where
+    the simulator publishes and where it listens for the controller.
+    """
+    # Whether the Messenger terminates the context on stop
+    owns_context = True
+
+    def create_context(self):
+        return zmq.Context()
+
+    def open(self, context):
+        """
+        Create, bind and connect the sockets.
+
+        Returns:
+            tuple: (pub_socket, sub_socket)
+        """
+        pub_socket = context.socket(zmq.PUB)
+        sub_socket = context.socket(zmq.SUB)
+        if self.pub_endpoint:
+            pub_socket.bind(self.pub_endpoint)
+        if self.sub_endpoint:
+            sub_socket.connect(self.sub_endpoint)
+        return pub_socket, sub_socket
+
+    def describe(self):
+        return f"publiceert op {self.pub_endpoint}, luistert naar {self.sub_endpoint}"
+
+
+class TcpTransport(Transport):
+    """The default: publish on a TCP port and subscribe to the controller over TCP."""
+
+    def __init__(self, pub_address="127.0.0.1", sub_address="127.0.0.1", pub_port=5556, sub_port=5555):
+        self.pub_endpoint = f"tcp://{pub_address}:{pub_port}"
+        self.sub_endpoint = f"tcp://{sub_address}:{sub_port}"
+
+
+class IpcTransport(Transport):
+    """Unix domain sockets, for a controller on the same host without the TCP overhead."""
+
+    def __init__(self, directory="/tmp", name="stoplicht"):
+        self.pub_endpoint = f"ipc://{os.path.join(directory, name)}-simulator"
+        self.sub_endpoint = f"ipc://{os.path.join(directory, name)}-controller"
+
+
+class InprocTransport(Transport):
+    """
+    In-process sockets for a controller running in the same process. Both sides must use
+    zmq.Context.instance(); the controller binds controller_endpoint and connects to pub_endpoint.
+    """
+    owns_context = False
+
+    def __init__(self, name="stoplicht"):
+        self.pub_endpoint = f"inproc://{name}-simulator"
+        self.sub_endpoint = f"inproc://{name}-controller"
+
+    @property
+    def controller_endpoint(self):
+        return self.sub_endpoint
+
+    def create_context(self):
+        return zmq.Context.instance()
+
+
+class NullTransport(Transport):
+    """Sockets that are neither bound nor connected, messages are encoded and dropped. For benchmarks."""
+    pub_endpoint = None
+    sub_endpoint = None
+
+    def describe(self):
+        return "geen verbinding (null transport)"
+
+
+def transport_from_config(config):
+    """
+    Build the transport selected in ip-config.yaml.
+
+    Args:
+        config (dict): Loaded ip-config.yaml, 'transport' is one of tcp, ipc, inproc or null.
+
+    Returns:
+        Transport: The configured transport, TCP when none is configured.
+    """
+    kind = config.get('transport', 'tcp')
+    name = config.get('transport_name', 'stoplicht')
+
+    if kind == 'tcp':
+        return TcpTransport(
+            config.get('pub_address', '127.0.0.1'),
+            config.get('sub_address', '127.0.0.1'),
+            config.get('pub_port', 5556),
+            config.get('sub_port', 5555)
+        )
+    if kind == 'ipc':
+        return IpcTransport(config.get('ipc_directory', '/tmp'), name)
+    if kind == 'inproc':
+        return InprocTransport(name)
+    if kind == 'null':
+        return NullTransport()
+
+    print(f"Onbekend transport '{kind}', tcp wordt gebruikt")
+    return transport_from_config({**config, 'transport': 'tcp'})
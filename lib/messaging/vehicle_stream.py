@@ -0,0 +1,164 @@
+"""
+Binary stream of vehicle states on the 'voertuigen' topic, for external visualisers.
+
+Frame layout (big-endian):
+    header   magic (2s) b"SV", version (B), flags (B), sequence (I), vehicle count (H)
+    vehicle  id (I), type (B), x (h), y (h), heading (B)    repeated vehicle count times
+    removed  count (H), then id (I) per vehicle that left   delta frames only
+
+Coordinates are world coordinates rounded to whole units, the heading is the angle in
+degrees scaled to 0-255. Keyframes (FLAG_KEYFRAME) contain every vehicle, delta frames
+only the vehicles whose quantised state changed and the ids of vehicles that left.
+"""
+
+import struct
+import time
+from lib.enums.topics import Topics
+
+MAGIC = b"SV"
+VERSION = 1
+FLAG_KEYFRAME = 0x01
+
+HEADER = struct.Struct(">2sBBIH")
+VEHICLE = struct.Struct(">IBhhB")
+COUNT = struct.Struct(">H")
+VEHICLE_ID = struct.Struct(">I")
+
+TYPE_CODES = {
+    "car": 1,
+    "bus": 2,
+    "bike": 3,
+    "pedestrian": 4,
+    "boat": 5,
+    "emergency_vehicle": 6,
+}
+TYPES_BY_CODE = {code: vehicle_type for vehicle_type, code in TYPE_CODES.items()}
+
+
+class VehicleStream:
+    """
+    Publishes quantised vehicle states at a fixed rate, as raw bytes on Topics.VEHICLE_STATES.
+    """
+
+    def __init__(self, messenger, rate=20, keyframe_interval=5.0):
+        """
+        Args:
+            messenger (Messenger): Used to publish the frames.
+            rate (float): Frames per second, 0 disables the stream.
+            keyframe_interval (float): Seconds between keyframes, so late subscribers can start.
+        """
+        self.messenger = messenger
+        self.interval = 1.0 / rate if rate else None
+        self.keyframe_interval = keyframe_interval
+        self.sequence = 0
+        self._sent = {}  # Vehicle id -> quantised (type, x, y, heading) last sent
+        self._next_frame = 0
+        self._next_keyframe = 0
+
+    def update(self, vehicles):
+        """Publish a frame if one is due. Called once per simulation frame."""
+        if self.interval is None:
+            return
+        now = time.monotonic()
+        if now < self._next_frame:
+            return
+        self._next_frame = max(self._next_frame + self.interval, now)
+
+        keyframe = now >= self._next_keyframe
+        if keyframe:
+            self._next_keyframe = now + self.keyframe_interval
+
+        frame = self.build_frame(vehicles, keyframe)
+        if frame is not None:
+            self.messenger.send_raw(Topics.VEHICLE_STATES.value, frame)
+
+    def build_frame(self, vehicles, keyframe):
+        """
+        Encode the vehicles into one frame.
+
+        Returns:
+            bytes or None: None for a delta frame without any changes.
+        """
+        sent = self._sent
+        current = {}
+        changed = []
+        for vehicle in vehicles:
+            state = (
+                TYPE_CODES.get(vehicle.vehicle_type_string, 0),
+                _clamp_int16(vehicle.x),
+                _clamp_int16(vehicle.y),
+                int(round(vehicle.angle % 360 * 256 / 360)) & 0xFF,
+            )
+            current[vehicle.id] = state
+            if keyframe or sent.get(vehicle.id) != state:
+                changed.append((vehicle.id, state))
+
+        removed = [] if keyframe else [vehicle_id for vehicle_id in sent if vehicle_id not in current]
+        self._sent = current
+        if not keyframe and not changed and not removed:
+            return None
+
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        size = HEADER.size + VEHICLE.size * len(changed)
+        if not keyframe:
+            size += COUNT.size + VEHICLE_ID.size * len(removed)
+
+        frame = bytearray(size)
+        HEADER.pack_into(frame, 0, MAGIC, VERSION, FLAG_KEYFRAME if keyframe else 0, self.sequence, len(changed))
+        offset = HEADER.size
+        pack_vehicle = VEHICLE.pack_into
+        for vehicle_id, (type_code, x, y, heading) in changed:
+            pack_vehicle(frame, offset, vehicle_id & 0xFFFFFFFF, type_code, x, y, heading)
+            offset += VEHICLE.size
+
+        if not keyframe:
+            COUNT.pack_into(frame, offset, len(removed))
+            offset += COUNT.size
+            for vehicle_id in removed:
+                VEHICLE_ID.pack_into(frame, offset, vehicle_id & 0xFFFFFFFF)
+                offset += VEHICLE_ID.size
+        return bytes(frame)
+
+
+def _clamp_int16(value):
+    return max(-32768, min(32767, int(round(value))))
+
+
+class VehicleStreamDecoder:
+    """Reference decoder: keeps the vehicle states of a subscriber up to date."""
+
+    def __init__(self):
+        self.vehicles = {}  # Vehicle id -> (type, x, y, heading in degrees)
+        self.sequence = None
+        self.synchronised = False
+        self.lost_frames = 0
+
+    def apply(self, payload):
+        """Apply one frame. Delta frames are ignored until the first keyframe arrived."""
+        magic, version, flags, sequence, count = HEADER.unpack_from(payload)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Geen voertuigen frame")
+
+        if self.sequence is not None and sequence != (self.sequence + 1) & 0xFFFFFFFF:
+            self.lost_frames += 1
+        self.sequence = sequence
+
+        keyframe = bool(flags & FLAG_KEYFRAME)
+        if keyframe:
+            self.vehicles.clear()
+            self.synchronised = True
+        elif not self.synchronised:
+            return
+
+        offset = HEADER.size
+        for _ in range(count):
+            vehicle_id, type_code, x, y, heading = VEHICLE.unpack_from(payload, offset)
+            self.vehicles[vehicle_id] = (TYPES_BY_CODE.get(type_code), x, y, heading * 360 / 256)
+            offset += VEHICLE.size
+
+        if not keyframe:
+            (removed,) = COUNT.unpack_from(payload, offset)
+            offset += COUNT.size
+            for _ in range(removed):
+                self.vehicles.pop(VEHICLE_ID.unpack_from(payload, offset)[0], None)
+                offset += VEHICLE_ID.size
@@ -0,0 +1,260 @@
+"""
+Compact binary encoding of the simulator topics, used instead of JSON once a controller
+asks for it on the Topics.WIRE_FORMAT handshake topic.
+
+Every payload starts with a versioned header (big-endian):
+    magic (2s) b"SL", version (B), topic code (B), layout id (H), flags (B)
+
+Bodies per topic:
+    sensoren_rijbaan   2 bits per lane in layout order: bit 2i = voor, bit 2i+1 = achter
+    sensoren_speciaal  1 bit per special sensor in layout order
+    sensoren_bruggen   count (B), then per lane: lane index (H), state (B)
+    voorrangsvoertuig  count (B), then per vehicle: lane index (H), simulatie_tijd_ms (I), prioriteit (B)
+    tijd               simulatie_tijd_ms (Q)
+
+Bit fields are little-endian integers padded to whole bytes.
+
+Delta messages set FLAG_DELTA (and FLAG_KEYFRAME for full states) and start their body with
+the sequence number (I). Sensor topics then carry a presence bit field (1 bit per lane or
+sensor) followed by the normal value bits, only present entries are part of the delta.
+Bridge and priority bodies are unchanged and contain the changed entries.
+"""
+
+import struct
+import zlib
+from lib.enums.topics import Topics
+
+MAGIC = b"SL"
+VERSION = 1
+HEADER = struct.Struct(">2sBBHB")
+
+BRIDGE_ENTRY = struct.Struct(">HB")
+PRIORITY_ENTRY = struct.Struct(">HIB")
+COUNT = struct.Struct(">B")
+TIME = struct.Struct(">Q")
+SEQUENCE = struct.Struct(">I")
+
+FLAG_DELTA = 0x01
+FLAG_KEYFRAME = 0x02
+
+UNKNOWN_LANE = 0xFFFF
+
+TOPIC_CODES = {
+    Topics.LANE_SENSORS_UPDATE.value: 1,
+    Topics.SPECIAL_SENSORS_UPDATE.value: 2,
+    Topics.BRIDGE_SENSORS_UPDATE.value: 3,
+    Topics.PRIORITY_VEHICLE.value: 4,
+    Topics.TIME.value: 5,
+}
+TOPICS_BY_CODE = {code: topic for topic, code in TOPIC_CODES.items()}
+
+BRIDGE_STATES = ["dicht", "open", "onbekend"]
+
+
+class WireLayout:
+    """
+    Fixed ordering of lanes and special sensors shared by the simulator and the controller.
+    Sent to the controller in the handshake reply, identified in every header by its layout id.
+    """
+
+    def __init__(self, lanes, sensor_lanes, special_sensors):
+        """
+        Args:
+            lanes (list): All lane ids, used for bridge and priority vehicle entries.
+            sensor_lanes (list): Lane ids in the sensoren_rijbaan payload.
+            special_sensors (list): Names of the special sensors.
+        """
+        self.lanes = list(lanes)
+        self.sensor_lanes = list(sensor_lanes)
+        self.special_sensors = list(special_sensors)
+        self.lane_indices = {lane: i for i, lane in enumerate(self.lanes)}
+
+        description = "|".join([",".join(self.lanes), ",".join(self.sensor_lanes), ",".join(self.special_sensors)])
+        self.layout_id = zlib.crc32(description.encode('utf-8')) & 0xFFFF
+
+    def to_dict(self):
+        return {
+            "indeling_id": self.layout_id,
+            "banen": self.lanes,
+            "rijbaan_sensoren": self.sensor_lanes,
+            "speciale_sensoren": self.special_sensors,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        layout = cls(data["banen"], data["rijbaan_sensoren"], data["speciale_sensoren"])
+        if layout.layout_id != data.get("indeling_id", layout.layout_id):
+            raise ValueError("Indeling komt niet overeen met indeling_id")
+        return layout
+
+
+class BinaryEncoder:
+    """Encodes simulator messages in the binary wire format for a given layout."""
+
+    def __init__(self, layout):
+        self.layout = layout
+        self._lane_bytes = (len(layout.sensor_lanes) * 2 + 7) // 8
+        self._special_bytes = (len(layout.special_sensors) + 7) // 8
+
+    def supports(self, topic):
+        return topic in TOPIC_CODES
+
+    def encode(self, topic, message, flags=0):
+        header = HEADER.pack(MAGIC, VERSION, TOPIC_CODES[topic], self.layout.layout_id, flags)
+        return header + self._encode_body(topic, message)
+
+    def encode_delta(self, topic, message):
+        """Encode a DeltaMessage: sequence number, presence bits and the changed values."""
+        flags = FLAG_DELTA | (FLAG_KEYFRAME if message.keyframe else 0)
+        header = HEADER.pack(MAGIC, VERSION, TOPIC_CODES[topic], self.layout.layout_id, flags)
+        data = message.data
+
+        if topic == Topics.LANE_SENSORS_UPDATE.value:
+            present = self._presence_bits(self.layout.sensor_lanes, data)
+            presence = present.to_bytes((len(self.layout.sensor_lanes) + 7) // 8, 'little')
+        elif topic == Topics.SPECIAL_SENSORS_UPDATE.value:
+            presence = self._presence_bits(self.layout.special_sensors, data).to_bytes(self._special_bytes, 'little')
+        else:
+            presence = b""
+
+        return header + SEQUENCE.pack(message.sequence) + presence + self._encode_body(topic, data)
+
+    @staticmethod
+    def _presence_bits(names, data):
+        bits = 0
+        for i, name in enumerate(names):
+            if name in data:
+                bits |= 1 << i
+        return bits
+
+    def _encode_body(self, topic, message):
+        if topic == Topics.LANE_SENSORS_UPDATE.value:
+            bits = 0
+            for i, lane in enumerate(self.layout.sensor_lanes):
+                sensors = message.get(lane)
+                if sensors:
+                    if sensors.get("voor"):
+                        bits |= 1 << (2 * i)
+                    if sensors.get("achter"):
+                        bits |= 1 << (2 * i + 1)
+            return bits.to_bytes(self._lane_bytes, 'little')
+
+        if topic == Topics.SPECIAL_SENSORS_UPDATE.value:
+            bits = 0
+            for i, name in enumerate(self.layout.special_sensors):
+                if message.get(name):
+                    bits |= 1 << i
+            return bits.to_bytes(self._special_bytes, 'little')
+
+        if topic == Topics.BRIDGE_SENSORS_UPDATE.value:
+            body = [COUNT.pack(len(message))]
+            for lane, data in message.items():
+                body.append(BRIDGE_ENTRY.pack(
+                    self.layout.lane_indices.get(lane, UNKNOWN_LANE),
+                    BRIDGE_STATES.index(data["state"])
+                ))
+            return b"".join(body)
+
+        if topic == Topics.PRIORITY_VEHICLE.value:
+            queue = message["queue"]
+            body = [COUNT.pack(len(queue))]
+            for entry in queue:
+                body.append(PRIORITY_ENTRY.pack(
+                    self.layout.lane_indices.get(entry["baan"], UNKNOWN_LANE),
+                    entry["simulatie_tijd_ms"] & 0xFFFFFFFF,
+                    entry["prioriteit"]
+                ))
+            return b"".join(body)
+
+        if topic == Topics.TIME.value:
+            return TIME.pack(message["simulatie_tijd_ms"])
+
+        raise ValueError(f"Topic '{topic}' heeft geen binaire codering")
+
+
+def is_binary(payload):
+    """Return True if a payload is in the binary wire format rather than JSON."""
+    return payload[:2] == MAGIC
+
+
+def decode(payload, layout):
+    """
+    Reference decoder: turn a binary payload back into the JSON-equivalent message.
+
+    Args:
+        payload (bytes): Binary payload including the header.
+        layout (WireLayout): Layout received in the handshake reply.
+
+    Returns:
+        tuple: (topic, message, flags)
+    """
+    magic, version, code, layout_id, flags = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("Geen binair bericht")
+    if version != VERSION:
+        raise ValueError(f"Niet ondersteunde versie: {version}")
+    if layout_id != layout.layout_id:
+        raise ValueError("Bericht gebruikt een andere indeling")
+
+    topic = TOPICS_BY_CODE[code]
+    body = memoryview(payload)[HEADER.size:]
+    if not flags & FLAG_DELTA:
+        return topic, _decode_body(topic, body, layout), flags
+
+    (sequence,) = SEQUENCE.unpack_from(body)
+    body = body[SEQUENCE.size:]
+    if topic == Topics.LANE_SENSORS_UPDATE.value:
+        names = layout.sensor_lanes
+    elif topic == Topics.SPECIAL_SENSORS_UPDATE.value:
+        names = layout.special_sensors
+    else:
+        names = None
+
+    if names is None:
+        data = _decode_body(topic, body, layout)
+    else:
+        presence_size = (len(names) + 7) // 8
+        present = int.from_bytes(body[:presence_size], 'little')
+        values = _decode_body(topic, body[presence_size:], layout)
+        data = {name: values[name] for i, name in enumerate(names) if present >> i & 1}
+
+    message = {"volgnummer": sequence, "volledig": bool(flags & FLAG_KEYFRAME), "data": data}
+    return topic, message, flags
+
+
+def _decode_body(topic, body, layout):
+    if topic == Topics.LANE_SENSORS_UPDATE.value:
+        bits = int.from_bytes(body, 'little')
+        return {
+            lane: {"voor": bool(bits >> (2 * i) & 1), "achter": bool(bits >> (2 * i + 1) & 1)}
+            for i, lane in enumerate(layout.sensor_lanes)
+        }
+
+    if topic == Topics.SPECIAL_SENSORS_UPDATE.value:
+        bits = int.from_bytes(body, 'little')
+        return {name: bool(bits >> i & 1) for i, name in enumerate(layout.special_sensors)}
+
+    if topic == Topics.BRIDGE_SENSORS_UPDATE.value:
+        (count,) = COUNT.unpack_from(body)
+        message = {}
+        for i in range(count):
+            lane_index, state = BRIDGE_ENTRY.unpack_from(body, COUNT.size + i * BRIDGE_ENTRY.size)
+            message[_lane(layout, lane_index)] = {"state": BRIDGE_STATES[state]}
+        return message
+
+    if topic == Topics.PRIORITY_VEHICLE.value:
+        (count,) = COUNT.unpack_from(body)
+        queue = []
+        for i in range(count):
+            lane_index, sim_time, priority = PRIORITY_ENTRY.unpack_from(body, COUNT.size + i * PRIORITY_ENTRY.size)
+            queue.append({"baan": _lane(layout, lane_index), "simulatie_tijd_ms": sim_time, "prioriteit": priority})
+        return {"queue": queue}
+
+    if topic == Topics.TIME.value:
+        return {"simulatie_tijd_ms": TIME.unpack_from(body)[0]}
+
+    raise ValueError(f"Onbekend topic: {topic}")
+
+
+def _lane(layout, lane_index):
+    return None if lane_index == UNKNOWN_LANE else layout.lanes[lane_index]
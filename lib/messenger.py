@@ -3,22 +3,84 @@ import zmq
 import threading
 import yaml
 import os
+import time
 from lib.enums.topics import Topics
+from lib.messaging.outbound_publisher import OutboundPublisher
+from lib.messaging import wire_format
+from lib.messaging.delta_state import DeltaMessage, DeltaTracker
+from lib.messaging.transports import transport_from_config
+from lib.messaging.latency_tracker import LatencyTracker
+from lib.messaging.message_stamp import StampedMessage, unpack_stamp
+from lib.messaging.message_log import INBOUND, OUTBOUND, MessageRecorder
 
 class Messenger:
-    def __init__(self):
+    # Topics that carry a full state snapshot, only their latest value is published
+    coalesced_topics = (
+        Topics.TIME.value,
+        Topics.LANE_SENSORS_UPDATE.value,
+        Topics.SPECIAL_SENSORS_UPDATE.value,
+    )
+
+    def __init__(self, threaded=True, transport=None, record_path=None):
+        """
+        Args:
+            threaded (bool): Start the publisher thread. Pass False when an AsyncRuntime
+                drives sending and receiving instead.
+            transport (Transport, optional): Where to publish and listen. Defaults to the
+                transport configured in ip-config.yaml (TCP on ports 5556 and 5555).
+            record_path (str, optional): Record all inbound and outbound messages to this log,
+                defaults to record_path in ip-config.yaml.
+        """
         self._load_config()
+        if transport is not None:
+            self.transport = transport
+        record_path = record_path or self.record_path
+        self.recorder = MessageRecorder(record_path) if record_path else None
+        print(f"Transport: {self.transport.describe()}")
         
-        self.context = zmq.Context()
-        self.pub_socket = self.context.socket(zmq.PUB)
-        self.sub_socket = self.context.socket(zmq.SUB)
-        self.pub_socket.bind(f"tcp://{self.pub_address}:5556")
-        self.sub_socket.connect(f"tcp://{self.sub_address}:5555")
+        self.context = self.transport.create_context()
+        self.pub_socket, self.sub_socket = self.transport.open(self.context)
         self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, self.receive_topic)
+        self.sub_socket.setsockopt_string(zmq.SUBSCRIBE, Topics.WIRE_FORMAT.value)
         self.running = False
         self.listener_thread = None
+        # Merged traffic light state, its version increases with every message that changed it
         self.traffic_light_data = None
+        self.traffic_light_version = 0
+        self._taken_traffic_light_version = 0  # Version at the last take_traffic_light_changes
+        self._pending_traffic_light_changes = {}
+        self.traffic_light_received_at = {}  # Lane id -> monotonic arrival time of its last change
+        # Reentrant, handle_frames records and merges a light message in one hold
+        self._traffic_light_lock = threading.RLock()
+        self.frame = 0  # Simulation frame that is running, see set_frame
+        self._intake_frame = 1  # Frame whose update takes the light changes received now
         self.connected = True
+        self.received_messages = 0  # Multipart messages handled, for the HUD
+
+        # Binary encoding is only used after a controller asked for it in the handshake
+        self.wire_layout = None
+        self.binary_encoder = None
+
+        # Delta mode is also negotiated in the handshake
+        self.delta_updates = False
+        self.delta_tracker = DeltaTracker()
+        self._delta_lock = threading.Lock()
+
+        # Stamp frames on state messages, negotiated in the handshake, for latency measurements
+        self.stamp_messages = False
+        self._stamp_sequence = 0
+        self.latency_tracker = LatencyTracker()
+
+        # Serialisation and sending happen on the publisher thread
+        self.publisher = OutboundPublisher(
+            self.pub_socket,
+            coalesced_topics=self.coalesced_topics,
+            max_rates=self.max_publish_rates,
+            max_queue_size=self.outbound_queue_size,
+            encoder=self._encode
+        )
+        if threaded:
+            self.publisher.start()
 
     def _load_config(self):
         """Load configuration from YAML file"""
@@ -49,16 +111,191 @@ class Messenger:
         # Set configuration with fallback to defaults
         self.pub_address = config.get('pub_address', default_config['pub_address'])
         self.sub_address = config.get('sub_address', default_config['sub_address'])
-        print(f"Publisher address: {self.pub_address}")
-        print(f"Subscriber address: {self.sub_address}")
+        self.max_publish_rates = config.get('max_publish_rates') or {}
+        self.outbound_queue_size = config.get('outbound_queue_size', 1000)
+        self.binary_format = config.get('binary_format', False)
+        self.latency_export = config.get('latency_export')
+        self.vehicle_stream_rate = config.get('vehicle_stream_rate', 0)
+        self.record_path = config.get('record_path')
+        self.transport = transport_from_config({**default_config, **config})
         self.receive_topic = "stoplichten"
 
     def send(self, topic, message):
-        """Sends a message on the specified topic."""
+        """
+        Queues a message on the specified topic for the publisher thread.
+        The message is serialised later, so it must not be modified afterwards.
+        """
         # if (topic == Topics.PRIORITY_VEHICLE.value):
         #     print(message)
-        json_message = json.dumps(message)
-        self.pub_socket.send_multipart([topic.encode('utf-8'), json_message.encode('utf-8')])
+        self.publisher.publish(topic, message)
+
+    def send_state(self, topic, state, keyframe=False):
+        """
+        Send a full state snapshot (lane sensors, special sensors, bridge, priority queue).
+        Without delta mode this is the same as send(). In delta mode only the changed keys
+        are sent, wrapped as {"volgnummer", "volledig", "data"}; keyframe=True sends the full state.
+        Deltas are never coalesced or rate limited, since every one of them is needed.
+        """
+        if self.delta_updates:
+            with self._delta_lock:
+                message = self.delta_tracker.update(topic, state, keyframe)
+            if message is None:
+                return
+            coalesce = False
+        else:
+            message, coalesce = state, True
+
+        if self.stamp_messages:
+            message = self._stamp(message)
+        self.publisher.publish(topic, message, coalesce=coalesce)
+
+    def _stamp(self, message):
+        """Wrap a message with a sequence number and send time for the stamp frame."""
+        self._stamp_sequence = (self._stamp_sequence + 1) & 0xFFFFFFFF
+        stamped = StampedMessage(message, self._stamp_sequence, time.monotonic())
+        self.latency_tracker.record_stamp_sent(stamped.sequence, stamped.sent_at)
+        return stamped
+
+    def send_raw(self, topic, payload):
+        """Queue an already encoded payload (bytes), sent as is and never coalesced."""
+        self.publisher.publish(topic, payload, coalesce=False)
+
+    def set_wire_layout(self, layout):
+        """Set the WireLayout offered to controllers that ask for the binary format."""
+        self.wire_layout = layout
+
+    def _encode(self, topic, message):
+        """Serialise a message for the publisher thread, binary if negotiated and JSON otherwise."""
+        encoder = self.binary_encoder
+        if isinstance(message, bytes):
+            payload = message
+        elif encoder is not None and encoder.supports(topic):
+            if isinstance(message, DeltaMessage):
+                payload = encoder.encode_delta(topic, message)
+            else:
+                payload = encoder.encode(topic, message)
+        else:
+            payload = OutboundPublisher.encode_json(topic, message)
+
+        if self.recorder is not None:
+            self.recorder.record(OUTBOUND, topic, payload)
+        return payload
+
+    def set_frame(self, frame):
+        """Tell the messenger which simulation frame is running, used when recording."""
+        self.frame = frame
+        if self.recorder is not None:
+            self.recorder.frame = frame
+
+    def _handle_wire_format_request(self, request):
+        """
+        Answer a handshake on Topics.WIRE_FORMAT. A controller asks for the binary format with
+        {"formaat": "binair", "versie": 1}, anything else switches back to JSON. Adding
+        "delta": true enables delta mode (see send_state) and "stempel": true adds a stamp
+        frame (sequence number and monotonic time) to state messages. The reply is always JSON and
+        contains the layout needed to decode binary messages.
+        """
+        wants_binary = request.get("formaat") == "binair" and request.get("versie") == wire_format.VERSION
+        if wants_binary and self.binary_format and self.wire_layout is not None:
+            self.binary_encoder = wire_format.BinaryEncoder(self.wire_layout)
+            reply = {
+                "formaat": "binair",
+                "versie": wire_format.VERSION,
+                "indeling": self.wire_layout.to_dict(),
+            }
+        else:
+            if wants_binary:
+                print("Binair formaat gevraagd maar niet ingeschakeld, JSON wordt gebruikt")
+            self.binary_encoder = None
+            reply = {"formaat": "json"}
+
+        # Start every topic with a keyframe in the new mode
+        with self._delta_lock:
+            self.delta_updates = bool(request.get("delta"))
+            self.delta_tracker.reset()
+        reply["delta"] = self.delta_updates
+        self.stamp_messages = bool(request.get("stempel"))
+        reply["stempel"] = self.stamp_messages
+        self.send(Topics.WIRE_FORMAT.value, reply)
+
+    def handle_frames(self, frames):
+        """Handle one received multipart message, called by the listener thread or the AsyncRuntime."""
+        if len(frames) < 2:
+            print(f"Onverwacht aantal frames ontvangen: {len(frames)}")
+            return
+
+        received_at = time.monotonic()
+        self.received_messages += 1
+        topic = frames[0].decode('utf-8')
+        message = frames[1].decode('utf-8')
+
+        # Light messages are recorded and merged in one hold of the lock, so the frame they are
+        # recorded with is the frame whose update takes them, which makes replays frame-exact
+        with self._traffic_light_lock:
+            if self.recorder is not None:
+                self.recorder.record(INBOUND, frames[0], frames[1], frame=self._intake_frame)
+            if topic == self.receive_topic:
+                self._handle_traffic_light_message(frames, message, received_at)
+                return
+
+        if topic == Topics.WIRE_FORMAT.value:
+            try:
+                self._handle_wire_format_request(json.loads(message))
+            except (json.JSONDecodeError, AttributeError) as err:
+                print(f"Ongeldig formaat verzoek: {err}")
+
+    def _handle_traffic_light_message(self, frames, message, received_at):
+        # print(f"Ontvangen bericht op topic '{topic}': {message}")
+
+        # Add validation before parsing JSON
+        try:
+            # Check if message starts with { to detect potential JSON
+            if message.strip().startswith('{'):
+                self._merge_traffic_light_data(json.loads(message), received_at)
+            else:
+                print(f"Geen geldige JSON ontvangen: {message}")
+        except json.JSONDecodeError as json_err:
+            print(f"JSON parsing fout: {json_err}")
+
+        # Controllers may echo the stamp of the sensor message they reacted to
+        stamp = unpack_stamp(frames[2]) if len(frames) >= 3 else None
+        if stamp is not None:
+            self.latency_tracker.record_echo(stamp[0], received_at)
+
+    def _merge_traffic_light_data(self, data, received_at=None):
+        """
+        Merge a traffic light message into the known state. Lanes missing from the message
+        keep their color. Changed lanes are collected until the simulation takes them, so
+        messages arriving between two frames are conflated into a single set of changes.
+        """
+        with self._traffic_light_lock:
+            current = self.traffic_light_data or {}
+            changes = {lane: color for lane, color in data.items() if current.get(lane) != color}
+            if not changes:
+                return
+            # Replace instead of mutate, readers may hold the previous dict
+            self.traffic_light_data = {**current, **changes}
+            self._pending_traffic_light_changes.update(changes)
+            if received_at is not None:
+                for lane in changes:
+                    self.traffic_light_received_at[lane] = received_at
+            self.traffic_light_version += 1
+
+    def take_traffic_light_changes(self):
+        """
+        Return the lanes whose color changed since the previous call, as {lane_id: color}.
+        Returns an empty dict when nothing changed.
+        """
+        # Most frames receive nothing, comparing the version avoids taking the lock for them.
+        # While recording the lock is always taken, it decides the frame of the next messages
+        if self.recorder is None and self.traffic_light_version == self._taken_traffic_light_version:
+            return {}
+        with self._traffic_light_lock:
+            changes = self._pending_traffic_light_changes
+            self._pending_traffic_light_changes = {}
+            self._taken_traffic_light_version = self.traffic_light_version
+            self._intake_frame = self.frame + 1
+        return changes
 
     def receive(self):
         """Start listening to messages."""
@@ -77,30 +314,14 @@ class Messenger:
                     # Poll every 50ms for incoming messages
                     events = dict(poller.poll(timeout=50))
                     if self.sub_socket in events:
-                        try:
-                            # Use non-blocking receive
-                            frames = self.sub_socket.recv_multipart(flags=zmq.NOBLOCK)
-                        except zmq.Again:
-                            continue  # No message, continue polling
-                       
-                        if len(frames) >= 2:
-                            topic = frames[0].decode('utf-8')
-                            message = frames[1].decode('utf-8')
-                           
-                            if topic == self.receive_topic:
-                                # print(f"Ontvangen bericht op topic '{topic}': {message}")
-                               
-                                # Add validation before parsing JSON
-                                try:
-                                    # Check if message starts with { to detect potential JSON
-                                    if message.strip().startswith('{'):
-                                        self.traffic_light_data = json.loads(message)
-                                    else:
-                                        print(f"Geen geldige JSON ontvangen: {message}")
-                                except json.JSONDecodeError as json_err:
-                                    print(f"JSON parsing fout: {json_err}")
-                        else:
-                            print(f"Onverwacht aantal frames ontvangen: {len(frames)}")
+                        # Drain everything that arrived, only the merged result is applied
+                        while True:
+                            try:
+                                # Use non-blocking receive
+                                frames = self.sub_socket.recv_multipart(flags=zmq.NOBLOCK)
+                            except zmq.Again:
+                                break  # Nothing left, continue polling
+                            self.handle_frames(frames)
             except Exception as e:
                 print(f"Fout in listener: {e}")
             finally:
@@ -110,10 +331,16 @@ class Messenger:
         self.listener_thread.start()
 
     def stop(self):
-        """Stops the listener."""
+        """Stops the listener and flushes pending outbound messages."""
         self.running = False
         if self.listener_thread:
             self.listener_thread.join()
+        self.publisher.stop()
         self.sub_socket.close()
         self.pub_socket.close()
-        self.context.term()
\ No newline at end of file
+        if self.transport.owns_context:
+            self.context.term()
+        if self.latency_export:
+            self.latency_tracker.export(self.latency_export)
+        if self.recorder is not None:
+            self.recorder.close()
\ No newline at end of file
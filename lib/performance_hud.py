@@ -0,0 +1,170 @@
+import pygame
+import time
+from collections import deque
+from lib.screen import screen, scale_to_display, WORLD_WIDTH
+
+class PerformanceHud:
+    """
+    Performance overlay in the top-right corner: FPS with a graph of the recent frame times,
+    vehicles per type, occupancy of the spatial grid and message rates, followed by the
+    lines of line_source, such as load shedding and latencies.
+
+    The text and graph are only rendered again every update_interval, and only lines whose
+    text changed are rendered with the font. In between sprites() returns the same surfaces,
+    so the dirty rect renderer does not redraw the HUD at all.
+    """
+    update_interval = 0.5  # Seconds between refreshes of the numbers and the graph
+    history = 120  # Frame times shown in the graph
+    budget = 1 / 60  # Frame time drawn as a reference line in the graph
+
+    def __init__(self, simulation=None, messenger=None):
+        """
+        Args:
+            simulation (Simulation, optional): Source of the vehicle counts and grid occupancy.
+            messenger (Messenger, optional): Source of the message rates.
+        """
+        self.simulation = simulation
+        self.messenger = messenger
+        self.line_source = None  # Optional callable returning extra lines shown at the bottom
+        self.current_fps = 0
+        self.frame_times = deque(maxlen=self.history)  # Seconds between the last drawn frames
+        self._frames = 0
+        self._last_frame = None
+        self._last_update = time.perf_counter()
+        self._message_counts = None  # (sent, received) at the last refresh
+        self._message_rates = (0.0, 0.0)
+        self._font = None
+        self._font_size = None
+        self._line_surfaces = {}  # (text, color) -> surface, for the lines of the last refresh
+        self._background = None
+        self._sprites = []
+
+    def update(self):
+        """Record a frame and refresh the HUD when the update interval has passed."""
+        now = time.perf_counter()
+        if self._last_frame is not None:
+            self.frame_times.append(now - self._last_frame)
+        self._last_frame = now
+        self._frames += 1
+
+        elapsed = now - self._last_update
+        if elapsed > self.update_interval or not self._sprites:
+            self.current_fps = self._frames / elapsed
+            self._update_message_rates(elapsed)
+            self._frames = 0
+            self._last_update = now
+            self._sprites = self._render()
+
+    def _update_message_rates(self, elapsed):
+        if self.messenger is None:
+            return
+        counts = (self.messenger.publisher.sent_messages, self.messenger.received_messages)
+        if self._message_counts is not None:
+            self._message_rates = tuple((new - old) / elapsed for new, old in zip(counts, self._message_counts))
+        self._message_counts = counts
+
+    def lines(self):
+        """The text lines below the graph, as (text, color) pairs."""
+        white = (255, 255, 255)
+        lines = []
+        if self.simulation is not None:
+            counts = self.simulation.vehicles.count_by_type()
+            per_type = ", ".join(f"{vehicle_type} {count}" for vehicle_type, count in sorted(counts.items()))
+            line = f"Voertuigen: {sum(counts.values())}" + (f" ({per_type})" if per_type else "")
+            if self.simulation.vehicle_spawner.dropped_demand:
+                line += f", {self.simulation.vehicle_spawner.dropped_demand} verworpen"
+            lines.append((line, white))
+            cells, objects, fullest = self.simulation.spatial_hash.occupancy()
+            lines.append((f"Grid: {objects} objecten in {cells} cellen, max {fullest} per cel", white))
+        if self.messenger is not None:
+            sent, received = self._message_rates
+            line = f"Berichten: {sent:.0f}/s uit, {received:.0f}/s in"
+            if self.messenger.publisher.dropped_messages:
+                line += f", {self.messenger.publisher.dropped_messages} verworpen"
+            lines.append((line, white))
+        if self.line_source is not None:
+            lines.extend((line, white) for line in self.line_source())
+        return lines
+
+    def _render(self):
+        # Scale the HUD with the resolution, the font is only created again when its size changes
+        scale_factor, _ = scale_to_display(1, 1)
+        font_size = int(16 * scale_factor)
+        if font_size != self._font_size:
+            self._font = pygame.font.Font(None, font_size)
+            self._font_size = font_size
+            self._line_surfaces = {}
+
+        frame_times = list(self.frame_times)
+        if frame_times:
+            average_ms = sum(frame_times) / len(frame_times) * 1000
+            header = f"FPS: {int(self.current_fps)}  frametijd {average_ms:.1f}ms, max {max(frame_times) * 1000:.1f}ms"
+        else:
+            header = f"FPS: {int(self.current_fps)}"
+        lines = [(header, (255, 255, 0))] + self.lines()  # FPS in yellow
+
+        # Reuse the surfaces of lines that did not change
+        line_surfaces = {}
+        for line in lines:
+            surface = self._line_surfaces.get(line)
+            if surface is None:
+                surface = self._font.render(line[0], True, line[1])
+            line_surfaces[line] = surface
+        self._line_surfaces = line_surfaces
+        surfaces = [line_surfaces[line] for line in lines]
+
+        graph = self._render_graph(frame_times, int(self.history * scale_factor), int(30 * scale_factor))
+        surfaces.insert(1, graph)
+
+        text_width = max(surface.get_width() for surface in surfaces)
+        text_height = sum(surface.get_height() for surface in surfaces)
+
+        # Semi-transparent background, only created again when its size changes
+        padding = 20
+        bg_padding_x = int(5 * scale_factor)
+        bg_padding_y = int(3 * scale_factor)
+        background_size = (text_width + bg_padding_x * 2, text_height + bg_padding_y * 2)
+        if self._background is None or self._background.get_size() != background_size:
+            self._background = pygame.Surface(background_size)
+            self._background.fill((0, 0, 0))
+            self._background.set_alpha(150)
+
+        # Position in top-right corner with scaled padding
+        pos_x, pos_y = scale_to_display(WORLD_WIDTH - padding, padding)
+        pos_x -= text_width + bg_padding_x * 2  # Align to right edge
+
+        # Background first, then the lines and the graph below each other
+        sprites = [(self._background, (pos_x - bg_padding_x, pos_y - bg_padding_y))]
+        for surface in surfaces:
+            sprites.append((surface, (pos_x, pos_y)))
+            pos_y += surface.get_height()
+        return sprites
+
+    def _render_graph(self, frame_times, width, height):
+        """Sparkline of the frame times, scaled to at least twice the budget, with the budget as a line."""
+        graph = pygame.Surface((max(width, 2), max(height, 2)), pygame.SRCALPHA)
+        width, height = graph.get_size()
+        top = max([self.budget * 2] + frame_times)
+
+        budget_y = height - 1 - int(self.budget / top * (height - 1))
+        pygame.draw.line(graph, (120, 120, 120), (0, budget_y), (width - 1, budget_y))
+        if len(frame_times) >= 2:
+            step = (width - 1) / (self.history - 1)
+            offset = self.history - len(frame_times)  # Newest frame on the right
+            points = [
+                ((offset + index) * step, height - 1 - frame_time / top * (height - 1))
+                for index, frame_time in enumerate(frame_times)
+            ]
+            pygame.draw.lines(graph, (255, 255, 0), False, points)
+        return graph
+
+    def sprites(self):
+        """
+        Return the HUD as (pygame.Surface, (x, y)) pairs, the background first.
+        The surfaces stay the same between refreshes.
+        """
+        return self._sprites
+
+    def draw(self):
+        """Render the HUD on screen."""
+        screen.blits(self.sprites(), doreturn=False)
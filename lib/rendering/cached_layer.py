@@ -0,0 +1,81 @@
+import pygame
+
+class CachedLayer:
+    """
+    A screen-sized surface that combines a fixed image with sprites that rarely change, such
+    as the traffic lights on top of the overlay or the bridge on top of the background.
+    Only the regions of sprites that changed since the previous update are rendered again.
+    """
+
+    def __init__(self, below=None, above=None, opaque=False):
+        """
+        Args:
+            below (pygame.Surface, optional): Image drawn below the sprites.
+            above (pygame.Surface, optional): Image drawn above the sprites.
+            opaque (bool): Black instead of transparent where no image covers the layer.
+        """
+        self.below = below
+        self.above = above
+        self.opaque = opaque
+        self.surface = None
+        self._keys = []  # (surface id, x, y) per sprite, in the previous update
+        self._sprites = []  # (surface, rect) per sprite, in the previous update
+
+    def resize(self, size, sprites=()):
+        """Create the layer surface for a new screen size and render it completely."""
+        if self.opaque:
+            self.surface = pygame.Surface(size).convert()
+        else:
+            self.surface = pygame.Surface(size, pygame.SRCALPHA)
+        self._store(sprites)
+        self._render(self.surface.get_rect())
+
+    def update(self, sprites):
+        """
+        Render the regions of the sprites that changed since the previous update.
+
+        Args:
+            sprites (iterable): (surface, position) pairs in drawing order.
+
+        Returns:
+            list: Rects of the layer that changed, in screen coordinates.
+        """
+        old_keys, old_sprites = self._keys, self._sprites
+        self._store(sprites)
+        if self._keys == old_keys:
+            return []
+
+        if len(self._keys) != len(old_keys):
+            changed = [rect for _, rect in old_sprites] + [rect for _, rect in self._sprites]
+        else:
+            changed = []
+            for index, key in enumerate(self._keys):
+                if key != old_keys[index]:
+                    changed.append(old_sprites[index][1])
+                    changed.append(self._sprites[index][1])
+
+        # Regions are cleared before rendering, so overlapping regions are harmless
+        changed = [rect.clip(self.surface.get_rect()) for rect in changed]
+        changed = [rect for rect in changed if rect.width and rect.height]
+        for rect in changed:
+            self._render(rect)
+        return changed
+
+    def _store(self, sprites):
+        self._keys = []
+        self._sprites = []
+        for surface, (x, y) in sprites:
+            x, y = int(x), int(y)
+            self._keys.append((id(surface), x, y))
+            self._sprites.append((surface, surface.get_rect(topleft=(x, y))))
+
+    def _render(self, rect):
+        surface = self.surface
+        surface.fill((0, 0, 0, 255 if self.opaque else 0), rect)
+        surface.set_clip(rect)
+        if self.below is not None:
+            surface.blit(self.below, rect, rect)
+        surface.blits([sprite for sprite in self._sprites if sprite[1].colliderect(rect)], doreturn=False)
+        if self.above is not None:
+            surface.blit(self.above, rect, rect)
+        surface.set_clip(None)
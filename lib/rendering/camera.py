@@ -0,0 +1,96 @@
+import pygame
+
+class Camera:
+    """
+    Pan and zoom of the simulator view, like the coordinate picker. Positions on the unzoomed
+    screen (the result of scale_to_display) are shown at position * zoom - (x, y) in the window.
+
+    Every change increases the version, so the renderer can tell the view changed
+    without comparing floats.
+    """
+    min_zoom, max_zoom = 0.2, 5.0
+    zoom_step = 1.1  # Zoom factor per mouse wheel step
+    pan_speed = 20  # Pixels per frame while an arrow key is held
+
+    # Below this zoom pedestrians and bikes are only a few pixels, they are drawn as points
+    detail_zoom = 0.6
+
+    def __init__(self):
+        self.zoom = 1.0
+        self.x, self.y = 0, 0
+        self.version = 0
+
+    @property
+    def is_identity(self):
+        """Whether the view shows the unzoomed screen, so nothing needs to be transformed."""
+        return self.zoom == 1.0 and self.x == 0 and self.y == 0
+
+    @property
+    def show_details(self):
+        return self.zoom >= self.detail_zoom
+
+    def reset(self):
+        self._move(1.0, 0, 0)
+
+    def zoom_at(self, position, steps):
+        """Zoom in (positive steps) or out around a window position, keeping the point under it in place."""
+        mx, my = position
+        anchor_x, anchor_y = (mx + self.x) / self.zoom, (my + self.y) / self.zoom
+        zoom = min(max(self.zoom * self.zoom_step ** steps, self.min_zoom), self.max_zoom)
+        # Snap back to exactly 1 so the unzoomed fast path is used again
+        if abs(zoom - 1.0) < 1e-6:
+            zoom = 1.0
+        self._move(zoom, int(anchor_x * zoom - mx), int(anchor_y * zoom - my))
+
+    def pan(self, dx, dy):
+        self._move(self.zoom, self.x + dx, self.y + dy)
+
+    def pan_with_keys(self, keys):
+        """Pan with the arrow keys, keys is the result of pygame.key.get_pressed()."""
+        dx = (keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]) * self.pan_speed
+        dy = (keys[pygame.K_DOWN] - keys[pygame.K_UP]) * self.pan_speed
+        if dx or dy:
+            self.pan(dx, dy)
+
+    def _move(self, zoom, x, y):
+        if (zoom, x, y) != (self.zoom, self.x, self.y):
+            self.zoom, self.x, self.y = zoom, x, y
+            self.version += 1
+
+    def to_view(self, x, y):
+        return int(x * self.zoom - self.x), int(y * self.zoom - self.y)
+
+    def to_screen(self, x, y):
+        """Window position back to the unzoomed screen, e.g. for mouse clicks."""
+        return (x + self.x) / self.zoom, (y + self.y) / self.zoom
+
+    def view_of(self, surface, size, opaque=False):
+        """
+        Render the visible part of a screen-sized surface zoomed into a new surface of the window size.
+
+        Args:
+            surface (pygame.Surface): Unzoomed layer, such as a CachedLayer surface.
+            size (tuple): Window size.
+            opaque (bool): Black instead of transparent outside the layer.
+
+        Returns:
+            pygame.Surface: The view of the layer.
+        """
+        if opaque:
+            view = pygame.Surface(size).convert()
+            view.fill((0, 0, 0))
+        else:
+            view = pygame.Surface(size, pygame.SRCALPHA)
+
+        # Part of the layer inside the window, in layer coordinates
+        left, top = self.to_screen(0, 0)
+        right, bottom = self.to_screen(*size)
+        visible = pygame.Rect(int(left), int(top), int(right - left) + 2, int(bottom - top) + 2)
+        visible = visible.clip(surface.get_rect())
+        if not visible.width or not visible.height:
+            return view
+
+        target = pygame.Rect(self.to_view(*visible.topleft), (0, 0))
+        target.size = (round(visible.width * self.zoom), round(visible.height * self.zoom))
+        view.blit(pygame.transform.scale(surface.subsurface(visible), target.size), target)
+        return view
@@ -0,0 +1,185 @@
+import pygame
+from lib.rendering.cached_layer import CachedLayer
+
+class DirtyRectRenderer:
+    """
+    Draws a frame of sprites between a background and an overlay image, and only touches
+    the parts of the screen that changed since the previous frame.
+
+    The frame is built from two cached layers with the moving sprites in between:
+    the background with the static sprites (bridge and barriers) below, and the static
+    top sprites (traffic lights) merged with the overlay above. The cached layers are only
+    rendered again where one of their sprites changed.
+
+    A sprite is a (surface, position) pair. Sprites drawn with the same surface object at
+    the same position as in the previous frame are considered unchanged, so sprite surfaces
+    must be replaced instead of modified in place. The regions of sprites that appeared,
+    moved or disappeared are restored from the background layer, the sprites overlapping them
+    are drawn again, the top layer is blended on top and only those rects are sent to the display.
+
+    With a camera that is zoomed or panned, the layers are shown through a zoomed copy of the
+    window size. The copy is made again when the camera moves or one of its layers changes,
+    so that frame is drawn completely. Sprites are expected in window coordinates already.
+    """
+
+    # Above this fraction of the screen a full redraw and flip is cheaper than the rect list
+    full_redraw_fraction = 0.5
+
+    def __init__(self, target, background, overlay=None, camera=None):
+        """
+        Args:
+            target (pygame.Surface): The display surface.
+            background (pygame.Surface): Image drawn below all sprites.
+            overlay (pygame.Surface, optional): Image blended on top of the sprites.
+            camera (Camera, optional): Pan and zoom of the layers.
+        """
+        self.target = target
+        self.background_layer = CachedLayer(below=background, opaque=True)
+        self.top_layer = CachedLayer(above=overlay)
+        self.dirty_rects = []  # Rects updated in the last frame, for statistics
+        self._previous = {}  # (surface id, x, y) -> (surface, rect, layer) drawn in the previous frame
+        self._marked = []
+        self._size = None
+        self.camera = camera
+        self._camera_version = None
+        self._background_view = None  # Zoomed layers, None while the camera shows the unzoomed screen
+        self._top_view = None
+
+    def invalidate(self):
+        """Redraw the whole screen in the next frame."""
+        self._size = None
+
+    def mark_dirty(self, rect):
+        """Redraw a region in the next frame, for changes that are not sprites."""
+        self._marked.append(pygame.Rect(rect))
+
+    def render(self, sprites, top_sprites=(), static_sprites=(), static_top_sprites=()):
+        """
+        Draw a frame and update the display.
+
+        Args:
+            sprites (iterable): (surface, position) pairs that move, in drawing order.
+            top_sprites (iterable): (surface, position) pairs above the overlay, such as the HUD.
+            static_sprites (iterable): Rarely changing pairs below the moving sprites.
+            static_top_sprites (iterable): Rarely changing pairs above the moving sprites,
+                but below the overlay.
+        """
+        current = {}
+        layers = (sprites, top_sprites)
+        for layer, layer_sprites in enumerate(layers):
+            for surface, (x, y) in layer_sprites:
+                x, y = int(x), int(y)
+                current[(id(surface), x, y)] = (surface, surface.get_rect(topleft=(x, y)), layer)
+
+        camera_version = self.camera.version if self.camera is not None else None
+        if self._size != self.target.get_size():
+            self._size = self.target.get_size()
+            self.background_layer.resize(self._size, static_sprites)
+            self.top_layer.resize(self._size, static_top_sprites)
+            self._update_views(background=True, top=True)
+            self._draw_full(current)
+        elif self._camera_version != camera_version:
+            self.background_layer.update(static_sprites)
+            self.top_layer.update(static_top_sprites)
+            self._update_views(background=True, top=True)
+            self._draw_full(current)
+        elif self._background_view is not None:
+            background_changed = bool(self.background_layer.update(static_sprites))
+            top_changed = bool(self.top_layer.update(static_top_sprites))
+            if background_changed or top_changed:
+                self._update_views(background=background_changed, top=top_changed)
+                self._draw_full(current)
+            else:
+                self._draw_dirty(current)
+        else:
+            self._marked.extend(self.background_layer.update(static_sprites))
+            self._marked.extend(self.top_layer.update(static_top_sprites))
+            self._draw_dirty(current)
+
+        self._camera_version = camera_version
+
+        self._previous = current
+        self._marked = []
+
+    def _update_views(self, background, top):
+        if self.camera is None or self.camera.is_identity:
+            self._background_view = self._top_view = None
+            return
+        if background or self._background_view is None:
+            self._background_view = self.camera.view_of(self.background_layer.surface, self._size, opaque=True)
+        if top or self._top_view is None:
+            self._top_view = self.camera.view_of(self.top_layer.surface, self._size)
+
+    def _layer_surfaces(self):
+        if self._background_view is not None:
+            return self._background_view, self._top_view
+        return self.background_layer.surface, self.top_layer.surface
+
+    def _draw_full(self, current):
+        target = self.target
+        background, top = self._layer_surfaces()
+        target.blit(background, (0, 0))
+        target.blits([(surface, rect) for surface, rect, layer in current.values() if layer == 0], doreturn=False)
+        target.blit(top, (0, 0))
+        target.blits([(surface, rect) for surface, rect, layer in current.values() if layer == 1], doreturn=False)
+        self.dirty_rects = [target.get_rect()]
+        pygame.display.flip()
+
+    def _draw_dirty(self, current):
+        previous = self._previous
+
+        # Sprites that disappeared, moved or changed leave a hole, new ones need to be drawn
+        dirty = self._marked
+        dirty.extend(rect for key, (_, rect, _) in previous.items() if key not in current)
+        redraw = {key for key in current if key not in previous}
+        dirty.extend(current[key][1] for key in redraw)
+        if not dirty:
+            self.dirty_rects = []
+            return
+
+        # Unchanged sprites overlapping a dirty region are drawn again, so their whole rect
+        # becomes dirty too. Repeat until no unchanged sprite overlaps the dirty regions.
+        unchanged = [(key, rect) for key, (_, rect, _) in current.items() if key not in redraw]
+        dirty = _merge_rects(dirty)
+        while unchanged:
+            overlapping = [(key, rect) for key, rect in unchanged if rect.collidelist(dirty) >= 0]
+            if not overlapping:
+                break
+            for key, rect in overlapping:
+                redraw.add(key)
+                dirty.append(rect)
+            unchanged = [(key, rect) for key, rect in unchanged if key not in redraw]
+            dirty = _merge_rects(dirty)
+
+        screen_rect = self.target.get_rect()
+        dirty = [rect.clip(screen_rect) for rect in dirty]
+        dirty = [rect for rect in dirty if rect.width and rect.height]
+        area = sum(rect.width * rect.height for rect in dirty)
+        if area > screen_rect.width * screen_rect.height * self.full_redraw_fraction:
+            self._draw_full(current)
+            return
+
+        # The merged rects do not overlap, so the top layer is blended exactly once per pixel
+        target = self.target
+        background, top = self._layer_surfaces()
+        target.blits([(background, rect, rect) for rect in dirty], doreturn=False)
+        target.blits([(surface, rect) for key, (surface, rect, layer) in current.items()
+                      if layer == 0 and key in redraw], doreturn=False)
+        target.blits([(top, rect, rect) for rect in dirty], doreturn=False)
+        target.blits([(surface, rect) for key, (surface, rect, layer) in current.items()
+                      if layer == 1 and key in redraw], doreturn=False)
+        self.dirty_rects = dirty
+        pygame.display.update(dirty)
+
+
+def _merge_rects(rects):
+    """Replace overlapping rects by their union until none of them overlap."""
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        index = rect.collidelist(merged)
+        while index >= 0:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
@@ -0,0 +1,179 @@
+"""
+Texture atlas for the vehicle and traffic light sprites.
+
+Build step, run again after changing the images under assets/vehicles or assets/lights:
+
+    python -m lib.rendering.sprite_atlas
+
+It packs all sprites into assets/atlas.png with their rects in assets/atlas.yaml. At startup
+the atlas is decoded once and every sprite is scaled to the current display scale and packed
+into one display atlas. Sprites are subsurfaces of that atlas, so all of them are blitted from
+a single source surface and the texture renderer needs a single texture for them.
+"""
+
+import os
+import re
+import pygame
+import yaml
+
+ATLAS_IMAGE = "assets/atlas.png"
+ATLAS_INDEX = "assets/atlas.yaml"
+SOURCE_FOLDERS = ["assets/vehicles", "assets/lights"]
+
+# World size of the traffic light sprites per light folder, vehicles have it in their file name
+LIGHT_SIZES = {
+    "small": (6, 10),
+    "car": (6, 14),
+    "boat": (6, 14),
+}
+
+_dimensions_pattern = re.compile(r'(\d+)x(\d+)(?:-\d+)?$')
+
+def world_size(name):
+    """
+    Size in world units of the sprite with this atlas name.
+
+    Args:
+        name (str): For example 'vehicles/car/20x10-1' or 'lights/small/groen'.
+    """
+    folder, kind, file_name = name.split("/")
+    if folder == "lights":
+        return LIGHT_SIZES[kind]
+    dimensions_match = _dimensions_pattern.search(file_name)
+    if dimensions_match:
+        return int(dimensions_match.group(1)), int(dimensions_match.group(2))
+    # Fallback dimensions if pattern does not match
+    return 40, 40
+
+
+class SpriteAtlas:
+    """One surface with many sprites and the rect of every sprite by name."""
+
+    padding = 2  # Transparent pixels between sprites, so scaled textures do not bleed
+
+    def __init__(self, surface, rects):
+        """
+        Args:
+            surface (pygame.Surface): The packed sprites.
+            rects (dict): Sprite name -> (x, y, width, height) in the surface.
+        """
+        self.surface = surface
+        self.rects = rects
+        self._sprites = {name: surface.subsurface(rect) for name, rect in rects.items()}
+
+    @classmethod
+    def pack(cls, images, max_width=1024):
+        """
+        Pack images into a new atlas, row by row from the highest image to the lowest.
+
+        Args:
+            images (dict): Sprite name -> pygame.Surface.
+            max_width (int): Width of the atlas, wider images get a row of their own.
+        """
+        rects = {}
+        x = y = row_height = width = 0
+        for name, image in sorted(images.items(), key=lambda item: -item[1].get_height()):
+            w, h = image.get_size()
+            if x and x + w > max_width:
+                x, y = 0, y + row_height + cls.padding
+                row_height = 0
+            rects[name] = (x, y, w, h)
+            x += w + cls.padding
+            row_height = max(row_height, h)
+            width = max(width, x)
+
+        surface = pygame.Surface((max(width, 1), max(y + row_height, 1)), pygame.SRCALPHA)
+        surface.blits([(images[name], rect[:2]) for name, rect in rects.items()], doreturn=False)
+        return cls(surface, rects)
+
+    @classmethod
+    def from_sources(cls, pixels_per_unit=4):
+        """
+        Load the separate sprite images and pack them at a fixed resolution, the build step.
+
+        Args:
+            pixels_per_unit (int): Pixels per world unit, images are never enlarged.
+        """
+        images = {}
+        for source_folder in SOURCE_FOLDERS:
+            for kind in sorted(os.listdir(source_folder)):
+                folder = os.path.join(source_folder, kind)
+                if not os.path.isdir(folder):
+                    continue
+                for file_name in sorted(f for f in os.listdir(folder) if f.endswith('.webp')):
+                    name = "/".join([os.path.basename(source_folder), kind, file_name[:-len('.webp')]])
+                    image = pygame.image.load(os.path.join(folder, file_name))
+                    width, height = world_size(name)
+                    scale = min(1.0, pixels_per_unit * width / image.get_width(),
+                                pixels_per_unit * height / image.get_height())
+                    size = (max(1, round(image.get_width() * scale)), max(1, round(image.get_height() * scale)))
+                    images[name] = pygame.transform.smoothscale(image.convert_alpha(), size)
+        return cls.pack(images)
+
+    @classmethod
+    def load(cls, image_path=ATLAS_IMAGE, index_path=ATLAS_INDEX):
+        """Load an atlas written by save, the image is decoded once."""
+        with open(index_path, "r") as file:
+            index = yaml.safe_load(file)
+        surface = pygame.image.load(image_path).convert_alpha()
+        return cls(surface, {name: tuple(rect) for name, rect in index["sprites"].items()})
+
+    def save(self, image_path=ATLAS_IMAGE, index_path=ATLAS_INDEX):
+        pygame.image.save(self.surface, image_path)
+        with open(index_path, "w") as file:
+            yaml.safe_dump({"sprites": {name: list(rect) for name, rect in self.rects.items()}}, file, default_flow_style=None)
+
+    def scaled(self, scale_to_display):
+        """
+        Pack all sprites again at their display size, see world_size.
+
+        Args:
+            scale_to_display (callable): World (width, height) -> display (width, height).
+
+        Returns:
+            SpriteAtlas: A new atlas with the same sprite names.
+        """
+        images = {}
+        for name, sprite in self._sprites.items():
+            width, height = scale_to_display(*world_size(name))
+            images[name] = pygame.transform.scale(sprite, (max(1, int(width)), max(1, int(height))))
+        return SpriteAtlas.pack(images)
+
+    def sprite(self, name):
+        """Return the sprite with this name, a subsurface of the atlas."""
+        return self._sprites[name]
+
+    def names(self, folder):
+        """Names of the sprites in a folder, such as 'vehicles/car', sorted."""
+        prefix = folder.rstrip("/") + "/"
+        return sorted(name for name in self._sprites if name.startswith(prefix))
+
+
+_display_atlas = None
+
+def display_atlas():
+    """
+    The atlas with every sprite at the current display scale, loaded on first use.
+    Without a built atlas the separate images are loaded instead, which is slower.
+    """
+    global _display_atlas
+    if _display_atlas is None:
+        # Imported here, so the build step runs without opening the simulator window
+        from lib.screen import scale_to_display
+        if os.path.exists(ATLAS_IMAGE) and os.path.exists(ATLAS_INDEX):
+            atlas = SpriteAtlas.load()
+        else:
+            print("Geen spriteatlas gevonden, bouw hem met: python -m lib.rendering.sprite_atlas")
+            atlas = SpriteAtlas.from_sources()
+        _display_atlas = atlas.scaled(scale_to_display)
+    return _display_atlas
+
+
+if __name__ == '__main__':
+    # Converting images needs a display mode, a hidden window is enough
+    pygame.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    atlas = SpriteAtlas.from_sources()
+    atlas.save()
+    width, height = atlas.surface.get_size()
+    print(f"Spriteatlas opgeslagen: {len(atlas.rects)} sprites in {width}x{height} ({ATLAS_IMAGE}, {ATLAS_INDEX})")
@@ -0,0 +1,145 @@
+from itertools import chain, repeat
+from operator import attrgetter
+import numpy as np
+import pygame
+import lib.screen as display
+from lib.rendering.texture_sprite import TextureSprite
+
+_world_state = attrgetter('x', 'y', 'rotated_width', 'rotated_height')
+_image = attrgetter('image')
+_type = attrgetter('vehicle_type_string')
+
+class VehicleSpriteBatch:
+    """
+    Builds the sprites of all vehicles for one frame in a single pass. The world positions
+    are transformed to screen positions with numpy instead of a scale_to_display call per
+    vehicle, and the resulting (surface, position) list is reused between frames, so it can
+    be handed to Surface.blits directly.
+
+    With a camera the positions are zoomed and panned as well, vehicles outside the window
+    are left out and when zoomed far out pedestrians and bikes are drawn as points. The
+    texture renderer gets its sprites from texture_sprites, with the same points.
+    """
+    # Vehicle types drawn as points when the camera hides details, with their color
+    point_colors = {
+        "pedestrian": (235, 235, 235),
+        "bike": (250, 200, 40),
+    }
+    point_size = 3
+    max_scaled_images = 4096  # Zoomed images kept before the cache starts over
+
+    def __init__(self):
+        self.sprites = []
+        self.culled = 0  # Vehicles outside the window in the last update
+        self._scaled = {}  # image id -> (image, zoomed image), for the current zoom
+        self._scaled_zoom = None
+        self._points = {}
+        for vehicle_type, color in self.point_colors.items():
+            point = pygame.Surface((self.point_size, self.point_size), pygame.SRCALPHA)
+            pygame.draw.circle(point, color, (self.point_size // 2, self.point_size // 2), self.point_size // 2 + 1)
+            self._points[vehicle_type] = point
+
+    def update(self, vehicles, camera=None):
+        """
+        Rebuild the sprite list for the current vehicle positions.
+
+        Args:
+            vehicles (iterable): Vehicles in drawing order, with a known length.
+            camera (Camera, optional): Pan and zoom of the view.
+
+        Returns:
+            list: (pygame.Surface, (x, y)) pairs, the same list object every frame.
+        """
+        # Per vehicle: x, y, rotated width, rotated height
+        count = len(vehicles)
+        world = np.fromiter(chain.from_iterable(map(_world_state, vehicles)), float, count=count * 4)
+        world = world.reshape(count, 4)
+
+        # Same rounding as Vehicle.sprite: the image is centered on the truncated screen position
+        half_sizes = world[:, 2:] // 2
+        xs = np.trunc(world[:, 0] * display.SCALE_X - half_sizes[:, 0])
+        ys = np.trunc(world[:, 1] * display.SCALE_Y) - half_sizes[:, 1]
+        widths, heights = world[:, 2], world[:, 3]
+
+        if camera is not None and not camera.is_identity:
+            zoom = camera.zoom
+            xs = np.trunc(xs * zoom - camera.x)
+            ys = np.trunc(ys * zoom - camera.y)
+            widths = np.round(widths * zoom)
+            heights = np.round(heights * zoom)
+        else:
+            camera = None
+
+        if camera is not None and not camera.show_details:
+            # Points are centered on the vehicle
+            points = np.fromiter(map(self.point_colors.__contains__, map(_type, vehicles)), bool, count=count)
+            offset = self.point_size // 2
+            xs = np.where(points, np.trunc(xs + widths // 2) - offset, xs)
+            ys = np.where(points, np.trunc(ys + heights // 2) - offset, ys)
+
+        # Vehicles entering or leaving the world start and end outside the window
+        visible = (xs + widths > 0) & (xs < display.WIDTH) & (ys + heights > 0) & (ys < display.HEIGHT)
+        self.culled = count - int(np.count_nonzero(visible))
+        positions = zip(xs.astype(np.int64).tolist(), ys.astype(np.int64).tolist())
+
+        if camera is None:
+            images = map(_image, vehicles)
+        elif camera.show_details:
+            images = map(self._zoomed, map(_image, vehicles), widths.tolist(), heights.tolist(), repeat(camera.zoom))
+        else:
+            images = map(self._image_or_point, vehicles, widths.tolist(), heights.tolist(), repeat(camera.zoom))
+
+        if self.culled:
+            self.sprites[:] = [sprite for sprite, shown in zip(zip(images, positions), visible.tolist()) if shown]
+        else:
+            self.sprites[:] = zip(images, positions)
+        return self.sprites
+
+    def texture_sprites(self, vehicles, camera=None):
+        """
+        Build the TextureSprites of all vehicles for the texture renderer, which rotates,
+        zooms and culls while drawing.
+
+        Args:
+            vehicles (iterable): Vehicles or VehicleStates in drawing order.
+            camera (Camera, optional): Only decides whether pedestrians and bikes are points,
+                the renderer applies the view itself.
+
+        Returns:
+            list: A TextureSprite per vehicle, the unrotated image centered on the vehicle.
+        """
+        points = self._points if camera is not None and not camera.show_details else {}
+        # Points keep their size in the window, the renderer multiplies it by the zoom
+        point_size = self.point_size / camera.zoom if points else 0
+        scale_x, scale_y = display.SCALE_X, display.SCALE_Y
+        sprites = []
+        for vehicle in vehicles:
+            # Same position as scale_to_display
+            screen_x, screen_y = vehicle.x * scale_x, int(vehicle.y * scale_y)
+            point = points.get(vehicle.vehicle_type_string)
+            if point is not None:
+                dstrect = (screen_x - point_size / 2, screen_y - point_size / 2, point_size, point_size)
+                sprites.append(TextureSprite(point, dstrect))
+            else:
+                image = vehicle.original_image
+                width, height = image.get_size()
+                dstrect = (screen_x - width / 2, screen_y - height / 2, width, height)
+                sprites.append(TextureSprite(image, dstrect, vehicle.angle))
+        return sprites
+
+    def _image_or_point(self, vehicle, width, height, zoom):
+        point = self._points.get(vehicle.vehicle_type_string)
+        if point is not None:
+            return point
+        return self._zoomed(vehicle.image, width, height, zoom)
+
+    def _zoomed(self, image, width, height, zoom):
+        if zoom != self._scaled_zoom or len(self._scaled) > self.max_scaled_images:
+            self._scaled.clear()
+            self._scaled_zoom = zoom
+        cached = self._scaled.get(id(image))
+        # The image is stored with the zoomed one, so its id is not reused while cached
+        if cached is None or cached[0] is not image:
+            cached = (image, pygame.transform.scale(image, (max(1, int(width)), max(1, int(height)))))
+            self._scaled[id(image)] = cached
+        return cached[1]
@@ -0,0 +1,110 @@
+import pygame
+from pygame._sdl2.video import Texture
+
+class TextureRenderer:
+    """
+    Draws frames with an SDL2 renderer instead of blitting surfaces. Every surface is uploaded
+    as a texture once and drawn rotated, stretched and zoomed by the renderer, so vehicles,
+    the bridge and the barriers need no rotated or scaled copies. This also works with the
+    software renderer on machines without a GPU. Subsurfaces, such as the sprites of the
+    sprite atlas, share the texture of their parent surface.
+
+    The whole frame is drawn every time, which is cheap with textures, so unlike the
+    DirtyRectRenderer nothing is tracked between frames. Sprites are TextureSprites in
+    unzoomed screen coordinates, except the HUD which is (surface, position) pairs in the window.
+    """
+
+    def __init__(self, renderer, background, overlay=None, camera=None):
+        """
+        Args:
+            renderer (pygame._sdl2.video.Renderer): Renderer of the window, see open_texture_renderer.
+            background (pygame.Surface): Image drawn below all sprites.
+            overlay (pygame.Surface, optional): Image blended on top of the sprites.
+            camera (Camera, optional): Pan and zoom of everything but the HUD.
+        """
+        self.renderer = renderer
+        self.camera = camera
+        self.background = Texture.from_surface(renderer, background)
+        self.overlay = Texture.from_surface(renderer, overlay) if overlay is not None else None
+        self.culled = 0  # Sprites outside the window in the last frame
+        self._textures = {}  # surface id -> (surface, texture), for surfaces that are reused
+        self._hud_textures = {}  # Same for the HUD, only the surfaces of the last frame are kept
+
+    def render(self, sprites, top_sprites=(), static_sprites=(), static_top_sprites=()):
+        """
+        Draw a frame and present it.
+
+        Args:
+            sprites (iterable): TextureSprites that move, in drawing order.
+            top_sprites (iterable): (surface, position) pairs above the overlay, such as the HUD.
+            static_sprites (iterable): TextureSprites below the moving sprites.
+            static_top_sprites (iterable): TextureSprites above the moving sprites, but below the overlay.
+        """
+        renderer = self.renderer
+        camera = self.camera
+        if camera is not None and camera.is_identity:
+            camera = None
+        view = pygame.Rect((0, 0), renderer.logical_size)
+
+        renderer.draw_color = (0, 0, 0, 255)
+        renderer.clear()
+        self._draw_image(self.background, camera)
+        self.culled = 0
+        for group in (static_sprites, sprites, static_top_sprites):
+            self._draw_sprites(group, camera, view)
+        if self.overlay is not None:
+            self._draw_image(self.overlay, camera)
+
+        hud_textures = {}
+        for surface, position in top_sprites:
+            texture = self._texture(surface, self._hud_textures)
+            hud_textures[id(surface)] = (surface, texture)
+            texture.draw(dstrect=(*position, *surface.get_size()))
+        self._hud_textures = hud_textures
+        renderer.present()
+
+    def _draw_image(self, texture, camera):
+        if camera is None:
+            texture.draw(dstrect=(0, 0, texture.width, texture.height))
+        else:
+            zoom = camera.zoom
+            texture.draw(dstrect=(-camera.x, -camera.y, texture.width * zoom, texture.height * zoom))
+
+    def _draw_sprites(self, sprites, camera, view):
+        for surface, (x, y, width, height), angle, origin, srcrect in sprites:
+            if width <= 0 or height <= 0:
+                continue
+            if camera is not None:
+                zoom = camera.zoom
+                x, y = x * zoom - camera.x, y * zoom - camera.y
+                width, height = width * zoom, height * zoom
+                if origin is not None:
+                    origin = (origin[0] * zoom, origin[1] * zoom)
+
+            # Rotated sprites stay within the diagonal of their rectangle around the origin
+            reach = width + height
+            if x + reach < 0 or y + reach < 0 or x - reach > view.width or y - reach > view.height:
+                self.culled += 1
+                continue
+
+            # Sprites from an atlas are drawn from the texture of the whole atlas
+            parent = surface.get_abs_parent()
+            if parent is not surface:
+                offset_x, offset_y = surface.get_abs_offset()
+                if srcrect is None:
+                    srcrect = (offset_x, offset_y, *surface.get_size())
+                else:
+                    srcrect = (srcrect[0] + offset_x, srcrect[1] + offset_y, srcrect[2], srcrect[3])
+                surface = parent
+
+            # The renderer rotates clockwise, pygame.transform.rotate counterclockwise
+            texture = self._texture(surface, self._textures)
+            texture.draw(srcrect=srcrect, dstrect=(x, y, width, height), angle=-angle, origin=origin)
+
+    def _texture(self, surface, textures):
+        cached = textures.get(id(surface))
+        # The surface is stored with its texture, so its id is not reused while cached
+        if cached is None or cached[0] is not surface:
+            cached = (surface, Texture.from_surface(self.renderer, surface))
+            textures[id(surface)] = cached
+        return cached[1]
@@ -0,0 +1,12 @@
+from typing import NamedTuple
+
+class TextureSprite(NamedTuple):
+    """
+    A drawing of a surface for the texture renderer. Unlike a (surface, position) pair the
+    surface is not rotated or scaled beforehand, the renderer does that while drawing.
+    """
+    surface: object
+    dstrect: tuple  # (x, y, width, height) on the unzoomed screen
+    angle: float = 0.0  # Degrees counterclockwise around the origin, like pygame.transform.rotate
+    origin: tuple = None  # Rotation point relative to dstrect, its center by default
+    srcrect: tuple = None  # Part of the surface to draw, all of it by default
@@ -1,5 +1,6 @@
 import pygame
 from pygame._sdl2 import Window
+from pygame._sdl2.video import Renderer
 import pyautogui
 
 def init_screen():
@@ -13,13 +14,37 @@ screen = init_screen()
 WIDTH, HEIGHT = screen.get_size()
 WORLD_WIDTH, WORLD_HEIGHT = 1920, 1200
 
+# World -> display scale factors, the world keeps its 16:10 aspect ratio at the screen width.
+# Recomputed only when the window is resized.
+SCALE_X = WIDTH / WORLD_WIDTH
+SCALE_Y = WIDTH * 0.625 / WORLD_HEIGHT
+
 def update_screen_size():
-    global WIDTH, HEIGHT
+    global WIDTH, HEIGHT, SCALE_X, SCALE_Y
     WIDTH, HEIGHT = screen.get_size()
+    SCALE_X = WIDTH / WORLD_WIDTH
+    SCALE_Y = WIDTH * 0.625 / WORLD_HEIGHT
 
+def open_texture_renderer():
+    """
+    Open a window with an SDL2 renderer, for drawing with textures instead of the display surface.
+    A renderer cannot share a window with the display surface, so that window is hidden. It stays
+    the reference for converting images and for the screen size, the renderer scales its logical
+    size to the window. Uses the GPU when there is one and the software renderer otherwise.
+    """
+    window = Window("Stoplichtsimulator", size=(WIDTH, HEIGHT), resizable=True)
+    pygame.display.set_mode((WIDTH, HEIGHT), pygame.HIDDEN)
+    try:
+        renderer = Renderer(window, accelerated=1)
+    except RuntimeError:
+        print("Geen hardwareversnelling beschikbaar, de software-renderer wordt gebruikt.")
+        renderer = Renderer(window, accelerated=0)
+    renderer.logical_size = (WIDTH, HEIGHT)
+    window.maximize()
+    return renderer
 
 def scale_to_display(x, y):
-    return float(x / 1920 * WIDTH), int(y / 1200 * (WIDTH * 0.625))
+    return float(x * SCALE_X), int(y * SCALE_Y)
 
 def scale_to_world(x, y):
-    return int(x / WIDTH * 1920), int(y / (WIDTH * 0.625) * 1200)
\ No newline at end of file
+    return int(x / SCALE_X), int(y / SCALE_Y)
\ No newline at end of file
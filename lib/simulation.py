@@ -4,21 +4,39 @@ from lib.collidable_object import Hitbox
 from lib.directions.direction import Direction
 from lib.directions.sensor import Sensor
 from lib.enums.topics import Topics
+from lib.enums.traffic_light_colors import TrafficLightColors
+from lib.messaging.vehicle_stream import VehicleStream
+from lib.messaging.wire_format import WireLayout
+from lib.rendering.sprite_batch import VehicleSpriteBatch
+from lib.screen import screen
+from lib.simulation_clock import simulation_clock
+from lib.simulation_snapshot import SimulationSnapshot, VehicleState
 from lib.spatial.spatial_hash_grid import SpatialHashGrid
 from lib.vehicles.collision_free_zone import CollisionFreeZone
+from lib.vehicles.supports_collision_free_zones import SupportsCollisionFreeZones
 from lib.vehicles.vehicle import Vehicle
+from lib.vehicles.vehicle_registry import VehicleRegistry
 from lib.vehicles.vehicle_spawner import VehicleSpawner
 import time
 from pygame import mixer
 
 class Simulation:
+    # Directions that are not part of the sensoren_rijbaan payload
+    directions_without_lane_sensors = [41, 42, 51, 52, 53, 54]
+
     def __init__(self, config, messenger, traffic_level="rustig"):
-        self.vehicles = []
+        self.vehicles = VehicleRegistry()
         self.config = config
         self.traffic_level = traffic_level
         self.messenger = messenger
         self.directions = self.load_directions(config)
-        self.vehicle_spawner = VehicleSpawner(config, traffic_level, messenger)
+
+        # Initialize spatial partitioning system with larger cell size for fewer buckets
+        self.spatial_hash = SpatialHashGrid(cell_size=60)
+
+        self.vehicle_spawner = VehicleSpawner(config, traffic_level, messenger, self.spatial_hash)
+        # Priority vehicles that finish leave the priority queue right away
+        self.vehicles.on_finish(self.vehicle_spawner.priority_queue_manager.remove)
         self.previous_lane_sensor_data = {}
         self.previous_special_sensor_data = {}
         self.collision_free_zones = config.get("collision_free_zones", [])
@@ -30,19 +48,17 @@ class Simulation:
         self.load_special_sensors()
         self.play_noise()
         
-        # Initialize spatial partitioning system with larger cell size for fewer buckets
-        self.spatial_hash = SpatialHashGrid(cell_size=60)
-        
         # Create a separate grid for sensors which don't move often
         self.sensor_grid = SpatialHashGrid(cell_size=80)
         self.initialize_sensor_grid()
         
         # Track simulation time
-        self.last_update_time = time.time()
+        self.last_update_time = simulation_clock.time()
+        self.frame_count = 0
         
         # Track last sensor send times for periodic updates
-        self.last_lane_sensor_send_time = time.time()
-        self.last_special_sensor_send_time = time.time()
+        self.last_lane_sensor_send_time = simulation_clock.time()
+        self.last_special_sensor_send_time = simulation_clock.time()
         
         # Reusable objects to avoid recreating them each frame
         self.query_buffer = 25  # Buffer for spatial queries
@@ -51,6 +67,15 @@ class Simulation:
         # Keep track of active traffic lights to avoid recalculating
         self.active_traffic_lights = []
         self.update_active_traffic_lights()
+        self.index_traffic_lights()
+
+        self.messenger.set_wire_layout(self.build_wire_layout())
+
+        # Quantised vehicle states for external visualisers, disabled unless a rate is configured
+        self.vehicle_stream = VehicleStream(messenger, rate=messenger.vehicle_stream_rate)
+
+        # Screen positions of all vehicles are computed in one pass when drawing
+        self.vehicle_batch = VehicleSpriteBatch()
 
     # Play background noise sound if audio is enabled
     def play_noise(self):
@@ -104,6 +129,14 @@ class Simulation:
                 if traffic_light.back_sensor:
                     self.sensor_grid.insert(traffic_light.back_sensor)
     
+    # Index the traffic lights by lane id, a lane id can occur in more than one direction
+    def index_traffic_lights(self):
+        self.traffic_lights_by_lane = {}
+        for direction in self.directions:
+            for traffic_light in direction.traffic_lights:
+                lane_id = f"{direction.id}.{traffic_light.id}"
+                self.traffic_lights_by_lane.setdefault(lane_id, []).append(traffic_light)
+
     # Update active traffic lights list
     def update_active_traffic_lights(self):
         self.active_traffic_lights = []
@@ -112,7 +145,10 @@ class Simulation:
 
     # Main simulation update method (called every frame)
     def update(self):
-        current_time = time.time()
+        self.frame_count += 1
+        self.messenger.set_frame(self.frame_count)
+        simulation_clock.advance()
+        current_time = simulation_clock.time()
         delta_time = current_time - self.last_update_time
         self.last_update_time = current_time
 
@@ -131,16 +167,22 @@ class Simulation:
         # Compute new positions for each vehicle
         vehicle_movements = {}
         for vehicle in self.vehicles:
-            # Get vehicle's bounding box for spatial query
-            vehicle_hitboxes = vehicle.hitboxes()
-            min_x = min(hb.x for hb in vehicle_hitboxes) - self.query_buffer
-            max_x = max(hb.x + hb.width for hb in vehicle_hitboxes) + self.query_buffer
-            min_y = min(hb.y for hb in vehicle_hitboxes) - self.query_buffer
-            max_y = max(hb.y + hb.height for hb in vehicle_hitboxes) + self.query_buffer
-            query_box = Hitbox(min_x, min_y, max_x - min_x, max_y - min_y)
-            
-            # Get nearby objects to check for collisions (only use what's needed)
-            obstacle_candidates = self.spatial_hash.query(query_box)
+            if isinstance(vehicle, SupportsCollisionFreeZones):
+                # Zone handling also checks vehicles beside and behind, use a padded box
+                vehicle_hitboxes = vehicle.hitboxes()
+                min_x = min(hb.x for hb in vehicle_hitboxes) - self.query_buffer
+                max_x = max(hb.x + hb.width for hb in vehicle_hitboxes) + self.query_buffer
+                min_y = min(hb.y for hb in vehicle_hitboxes) - self.query_buffer
+                max_y = max(hb.y + hb.height for hb in vehicle_hitboxes) + self.query_buffer
+                query_box = Hitbox(min_x, min_y, max_x - min_x, max_y - min_y)
+                obstacle_candidates = self.spatial_hash.query(query_box, vehicle.collision_mask)
+            else:
+                # Only the front hitbox is tested, query the area it sweeps this step
+                front_hitbox, step_x, step_y = vehicle.look_ahead()
+                obstacle_candidates = self.spatial_hash.query_swept(
+                    front_hitbox, step_x, step_y, vehicle.collision_mask
+                )
+
             obstacles = [obj for obj in obstacle_candidates if obj is not vehicle]
             
             # Let the vehicle compute its next move
@@ -156,33 +198,66 @@ class Simulation:
         self.update_traffic_lights()
         self.bridge.update(delta_time)
         
-        # Remove vehicles that have completed their path using list comprehension
-        self.vehicles = [v for v in self.vehicles if not v.has_finished()]
+        # Remove vehicles that have completed their path
+        self.vehicles.remove_finished()
+        self.vehicle_stream.update(self.vehicles)
 
         # Check if any sensors are triggered
         self.check_occupied_sensors()
 
-    # Update traffic lights based on received data
+    # Fixed lane and sensor ordering used by the binary wire format
+    def build_wire_layout(self):
+        lanes = []
+        for direction in self.directions:
+            for traffic_light in direction.traffic_lights:
+                lane_id = f"{direction.id}.{traffic_light.id}"
+                if lane_id not in lanes:
+                    lanes.append(lane_id)
+        if "81.1" not in lanes:
+            lanes.append("81.1")
+
+        sensor_lanes = [
+            f"{direction.id}.{traffic_light.id}"
+            for direction in self.directions
+            for traffic_light in direction.traffic_lights
+            if direction.id not in self.directions_without_lane_sensors
+        ]
+        return WireLayout(lanes, sensor_lanes, list(self.special_sensors))
+
+    # Update only the traffic lights whose color changed since the previous frame
     def update_traffic_lights(self):
-        traffic_light_data = self.messenger.traffic_light_data
+        # Delayed greens of the barrier lights take effect here, drawing has no side effects
+        for traffic_light in self.active_traffic_lights:
+            traffic_light.process_delayed_changes()
 
-        if not traffic_light_data:
+        changes = self.messenger.take_traffic_light_changes()
+
+        if not changes:
             return
-            
-        if "81.1" in traffic_light_data and "41.1" in traffic_light_data:
-            self.bridge.update_state(traffic_light_data["81.1"], traffic_light_data["41.1"])
-            
-        for direction in self.directions:
-            for traffic_light in direction.traffic_lights:
-                sensor_id = f"{direction.id}.{traffic_light.id}"
-                if sensor_id in traffic_light_data:
-                    new_color = traffic_light_data[sensor_id]
-                    traffic_light.update(new_color)
+
+        if "81.1" in changes or "41.1" in changes:
+            traffic_light_data = self.messenger.traffic_light_data
+            if "81.1" in traffic_light_data and "41.1" in traffic_light_data:
+                self.bridge.update_state(traffic_light_data["81.1"], traffic_light_data["41.1"])
+
+        latency_tracker = self.messenger.latency_tracker
+        applied_at = time.monotonic()
+        for lane_id, new_color in changes.items():
+            for traffic_light in self.traffic_lights_by_lane.get(lane_id, ()):
+                traffic_light.update(new_color)
+            if new_color == TrafficLightColors.GREEN.value:
+                latency_tracker.record_green(lane_id, applied_at, self.messenger.traffic_light_received_at.get(lane_id))
+
+    def is_lane_green(self, lane_id):
+        return any(
+            traffic_light.traffic_light_status == TrafficLightColors.GREEN
+            for traffic_light in self.traffic_lights_by_lane.get(lane_id, ())
+        )
 
     # Determine which sensors are occupied by vehicles with improved efficiency
     def check_occupied_sensors(self):
         # Define directions to skip
-        directions_to_skip = [41, 42, 51, 52, 53, 54]
+        directions_to_skip = self.directions_without_lane_sensors
         
         # Initialize dictionaries with default values - excluding the directions to skip
         laneSensorData = {
@@ -229,30 +304,81 @@ class Simulation:
                         if traffic_light.back_sensor and sensor_obj is traffic_light.back_sensor and vehicle.collides_with(traffic_light.back_sensor):
                             laneSensorData[sensor_id]["achter"] = True
         
+        # Rising sensor edges start a sensor -> light latency measurement
+        self.messenger.latency_tracker.record_sensor_states(laneSensorData, time.monotonic(), self.is_lane_green)
+
         # Check if we need to force send due to time interval
-        current_time = time.time()
+        current_time = simulation_clock.time()
         
         # Send updates if data changed OR if 10 seconds have elapsed since last send
-        should_send_lane = (laneSensorData != self.previous_lane_sensor_data) or (current_time - self.last_lane_sensor_send_time >= 10)
-        should_send_special = (specialSensorData != self.previous_special_sensor_data) or (current_time - self.last_special_sensor_send_time >= 10)
+        # The periodic send is a keyframe in delta mode
+        lane_keyframe = current_time - self.last_lane_sensor_send_time >= 10
+        special_keyframe = current_time - self.last_special_sensor_send_time >= 10
+        should_send_lane = (laneSensorData != self.previous_lane_sensor_data) or lane_keyframe
+        should_send_special = (specialSensorData != self.previous_special_sensor_data) or special_keyframe
         
         if should_send_lane:
             self.previous_lane_sensor_data = laneSensorData
             self.last_lane_sensor_send_time = current_time
-            self.messenger.send(Topics.LANE_SENSORS_UPDATE.value, laneSensorData)
+            self.messenger.send_state(Topics.LANE_SENSORS_UPDATE.value, laneSensorData, keyframe=lane_keyframe)
             
         if should_send_special:
             self.previous_special_sensor_data = specialSensorData
             self.last_special_sensor_send_time = current_time
-            self.messenger.send(Topics.SPECIAL_SENSORS_UPDATE.value, specialSensorData)
+            self.messenger.send_state(Topics.SPECIAL_SENSORS_UPDATE.value, specialSensorData, keyframe=special_keyframe)
+
+    # Immutable copy of everything that is drawn, taken after an update
+    def snapshot(self):
+        return SimulationSnapshot(
+            frame=self.frame_count,
+            vehicles=tuple(
+                VehicleState(vehicle.x, vehicle.y, vehicle.angle, vehicle.rotated_width,
+                             vehicle.rotated_height, vehicle.image, vehicle.vehicle_type_string,
+                             vehicle.original_image)
+                for vehicle in self.vehicles
+            ),
+            traffic_light_statuses=tuple(traffic_light.traffic_light_status for traffic_light in self.active_traffic_lights),
+            bridge_height=self.bridge.height,
+            barrier_heights=tuple(barrier.height for barrier in self.bridge.barriers),
+        )
+
+    # Moving simulation elements of a snapshot as (surface, position) pairs in drawing order
+    # With a camera they are in window coordinates, vehicles outside the window are left out
+    def vehicle_sprites(self, snapshot, camera=None):
+        return self.vehicle_batch.update(snapshot.vehicles, camera)
+
+    # Traffic light sprites of a snapshot, these only change when a light changes color
+    def traffic_light_sprites(self, snapshot):
+        return [
+            traffic_light.sprite(status)
+            for traffic_light, status in zip(self.active_traffic_lights, snapshot.traffic_light_statuses)
+        ]
+
+    # Bridge and barrier sprites of a snapshot
+    def bridge_sprites(self, snapshot):
+        return self.bridge.sprites(snapshot.bridge_height, snapshot.barrier_heights)
+
+    # The same elements as TextureSprites, for the texture renderer
+    def vehicle_texture_sprites(self, snapshot, camera=None):
+        return self.vehicle_batch.texture_sprites(snapshot.vehicles, camera)
+
+    def traffic_light_texture_sprites(self, snapshot):
+        return [
+            traffic_light.texture_sprite(status)
+            for traffic_light, status in zip(self.active_traffic_lights, snapshot.traffic_light_statuses)
+        ]
+
+    def bridge_texture_sprites(self, snapshot):
+        return self.bridge.texture_sprites(snapshot.bridge_height, snapshot.barrier_heights)
+
+    # All simulation elements as (surface, position) pairs in drawing order
+    def sprites(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        return self.bridge_sprites(snapshot) + self.vehicle_sprites(snapshot) + self.traffic_light_sprites(snapshot)
 
     # Draw all simulation elements to the screen
     def draw(self):
-        self.bridge.draw()
-        for vehicle in self.vehicles:
-            vehicle.draw()
-        for direction in self.directions:
-            direction.draw()
+        screen.blits(self.sprites(), doreturn=False)
         for name, sensor in self.special_sensors.items():
             sensor.draw()
         
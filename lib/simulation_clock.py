@@ -0,0 +1,44 @@
+import time
+import pygame
+
+class SimulationClock:
+    """
+    Time as seen by the simulation: vehicle movement, the bridge and barriers, delayed light
+    changes and vehicle spawns. Normally this is the wall clock. With a fixed step every frame
+    advances the time by exactly that step, however long the frame really took, so a fast
+    replay moves vehicles the same distance per frame as the recording did at 60 FPS.
+    """
+
+    def __init__(self):
+        self.fixed_step = None
+        self._time = None
+        self._ticks_offset = 0
+
+    def use_fixed_step(self, step):
+        """
+        Advance the time by step seconds per frame from now on, see advance.
+
+        Args:
+            step (float): Seconds per frame, such as 1 / 60.
+        """
+        self.fixed_step = step
+        self._time = time.time()
+        self._ticks_offset = pygame.time.get_ticks() - self._time * 1000
+
+    def advance(self):
+        """Start a new frame. Called once per frame, before anything reads the time."""
+        if self.fixed_step is not None:
+            self._time += self.fixed_step
+
+    def time(self):
+        """Seconds, like time.time()."""
+        return time.time() if self.fixed_step is None else self._time
+
+    def ticks(self):
+        """Milliseconds, like pygame.time.get_ticks()."""
+        if self.fixed_step is None:
+            return pygame.time.get_ticks()
+        return int(self._time * 1000 + self._ticks_offset)
+
+
+simulation_clock = SimulationClock()
@@ -0,0 +1,53 @@
+import threading
+from typing import NamedTuple
+
+class VehicleState(NamedTuple):
+    """Drawable state of one vehicle. The image is shared, vehicles replace it instead of changing it."""
+    x: float
+    y: float
+    angle: float
+    rotated_width: int
+    rotated_height: int
+    image: object
+    vehicle_type_string: str
+    original_image: object  # Unrotated image, for the texture renderer which rotates while drawing
+
+
+class SimulationSnapshot(NamedTuple):
+    """Immutable state of the simulation after one update, everything the renderer needs."""
+    frame: int
+    vehicles: tuple  # VehicleState per vehicle, in drawing order
+    traffic_light_statuses: tuple  # TrafficLightColors per traffic light, in Simulation.active_traffic_lights order
+    bridge_height: float
+    barrier_heights: tuple
+
+
+class SnapshotBuffer:
+    """
+    Double buffer between the simulation and the renderer. The simulation writes a completed
+    snapshot into the back slot and swaps, the renderer always reads the front slot. A snapshot
+    that is being drawn stays valid while newer ones are published, because it is immutable.
+    """
+
+    def __init__(self):
+        self._slots = [None, None]
+        self._front = 0
+        self._published = threading.Condition()
+
+    def publish(self, snapshot):
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        with self._published:
+            self._front = back
+            self._published.notify_all()
+
+    def latest(self):
+        """Return the last completed snapshot, or None before the first one."""
+        with self._published:
+            return self._slots[self._front]
+
+    def wait(self, timeout=None):
+        """Wait until a snapshot is available and return the latest one, or None on timeout."""
+        with self._published:
+            self._published.wait_for(lambda: self._slots[self._front] is not None, timeout)
+            return self._slots[self._front]
@@ -0,0 +1,69 @@
+import queue
+import threading
+import time
+from lib.simulation_snapshot import SnapshotBuffer
+
+class SimulationThread(threading.Thread):
+    """
+    Runs Simulation.update on its own thread at a fixed tick rate and publishes a snapshot
+    after every tick, so a slow frame on either side does not hold up the other. The render
+    loop draws the latest snapshot. Changes to the simulation from the main thread, such as
+    spawning a vehicle from a key press, are passed with submit() and run between two ticks.
+    """
+
+    def __init__(self, simulation, tick_rate=60, before_update=None, after_update=None):
+        """
+        Args:
+            simulation (Simulation): Only updated from this thread once it is started.
+            tick_rate (int): Updates per second, 0 runs updates as fast as possible.
+            before_update (callable, optional): Called on this thread before every update.
+            after_update (callable, optional): Called on this thread with the seconds the tick took.
+        """
+        super().__init__(name="simulatie", daemon=True)
+        self.simulation = simulation
+        self.tick_interval = 1.0 / tick_rate if tick_rate else 0
+        self.before_update = before_update
+        self.after_update = after_update
+        self.snapshots = SnapshotBuffer()
+        self.ticks = 0
+        self.error = None
+        self._commands = queue.SimpleQueue()
+        self._stopping = threading.Event()
+
+    def submit(self, function, *args):
+        """Run function(*args) on the simulation thread before the next update."""
+        self._commands.put((function, args))
+
+    def stop(self):
+        self._stopping.set()
+        if self.is_alive():
+            self.join()
+
+    def run(self):
+        next_tick = time.perf_counter()
+        try:
+            while not self._stopping.is_set():
+                started = time.perf_counter()
+                while not self._commands.empty():
+                    function, args = self._commands.get()
+                    function(*args)
+                if self.before_update is not None:
+                    self.before_update()
+
+                self.simulation.update()
+                self.snapshots.publish(self.simulation.snapshot())
+                self.ticks += 1
+                if self.after_update is not None:
+                    self.after_update(time.perf_counter() - started)
+
+                next_tick += self.tick_interval
+                delay = next_tick - time.perf_counter()
+                if delay < 0:
+                    # Behind schedule, start counting again instead of catching up
+                    next_tick = time.perf_counter()
+                    delay = 0
+                self._stopping.wait(delay)
+        except Exception as e:
+            # The render loop checks is_alive() and stops, the error is reported there
+            self.error = e
+            raise
@@ -14,6 +14,7 @@ class SpatialHashGrid:
         self.grid = {}  # Dictionary mapping cell coordinates to objects
         self.object_cells = {}  # Maps objects to their cell coordinates
         self.object_bounds = {}  # Cache object bounds for faster queries
+        self.object_layers = {}  # Collision layer bits per object for mask filtering
         self.reusable_cells_set = set()  # Reusable set to avoid recreating for each query
     
     def _get_cell_coords(self, x, y):
@@ -48,8 +49,9 @@ class SpatialHashGrid:
         max_x = max(hb.x + hb.width for hb in hitboxes)
         max_y = max(hb.y + hb.height for hb in hitboxes)
         
-        # Store bounds for later queries
+        # Store bounds and layer for later queries
         self.object_bounds[obj] = (min_x, min_y, max_x, max_y)
+        self.object_layers[obj] = int(obj.collision_layer)
         
         # Get cells this object belongs to
         cells = self._get_cells_for_bounds(min_x, min_y, max_x, max_y)
@@ -75,8 +77,11 @@ class SpatialHashGrid:
         # Store updated cell list
         self.object_cells[obj] = set(cells)  # Make a copy of the set
     
-    def query(self, hitbox):
-        """Find all objects that could potentially collide with the given hitbox."""
+    def query(self, hitbox, mask=None):
+        """
+        Find all objects that could potentially collide with the given hitbox.
+        If a collision mask is given, only objects on one of its layers are returned.
+        """
         # Use object bounds from hitbox
         cells = self._get_cells_for_bounds(
             hitbox.x, hitbox.y, 
@@ -90,18 +95,42 @@ class SpatialHashGrid:
             if cell in self.grid:
                 result.update(self.grid[cell])
         
+        if mask is not None:
+            mask = int(mask)
+            layers = self.object_layers
+            return [obj for obj in result if layers[obj] & mask]
         return list(result)
     
-    def query_radius(self, x, y, radius):
+    def query_swept(self, hitbox, step_x, step_y, mask=None, margin=1.0):
+        """
+        Find the objects overlapping the area covered by moving the hitbox by (step_x, step_y).
+        Unlike query, candidates are also tested against their cached bounds,
+        so objects behind and beside the swept area are excluded.
+        """
+        min_x = hitbox.x + min(step_x, 0.0) - margin
+        min_y = hitbox.y + min(step_y, 0.0) - margin
+        max_x = hitbox.x + hitbox.width + max(step_x, 0.0) + margin
+        max_y = hitbox.y + hitbox.height + max(step_y, 0.0) + margin
+
+        bounds = self.object_bounds
+        result = []
+        for obj in self.query(Hitbox(min_x, min_y, max_x - min_x, max_y - min_y), mask):
+            obj_min_x, obj_min_y, obj_max_x, obj_max_y = bounds[obj]
+            if obj_min_x < max_x and obj_max_x > min_x and obj_min_y < max_y and obj_max_y > min_y:
+                result.append(obj)
+        return result
+
+    def query_radius(self, x, y, radius, mask=None):
         """Find all objects within a radius of the given point."""
         # Create a bounds that encompasses the circle
-        return self.query(Hitbox(x - radius, y - radius, radius * 2, radius * 2))
+        return self.query(Hitbox(x - radius, y - radius, radius * 2, radius * 2), mask)
     
     def clear(self):
         """Clear the grid and associated caches."""
         self.grid.clear()
         self.object_cells.clear()
         self.object_bounds.clear()
+        self.object_layers.clear()
         self.reusable_cells_set.clear()
     
     def bulk_insert(self, objects):
@@ -122,7 +151,16 @@ class SpatialHashGrid:
         
         if obj in self.object_bounds:
             del self.object_bounds[obj]
+        self.object_layers.pop(obj, None)
     
+    def occupancy(self):
+        """
+        Return (occupied cells, objects, most objects in one cell), for the HUD.
+        Safe to call from another thread, the cells are copied in one step.
+        """
+        cells = list(self.grid.values())
+        return len(cells), len(self.object_cells), max(map(len, cells), default=0)
+
     def draw(self, color=(150, 150, 150)):
         """Draw grid for debugging purposes."""
         # Only draw cells with objects
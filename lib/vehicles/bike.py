@@ -1,9 +1,13 @@
+from lib.enums.collision_layers import CollisionLayers
 from lib.vehicles.supports_collision_free_zones import SupportsCollisionFreeZones
 from lib.vehicles.vehicle import Vehicle
 
 class Bike(Vehicle, SupportsCollisionFreeZones):
     vehicle_type_string = "bike"
     speed = 20
+    spawn_clearance = 12
+    collision_layer = CollisionLayers.CYCLE_PATH
+    collision_mask = CollisionLayers.LAND | CollisionLayers.CYCLE_SIGNAL
 
     def __init__(self, id, path):
         Vehicle.__init__(self, id, path, self.speed, self.vehicle_type_string)
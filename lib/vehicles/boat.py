@@ -2,6 +2,7 @@ import random
 import time
 import pygame
 import os
+from lib.enums.collision_layers import CollisionLayers
 from lib.vehicles.vehicle import Vehicle
 
 class Boat(Vehicle):
@@ -11,6 +12,9 @@ class Boat(Vehicle):
     """
     vehicle_type_string = "boat"
     speed = 12
+    spawn_clearance = 60
+    collision_layer = CollisionLayers.WATER
+    collision_mask = CollisionLayers.WATER | CollisionLayers.WATER_SIGNAL
     HORN_CHANNEL = 10
    
     def __init__(self, id, path):
@@ -27,7 +31,8 @@ class Boat(Vehicle):
         self.horn_sound = None
         self.is_honking = False
         self.horn_cooldown = 30.0  # Cooldown in seconds between horn sounds
-        self.load_horn_sound()
+        if self.cosmetic_effects:
+            self.load_horn_sound()
    
     def load_horn_sound(self):
         """
@@ -61,8 +66,9 @@ class Boat(Vehicle):
             if self.is_honking:
                 self.stop_honking()
        
-        # Check if horn should sound
-        self.check_for_horn()
+        # Check if horn should sound, unless cosmetic effects are off
+        if self.cosmetic_effects:
+            self.check_for_horn()
    
     def stop_honking(self):
         """
@@ -3,6 +3,7 @@ from lib.vehicles.vehicle import Vehicle
 class Bus(Vehicle):
     vehicle_type_string = "bus"
     speed = 60
+    spawn_clearance = 40
 
     def __init__(self, id, path):
         super().__init__(id, path, self.speed, self.vehicle_type_string)
\ No newline at end of file
@@ -11,6 +11,7 @@ class Car(Vehicle):
     """
     vehicle_type_string = "car"
     speed = 60
+    spawn_clearance = 24
     HORN_CHANNEL = 9
     
     def __init__(self, id, path):
@@ -25,7 +26,8 @@ class Car(Vehicle):
         self.last_horn_check_time = time.time()
         self.horn_sounds = []
         self.is_honking = False
-        self.load_horn_sounds()
+        if self.cosmetic_effects:
+            self.load_horn_sounds()
     
     def load_horn_sounds(self):
         """
@@ -63,8 +65,9 @@ class Car(Vehicle):
             if self.is_honking:
                 self.stop_honking()
         
-        # Always check if horn should be played
-        self.check_for_horn()
+        # Always check if horn should be played, unless cosmetic effects are off
+        if self.cosmetic_effects:
+            self.check_for_horn()
     
     def stop_honking(self):
         """
@@ -1,8 +1,8 @@
 import os
 import random
-import re
 import pygame
 import time
+from lib.rendering.sprite_atlas import display_atlas, world_size
 from lib.vehicles.vehicle import Vehicle
 
 class EmergencyVehicle(Vehicle):
@@ -12,6 +12,7 @@ class EmergencyVehicle(Vehicle):
     """
     vehicle_type_string = "emergency_vehicle"
     speed = 100
+    spawn_clearance = 34
 
     # Track used audio channels to avoid overlap
     used_channels = set()
@@ -94,29 +95,19 @@ class EmergencyVehicle(Vehicle):
 
     def load_random_image_with_dimensions(self, folder):
         """
-        Loads a random vehicle image with size extracted from filename.
+        Picks a random first siren frame (WIDTHxHEIGHT-1) from the sprite atlas.
 
-        :param folder: Folder to look for images.
+        :param folder: Folder of the vehicle type's sprite images.
         :return: Tuple of (pygame image, width, height).
         """
-        image_files = [f for f in os.listdir(folder) if f.endswith('-1.webp')]
-        if not image_files:
+        atlas = display_atlas()
+        names = [name for name in atlas.names(folder.replace(os.sep, "/").removeprefix("assets/")) if name.endswith('-1')]
+        if not names:
             return super().load_random_image_with_dimensions(folder)
 
-        image_file = random.choice(image_files)
-        dimensions_match = re.search(r'(\d+)x(\d+)-1.webp$', image_file)
-
-        if dimensions_match:
-            sprite_width = int(dimensions_match.group(1))
-            sprite_height = int(dimensions_match.group(2))
-        else:
-            sprite_width, sprite_height = 40, 40  # fallback default
-
-        image_path = os.path.join(folder, image_file)
-        image = pygame.image.load(image_path).convert_alpha()
-        scaled_image = self.scale_image(image, sprite_width, sprite_height)
-
-        return scaled_image, sprite_width, sprite_height
+        name = random.choice(names)
+        sprite_width, sprite_height = world_size(name)
+        return atlas.sprite(name), sprite_width, sprite_height
 
     def load_siren_images(self):
         """
@@ -126,19 +117,10 @@ class EmergencyVehicle(Vehicle):
         """
         images = [self.original_image]  # Start with the default
 
-        base_folder = f"assets/vehicles/{self.vehicle_type_string}"
-        image_files = [f for f in os.listdir(base_folder) if f.endswith('.webp')]
-
-        matching_image = None
-        for file in image_files:
-            if f"{self.sprite_width}x{self.sprite_height}-2.webp" in file:
-                matching_image = file
-                break
-
-        if matching_image:
-            image_path = os.path.join(base_folder, matching_image)
-            image = pygame.image.load(image_path).convert_alpha()
-            images.append(self.scale_image(image, self.sprite_width, self.sprite_height))
+        atlas = display_atlas()
+        second_frame = f"vehicles/{self.vehicle_type_string}/{self.sprite_width}x{self.sprite_height}-2"
+        if second_frame in atlas.rects:
+            images.append(atlas.sprite(second_frame))
         else:
             # If no second frame found, duplicate the first
             images.append(self.original_image)
@@ -163,31 +145,26 @@ class EmergencyVehicle(Vehicle):
             self.release_channel(self.channel_id)
             self.channel_id = None
 
-    def has_finished(self):
+    def finish(self):
         """
         Called when the vehicle finishes its route. Ensures the siren is stopped.
-
-        :return: True if the vehicle has completed its path.
         """
-        finished = super().has_finished()
-        if finished:
-            self.stop_siren()
-        return finished
+        super().finish()
+        self.stop_siren()
 
-    def draw(self):
+    def apply_movement(self, movement_data):
         """
-        Draws the vehicle on screen, toggling between siren images periodically to simulate flashing lights.
+        Moves the vehicle and toggles between the siren images periodically to simulate flashing lights.
+        Done here instead of while drawing, so drawing the vehicle does not change its state.
         """
+        super().apply_movement(movement_data)
+
         current_time = time.time()
-        if current_time - self.last_siren_toggle >= self.siren_interval:
+        if self.cosmetic_effects and current_time - self.last_siren_toggle >= self.siren_interval:
             # Alternate between siren images
             self.current_siren_image = (self.current_siren_image + 1) % len(self.siren_images)
             self.last_siren_toggle = current_time
             self.original_image = self.siren_images[self.current_siren_image]
 
             # Update rotated image to reflect the new frame
-            self.image = pygame.transform.rotate(self.original_image, self.angle)
-            self.rotated_width = self.image.get_width()
-            self.rotated_height = self.image.get_height()
-
-        super().draw()
+            self.rotate_image()
@@ -1,9 +1,13 @@
+from lib.enums.collision_layers import CollisionLayers
 from lib.vehicles.supports_collision_free_zones import SupportsCollisionFreeZones
 from lib.vehicles.vehicle import Vehicle
 
 class Pedestrian(Vehicle, SupportsCollisionFreeZones):
     vehicle_type_string = "pedestrian"
     speed = 10
+    spawn_clearance = 4
+    collision_layer = CollisionLayers.SIDEWALK
+    collision_mask = CollisionLayers.LAND | CollisionLayers.SIDEWALK_SIGNAL
 
     def __init__(self, id, path):
         Vehicle.__init__(self, id, path, self.speed, self.vehicle_type_string)
@@ -1,7 +1,6 @@
-import pygame
-
 from lib.collidable_object import CollidableObject, Hitbox
 from lib.enums.topics import Topics
+from lib.simulation_clock import simulation_clock
 
 class PriorityQueueManager():
     """
@@ -20,7 +19,7 @@ class PriorityQueueManager():
         self.should_send_update = False
         
         # Timer voor periodieke updates (elke 10 seconden)
-        self.last_update_time = pygame.time.get_ticks()
+        self.last_update_time = simulation_clock.ticks()
         self.update_interval = 10000  # 10 seconden in milliseconden
 
         # Define spatial zones for relevance and intersection
@@ -42,6 +41,18 @@ class PriorityQueueManager():
         }
         self.priority_vehicles[vehicle.id] = item
 
+    def remove(self, vehicle):
+        """
+        Stops tracking a vehicle that left the simulation, registered as a
+        VehicleRegistry finish hook. Other vehicles are ignored.
+        """
+        self._remove_id(vehicle.id)
+
+    def _remove_id(self, id):
+        if self.priority_vehicles.pop(id, None) is not None and id in self.queue:
+            self.queue.pop(id)
+            self.should_send_update = True
+
     def update(self, vehicles):
         """
         Updates the internal state of tracked priority vehicles. If a vehicle is in the relevance
@@ -51,49 +62,45 @@ class PriorityQueueManager():
         Also sends periodic updates every 10 seconds regardless of queue changes.
         """
         # Check if a periodic update is needed
-        current_time = pygame.time.get_ticks()
+        current_time = simulation_clock.ticks()
         if current_time - self.last_update_time >= self.update_interval:
             self.last_update_time = current_time
-            self._send_update()
+            self._send_update(keyframe=True)
         
-        for id, item in self.priority_vehicles.copy().items():
-            # Match current vehicle state by ID
-            vehicle = next((v for v in vehicles if v.id == id), None)
+        for id, item in list(self.priority_vehicles.items()):
+            vehicle = vehicles.get(id)
+            if vehicle is None:
+                # Normally removed by the finish hook, drop vehicles that left another way
+                self._remove_id(id)
+                continue
+
+            # Check if the vehicle is in either relevance zone
+            in_relevance_zone = vehicle.collides_with(self.relevance_zone)
+            in_bridge_relevance_zone = vehicle.collides_with(self.bridge_relevance_zone)
+
+            if not id in self.queue:
+                # Vehicle should be added to the queue
+                if (in_relevance_zone or in_bridge_relevance_zone):
+                    if (not item["has_been_in_intersection"]):
+                        self.queue[id] = {
+                            "baan": item["route_lane"] if in_relevance_zone else self._get_lane_brige_equivalent(item["route_lane"]),
+                            "simulatie_tijd_ms": simulation_clock.ticks(),
+                            "prioriteit": item["priority"]
+                        }
+                        self.should_send_update = True
+                else:
+                    # Reset if vehicle left the zone without entering intersection
+                    self.priority_vehicles[id]["has_been_in_intersection"] = False
 
-            if not vehicle:
-                # Remove vehicles no longer present
-                if id in self.queue:
+            # Track if vehicle entered intersection zone
+            if vehicle.collides_with(self.intersection_zone) or vehicle.collides_with(self.bridge_intersection_zone):
+                item["has_been_in_intersection"] = True
+            else:
+                # Remove from queue if vehicle has left the intersection
+                if item["has_been_in_intersection"] and id in self.queue:
                     self.queue.pop(id)
                     self.should_send_update = True
-                self.priority_vehicles.pop(id)
-            else:
-                # Check if the vehicle is in either relevance zone
-                in_relevance_zone = vehicle.collides_with(self.relevance_zone)
-                in_bridge_relevance_zone = vehicle.collides_with(self.bridge_relevance_zone)
-
-                if not id in self.queue:
-                    # Vehicle should be added to the queue
-                    if (in_relevance_zone or in_bridge_relevance_zone):
-                        if (not item["has_been_in_intersection"]):
-                            self.queue[id] = {
-                                "baan": item["route_lane"] if in_relevance_zone else self._get_lane_brige_equivalent(item["route_lane"]),
-                                "simulatie_tijd_ms": pygame.time.get_ticks(),
-                                "prioriteit": item["priority"]
-                            }
-                            self.should_send_update = True
-                    else:
-                        # Reset if vehicle left the zone without entering intersection
-                        self.priority_vehicles[id]["has_been_in_intersection"] = False
-
-                # Track if vehicle entered intersection zone
-                if vehicle.collides_with(self.intersection_zone) or vehicle.collides_with(self.bridge_intersection_zone):
-                    item["has_been_in_intersection"] = True
-                else:
-                    # Remove from queue if vehicle has left the intersection
-                    if item["has_been_in_intersection"] and id in self.queue:
-                        self.queue.pop(id)
-                        self.should_send_update = True
-        
+    
         # Send update if needed based on queue changes
         if self.should_send_update:
             self.should_send_update = False
@@ -109,12 +116,13 @@ class PriorityQueueManager():
         else:
             return "42.1"
 
-    def _send_update(self):
+    def _send_update(self, keyframe=False):
         """
         Sends the current queue data to the designated messenger topic.
+        The periodic update is sent as a keyframe in delta mode.
         """
         data = {"queue": list(self.queue.values())}
-        self.messenger.send(Topics.PRIORITY_VEHICLE.value, data)
+        self.messenger.send_state(Topics.PRIORITY_VEHICLE.value, data, keyframe=keyframe)
 
 
 class PriorityVehicleRelevanceZone(CollidableObject):
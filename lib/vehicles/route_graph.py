@@ -0,0 +1,198 @@
+from lib.vehicles.path import Path
+
+class RouteGraph:
+    """
+    Routes compiled once from the configuration into a graph of component nodes.
+    Parts of a route without choices are expanded into coordinate tuples at compile time,
+    so sampling a route only makes the variation and multi-lane choices. Expanded paths
+    are interned and shared by every vehicle that made the same choices.
+    """
+
+    def __init__(self, routes, route_components):
+        """
+        Compile all routes and the components they reference.
+
+        :param routes: List of route definitions from routes.yaml.
+        :param route_components: List of named route components.
+        """
+        # The first component wins when a name is defined twice
+        self._components = {}
+        for rc in route_components or []:
+            self._components.setdefault(rc.get("name"), rc)
+        self._compiled_components = {}
+        self._points = {}  # Interned (x, y) tuples
+        self._paths = {}  # Interned waypoint tuples
+        self._expansions = {}  # (route name, choices) -> Path
+
+        self.routes = {route["name"]: self._compile(route["path"]) for route in routes}
+
+    @classmethod
+    def from_config(cls, config):
+        """Compile the routes of a loaded configuration dict."""
+        return cls(config.get("routes", []), config.get("route_components", []))
+
+    def sample(self, route_name):
+        """
+        Sample a path for the given route.
+
+        :param route_name: Name of the route in routes.yaml.
+        :return: A shared Path instance.
+        """
+        node = self.routes[route_name]
+        choices = []
+        node.choose(choices)
+
+        key = (route_name, tuple(choices))
+        path = self._expansions.get(key)
+        if path is None:
+            points = []
+            lane = node.expand(iter(choices), points, None)
+            points = tuple(points)
+            path = Path(self._paths.setdefault(points, points), lane)
+            self._expansions[key] = path
+        return path
+
+    def entry_points(self, route_name):
+        """Return every coordinate a vehicle on the given route can start from."""
+        return self.routes[route_name].entry_points()
+
+    def _compile(self, path_data):
+        """
+        Compile a path definition (list of segments, or dict with 'path' and
+        an optional 'associated_lane') into a node.
+        """
+        if isinstance(path_data, dict):
+            return self._compile_sequence(path_data.get("path", []), path_data.get("associated_lane"))
+        return self._compile_sequence(path_data, None)
+
+    def _compile_sequence(self, segments, associated_lane):
+        parts = []
+        for segment in segments:
+            if isinstance(segment, list):
+                parts.append(_StaticNode((self._intern_point(segment),), None))
+            elif isinstance(segment, str):
+                component = self._compile_component(segment)
+                if component is not None:
+                    parts.append(component)
+            elif isinstance(segment, dict):
+                lane = segment.get("associated_lane")
+                if "multi_lane" in segment:
+                    choice = _ChoiceNode([self._compile(option) for option in segment["multi_lane"]], None)
+                elif "variations" in segment:
+                    variations = segment["variations"]
+                    choice = _ChoiceNode(
+                        [self._compile(option) for option in variations],
+                        [option.get("usage_percentage", 0) for option in variations]
+                    )
+                else:
+                    choice = None
+
+                if lane is not None:
+                    parts.append(_StaticNode((), lane))
+                if choice is not None:
+                    parts.append(choice)
+
+        # Merge runs of static parts into single pre-expanded coordinate tuples
+        merged = []
+        for part in parts:
+            if isinstance(part, _StaticNode) and merged and isinstance(merged[-1], _StaticNode):
+                previous = merged.pop()
+                part = _StaticNode(
+                    previous.points + part.points,
+                    part.associated_lane if part.associated_lane is not None else previous.associated_lane
+                )
+            merged.append(part)
+
+        if not merged:
+            return _StaticNode((), associated_lane)
+        if len(merged) == 1 and isinstance(merged[0], _StaticNode):
+            static = merged[0]
+            lane = static.associated_lane if static.associated_lane is not None else associated_lane
+            return _StaticNode(static.points, lane)
+        return _SequenceNode(merged, associated_lane)
+
+    def _compile_component(self, name):
+        """Compile a named route component once and reuse the node afterwards."""
+        if name not in self._compiled_components:
+            component = self._components.get(name)
+            self._compiled_components[name] = self._compile(component) if component else None
+        return self._compiled_components[name]
+
+    def _intern_point(self, point):
+        point = tuple(point)
+        return self._points.setdefault(point, point)
+
+
+class _StaticNode:
+    """Pre-expanded coordinates without any choices."""
+    __slots__ = ('points', 'associated_lane')
+
+    def __init__(self, points, associated_lane):
+        self.points = points
+        self.associated_lane = associated_lane
+
+    def choose(self, choices):
+        pass
+
+    def expand(self, choices, points, lane):
+        points.extend(self.points)
+        return self.associated_lane if self.associated_lane is not None else lane
+
+    def entry_points(self):
+        return {self.points[0]} if self.points else set()
+
+
+class _SequenceNode:
+    """Ordered parts of which at least one contains a choice."""
+    __slots__ = ('parts', 'associated_lane')
+
+    def __init__(self, parts, associated_lane):
+        self.parts = parts
+        self.associated_lane = associated_lane
+
+    def choose(self, choices):
+        for part in self.parts:
+            part.choose(choices)
+
+    def expand(self, choices, points, lane):
+        if self.associated_lane is not None:
+            lane = self.associated_lane
+        for part in self.parts:
+            lane = part.expand(choices, points, lane)
+        return lane
+
+    def entry_points(self):
+        for part in self.parts:
+            points = part.entry_points()
+            if points:
+                return points
+        return set()
+
+
+class _ChoiceNode:
+    """
+    A multi_lane or variations segment. Variations carry weights,
+    multi_lane choices are balanced with Path.select_lane_index.
+    """
+    __slots__ = ('options', 'weights')
+
+    def __init__(self, options, weights):
+        self.options = options
+        self.weights = weights
+
+    def choose(self, choices):
+        if self.weights is None:
+            index = Path.select_lane_index(len(self.options))
+        else:
+            index = Path.select_variation_index(self.weights)
+        choices.append(index)
+        self.options[index].choose(choices)
+
+    def expand(self, choices, points, lane):
+        return self.options[next(choices)].expand(choices, points, lane)
+
+    def entry_points(self):
+        points = set()
+        for option in self.options:
+            points |= option.entry_points()
+        return points
@@ -0,0 +1,55 @@
+from lib.collidable_object import CollidableObject, Hitbox
+from lib.vehicles.vehicle import Vehicle
+
+class SpawnPoint(CollidableObject):
+    """
+    Small occupancy probe placed on the first waypoint of a route.
+    Used to decide whether a new vehicle can enter before it is constructed.
+    """
+
+    def __init__(self, position, clearance, collision_mask):
+        """
+        Initialize the probe centered on the entry coordinate.
+
+        Args:
+            position (tuple): (x, y) entry coordinate of the route.
+            clearance (float): Width and height of the square probe.
+            collision_mask (CollisionLayers): Layers of the vehicles that block this entry.
+        """
+        self.position = tuple(position)
+        self.clearance = clearance
+        self.collision_mask = collision_mask
+        half = clearance / 2
+        self._hitboxes = [Hitbox(
+            x=self.position[0] - half,
+            y=self.position[1] - half,
+            width=clearance,
+            height=clearance,
+        )]
+
+        # Slightly larger box for the grid query, the grid is only rebuilt once per frame
+        margin = 5
+        self.query_box = Hitbox(
+            x=self._hitboxes[0].x - margin,
+            y=self._hitboxes[0].y - margin,
+            width=clearance + margin * 2,
+            height=clearance + margin * 2,
+        )
+
+    def hitboxes(self):
+        return self._hitboxes
+
+    def is_occupied(self, spatial_hash):
+        """
+        Check whether any vehicle currently overlaps the probe.
+
+        Args:
+            spatial_hash (SpatialHashGrid): Grid containing the vehicles of this frame.
+
+        Returns:
+            bool: True if the entry is blocked.
+        """
+        for obj in spatial_hash.query(self.query_box, self.collision_mask):
+            if isinstance(obj, Vehicle) and self.collides_with(obj):
+                return True
+        return False
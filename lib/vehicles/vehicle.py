@@ -3,9 +3,11 @@ import pygame
 import os
 import random
 import time
-import re
 from lib.collidable_object import CollidableObject, Hitbox
+from lib.enums.collision_layers import CollisionLayers
+from lib.rendering.sprite_atlas import display_atlas, world_size
 from lib.screen import screen, scale_to_display
+from lib.simulation_clock import simulation_clock
 from lib.vehicles.supports_collision_free_zones import SupportsCollisionFreeZones
 
 class Vehicle(CollidableObject):
@@ -17,14 +19,27 @@ class Vehicle(CollidableObject):
     __slots__ = ('path', 'id', 'current_target', 'x', 'y', 'speed', 'vehicle_type_string', 
                  'original_image', 'sprite_width', 'sprite_height', 'angle', 'image', 
                  'rotated_width', 'rotated_height', '_cached_hitboxes', '_last_position', 
-                 '_last_angle', 'last_move_time')
+                 '_last_angle', 'last_move_time', 'registry')
     
     # Class variables shared by all instances
     collision_free_zones = []
     last_update_time = time.time()
-    
-    # Pre-load and cache images to avoid repeated disk access
-    _image_cache = {}
+
+    # Longest time step applied in one movement update, to avoid large jumps (limited to 20fps)
+    max_step_time = 0.05
+
+    # Size of the probe that must be clear before this vehicle type can spawn
+    spawn_clearance = 20
+
+    # Horns and siren animation, switched off by the frame governor when frames take too long
+    cosmetic_effects = True
+
+    # Rotated images are only needed for surface drawing, the texture renderer rotates while drawing
+    rotate_images = True
+
+    # Road vehicles by default, they yield to all land traffic and car lights
+    collision_layer = CollisionLayers.ROAD
+    collision_mask = CollisionLayers.LAND | CollisionLayers.ROAD_SIGNAL
 
     def __init__(self, id, path, speed, vehicle_type_string):
         """
@@ -60,86 +75,33 @@ class Vehicle(CollidableObject):
         self._last_angle = self.angle
         
         # Timestamp of last movement update for smooth frame-independent movement
-        self.last_move_time = time.time()
+        self.last_move_time = simulation_clock.time()
+
+        self.registry = None  # VehicleRegistry the vehicle was added to, told when it finishes
 
     def after_create(self):
         """Placeholder method to be optionally overridden by subclasses."""
         pass
     
-    @classmethod
-    def _load_image_from_file(cls, image_path):
-        """Load an image from file with caching for better performance."""
-        if image_path not in cls._image_cache:
-            cls._image_cache[image_path] = pygame.image.load(image_path).convert_alpha()
-        return cls._image_cache[image_path]
-    
     def load_random_image_with_dimensions(self, folder):
         """
-        Loads a random .webp image from a given folder, extracts sprite dimensions
-        from the filename (format: WIDTHxHEIGHT[-index].webp), and scales it.
+        Picks a random sprite of a vehicle type from the sprite atlas, already at the
+        display scale. The sprite dimensions come from its name (format: WIDTHxHEIGHT[-index]).
 
         Args:
-            folder (str): Path to the folder containing sprite images.
+            folder (str): Path to the folder containing the vehicle type's sprite images.
 
         Returns:
             tuple: (scaled pygame.Surface, width, height)
         """
-        # Use class variable to avoid redoing file listing for same folders
-        if not hasattr(Vehicle, '_folder_image_files'):
-            Vehicle._folder_image_files = {}
-            
-        if folder not in Vehicle._folder_image_files:
-            Vehicle._folder_image_files[folder] = [
-                f for f in os.listdir(folder) if f.endswith('.webp')
-            ]
-            
-        image_files = Vehicle._folder_image_files[folder]
-        if not image_files:
-            raise ValueError(f"Geen WebP-afbeeldingen gevonden in de map: {folder}")
-        
-        image_file = random.choice(image_files)
-        
-        # Use pre-compiled regex pattern for better performance
-        if not hasattr(Vehicle, '_dimensions_pattern'):
-            Vehicle._dimensions_pattern = re.compile(r'(\d+)x(\d+)(?:-\d+)?\.webp$')
-            
-        dimensions_match = Vehicle._dimensions_pattern.search(image_file)
-        if dimensions_match:
-            sprite_width = int(dimensions_match.group(1))
-            sprite_height = int(dimensions_match.group(2))
-        else:
-            # Fallback dimensions if pattern does not match
-            sprite_width = 40
-            sprite_height = 40
-        
-        image_path = os.path.join(folder, image_file)
-        image = self._load_image_from_file(image_path)
-        scaled_image = self.scale_image(image, sprite_width, sprite_height)
-        
-        return scaled_image, sprite_width, sprite_height
-
-    def scale_image(self, image, width, height):
-        """
-        Scale the given image to display coordinates based on width and height.
-
-        Args:
-            image (pygame.Surface): The original image to scale.
-            width (int): Target width.
-            height (int): Target height.
+        atlas = display_atlas()
+        names = atlas.names(folder.replace(os.sep, "/").removeprefix("assets/"))
+        if not names:
+            raise ValueError(f"Geen sprites gevonden in de atlas voor de map: {folder}")
 
-        Returns:
-            pygame.Surface: Scaled image surface.
-        """
-        # Cache scaled images based on dimensions
-        cache_key = (id(image), width, height)
-        if not hasattr(Vehicle, '_scaled_image_cache'):
-            Vehicle._scaled_image_cache = {}
-            
-        if cache_key not in Vehicle._scaled_image_cache:
-            scaled_dims = scale_to_display(width, height)
-            Vehicle._scaled_image_cache[cache_key] = pygame.transform.scale(image, scaled_dims)
-            
-        return Vehicle._scaled_image_cache[cache_key]
+        name = random.choice(names)
+        sprite_width, sprite_height = world_size(name)
+        return atlas.sprite(name), sprite_width, sprite_height
     
     def hitboxes(self):
         """
@@ -193,6 +155,28 @@ class Vehicle(CollidableObject):
         self._last_angle = self.angle
         return hitboxes
     
+    def look_ahead(self):
+        """
+        Describe the area the vehicle can reach in its next movement update.
+        can_move only tests the front hitbox, so obstacles outside the front hitbox
+        swept along the largest possible step can never block the vehicle.
+
+        Returns:
+            tuple: (front Hitbox, step_x, step_y) with the largest step towards the next waypoint.
+        """
+        front = self.hitboxes()[-1]
+        if self.current_target >= len(self.path) - 1:
+            return front, 0.0, 0.0
+
+        target_x, target_y = self.path[self.current_target + 1]
+        dx, dy = target_x - self.x, target_y - self.y
+        distance = math.hypot(dx, dy)
+        if distance <= 0.01:
+            return front, 0.0, 0.0
+
+        step_ratio = min(self.speed * self.max_step_time, distance) / distance
+        return front, dx * step_ratio, dy * step_ratio
+
     def calculate_next_position(self, obstacles):
         """
         Calculate the vehicle's next position along its path based on elapsed time,
@@ -220,8 +204,8 @@ class Vehicle(CollidableObject):
             }
         
         # Calculate elapsed time since last movement update
-        current_time = time.time()
-        elapsed_time = min(current_time - self.last_move_time, 0.05) # Clamp to avoid large jumps in time, limited to 20fps
+        current_time = simulation_clock.time()
+        elapsed_time = min(current_time - self.last_move_time, self.max_step_time) # Clamp to avoid large jumps in time
         
         # Target waypoint coordinates
         target_x, target_y = self.path[self.current_target + 1]
@@ -283,9 +267,7 @@ class Vehicle(CollidableObject):
                 self.angle = new_angle
                 
                 # Only regenerate the rotated image when needed
-                self.image = pygame.transform.rotate(self.original_image, self.angle)
-                self.rotated_width = self.image.get_width()
-                self.rotated_height = self.image.get_height()
+                self.rotate_image()
                 
                 # Invalidate hitbox cache since angle changed
                 self._cached_hitboxes = None
@@ -293,10 +275,13 @@ class Vehicle(CollidableObject):
                 # Position changed but angle didn't - still invalidate cache
                 self._cached_hitboxes = None
                 
+            reached_end = self.current_target < len(self.path) - 1 <= movement_data['current_target']
             self.current_target = movement_data['current_target']
+            if reached_end:
+                self.finish()
         
         # Update the timestamp for the last movement to calculate elapsed time next frame
-        self.last_move_time = time.time()
+        self.last_move_time = simulation_clock.time()
     
     def move(self, obstacles):
         """
@@ -413,13 +398,35 @@ class Vehicle(CollidableObject):
                 self.angle = new_angle
                 
                 # Rotate the original image and update dimensions
-                self.image = pygame.transform.rotate(self.original_image, self.angle)
-                self.rotated_width = self.image.get_width()
-                self.rotated_height = self.image.get_height()
+                self.rotate_image()
                 
                 # Invalidate hitbox cache
                 self._cached_hitboxes = None
 
+    def rotate_image(self):
+        """
+        Update the rotated image and its dimensions for the current angle. Without rotate_images
+        only the dimensions of the rotated bounds are computed and the image stays unrotated.
+        """
+        if self.rotate_images:
+            self.image = pygame.transform.rotate(self.original_image, self.angle)
+            self.rotated_width, self.rotated_height = self.image.get_size()
+        else:
+            self.image = self.original_image
+            width, height = self.original_image.get_size()
+            radians = math.radians(self.angle)
+            cos, sin = abs(math.cos(radians)), abs(math.sin(radians))
+            self.rotated_width = math.ceil(width * cos + height * sin)
+            self.rotated_height = math.ceil(width * sin + height * cos)
+
+    def finish(self):
+        """
+        Called once when the vehicle reaches the last target in its path. Reports it to its
+        registry, which removes it at the end of the frame.
+        """
+        if self.registry is not None:
+            self.registry.report_finished(self)
+
     def has_finished(self):
         """
         Check if the vehicle has reached the last target in its path.
@@ -429,14 +436,23 @@ class Vehicle(CollidableObject):
         """
         return self.current_target >= len(self.path) - 1
 
-    def draw(self):
-        """ 
-        Draw the vehicle's rotated image centered at its current position on the screen.
+    def sprite(self):
+        """
+        Return the vehicle's rotated image and the screen position that centers it on the vehicle.
+
+        Returns:
+            tuple: (pygame.Surface, (x, y)) ready to be blitted.
         """
         screen_x, screen_y = scale_to_display(self.x, self.y)
         draw_x = int(screen_x - self.rotated_width // 2)
         draw_y = int(screen_y - self.rotated_height // 2)
-        screen.blit(self.image, (draw_x, draw_y))
+        return self.image, (draw_x, draw_y)
+
+    def draw(self):
+        """ 
+        Draw the vehicle's rotated image centered at its current position on the screen.
+        """
+        screen.blit(*self.sprite())
         
         # Uncomment below to draw debug rectangles around hitboxes
         # for hitbox in self.hitboxes():
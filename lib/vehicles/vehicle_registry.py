@@ -0,0 +1,80 @@
+class VehicleRegistry:
+    """
+    Owns the vehicles of a simulation. Keeps a dense list for iteration, an index by id
+    for O(1) lookup and swap-remove deletion, and per-type buckets. Vehicles report
+    themselves when they reach the end of their path, so finding the finished vehicles
+    does not scan all of them. Subsystems can register hooks that are called when a
+    vehicle finishes.
+    """
+
+    def __init__(self):
+        self._vehicles = []  # Dense list, order is not preserved on removal
+        self._positions = {}  # Vehicle id -> index in self._vehicles
+        self._by_type = {}  # vehicle_type_string -> {id: vehicle}
+        self._finish_hooks = []
+        self._finished = []  # Vehicles that reported finishing since the last remove_finished
+
+    def __iter__(self):
+        return iter(self._vehicles)
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    def __contains__(self, vehicle):
+        return self.get(vehicle.id) is vehicle
+
+    def get(self, id):
+        """Return the vehicle with the given id, or None if it is not (or no longer) present."""
+        position = self._positions.get(id)
+        return self._vehicles[position] if position is not None else None
+
+    def of_type(self, vehicle_type_string):
+        """Return the vehicles of one type, e.g. 'car' or 'boat'."""
+        return self._by_type.get(vehicle_type_string, {}).values()
+
+    def count_by_type(self):
+        """
+        Return the number of vehicles per type. The buckets are copied in one step,
+        so the HUD can call this while the simulation thread adds vehicles.
+        """
+        return {vehicle_type: len(bucket) for vehicle_type, bucket in list(self._by_type.items())}
+
+    def on_finish(self, callback):
+        """Register a callback(vehicle) called after a vehicle is removed."""
+        self._finish_hooks.append(callback)
+
+    def add(self, vehicle):
+        """Add a vehicle. Its id must already be assigned."""
+        self._positions[vehicle.id] = len(self._vehicles)
+        self._vehicles.append(vehicle)
+        self._by_type.setdefault(vehicle.vehicle_type_string, {})[vehicle.id] = vehicle
+        vehicle.registry = self
+
+    def remove(self, vehicle):
+        """Remove a vehicle by swapping the last vehicle into its slot."""
+        position = self._positions.pop(vehicle.id)
+        last = self._vehicles.pop()
+        if last is not vehicle:
+            self._vehicles[position] = last
+            self._positions[last.id] = position
+
+        bucket = self._by_type[vehicle.vehicle_type_string]
+        del bucket[vehicle.id]
+        if not bucket:
+            del self._by_type[vehicle.vehicle_type_string]
+        vehicle.registry = None
+
+        for hook in self._finish_hooks:
+            hook(vehicle)
+
+    def report_finished(self, vehicle):
+        """Called by a vehicle that reached the end of its path, see Vehicle.finish."""
+        self._finished.append(vehicle)
+
+    def remove_finished(self):
+        """Remove the vehicles that reported completing their path since the last call."""
+        finished, self._finished = self._finished, []
+        for vehicle in finished:
+            if vehicle in self:
+                self.remove(vehicle)
+        return finished
@@ -1,13 +1,15 @@
 import random
-import pygame
+from collections import deque
+from lib.simulation_clock import simulation_clock
 from lib.vehicles.bike import Bike
 from lib.vehicles.boat import Boat
 from lib.vehicles.car import Car
 from lib.vehicles.bus import Bus
 from lib.vehicles.emergency_vehicle import EmergencyVehicle
-from lib.vehicles.path import Path
 from lib.vehicles.pedestrian import Pedestrian
 from lib.vehicles.priority_queue_manager import PriorityQueueManager
+from lib.vehicles.route_graph import RouteGraph
+from lib.vehicles.spawn_point import SpawnPoint
 
 class VehicleSpawner:
     """
@@ -24,18 +26,29 @@ class VehicleSpawner:
         "emergency_vehicle": EmergencyVehicle
     }
 
-    def __init__(self, config, traffic_level="rustig", messenger=None):
+    # Maximum number of waiting vehicles per route before new demand is dropped
+    max_entry_queue_length = 100
+
+    # Multiplier for the regular spawn rates, lowered by the frame governor under load, see set_spawn_rate_factor
+    spawn_rate_factor = 1.0
+
+    def __init__(self, config, traffic_level="rustig", messenger=None, spatial_hash=None):
         """
         Initialize the spawner with route config and traffic level.
         
         :param config: Configuration dict containing routes and vehicle types
         :param traffic_level: 'rustig', 'spits', or 'stress'
         :param messenger: Optional messaging system for priority queue communication
+        :param spatial_hash: Grid with the vehicles of the current frame, used to probe spawn points
         """
         self.config = config
         self.traffic_level = traffic_level
+        self.spatial_hash = spatial_hash
         self.priority_queue_manager = PriorityQueueManager(messenger)
-        current_time = pygame.time.get_ticks()
+
+        # Routes are normally compiled by the config loader, compile here otherwise
+        self.route_graph = config.get('route_graph') or RouteGraph.from_config(config)
+        current_time = simulation_clock.ticks()
 
         self.vehicle_id_counter = 0  # Counter for assigning unique vehicle IDs
 
@@ -53,11 +66,67 @@ class VehicleSpawner:
         # Filter car routes for possible use with priority vehicles
         self.car_routes = [r for r in config['routes'] if r['vehicle_type'] == 'car']
 
+        # Occupancy probes on every possible entry coordinate, shared between routes
+        self.spawn_points = {}
+        for route in config['routes']:
+            classes = [self.vehicle_classes.get(route['vehicle_type'])]
+            if route in self.car_routes:
+                classes += [self.vehicle_classes["bus"], self.vehicle_classes["emergency_vehicle"]]
+            for position in self.route_graph.entry_points(route['name']):
+                for cls in classes:
+                    self.get_spawn_point(position, cls)
+
+        # Entry coordinates used since the spatial grid was last rebuilt
+        self.claimed_spawn_points = set()
+
+        # Virtual queue of sampled paths per route, waiting for their entry to clear
+        self.entry_queues = {tuple(route['name']): deque() for route in config['routes']}
+        self.dropped_demand = 0  # Arrivals not queued because their route's queue was full
+
+    def get_spawn_point(self, position, cls):
+        """
+        Return the spawn point for an entry coordinate and vehicle class,
+        creating it if it was not registered up front.
+        """
+        key = (tuple(position), cls.spawn_clearance, cls.collision_mask)
+        spawn_point = self.spawn_points.get(key)
+        if spawn_point is None:
+            spawn_point = SpawnPoint(key[0], cls.spawn_clearance, cls.collision_mask)
+            self.spawn_points[key] = spawn_point
+        return spawn_point
+
+    def is_entry_clear(self, spawn_point, vehicles):
+        """
+        Check the spawn point against the spatial grid, or against all vehicles
+        when no grid is available.
+        """
+        # Vehicles spawned this frame are not in the grid yet
+        if spawn_point.position in self.claimed_spawn_points:
+            return False
+        if self.spatial_hash is not None:
+            return not spawn_point.is_occupied(self.spatial_hash)
+        return not any(spawn_point.collides_with(v) for v in vehicles)
+
     def assign_id(self, vehicle):
         """Assign a unique ID to the given vehicle."""
         vehicle.id = self.vehicle_id_counter
         self.vehicle_id_counter += 1
 
+    def set_spawn_rate_factor(self, factor):
+        """
+        Change the multiplier for the regular spawn rates. Arrivals already scheduled are
+        rescheduled at the new rate, otherwise every route would keep one interval drawn at
+        the old rate. Scaling the remaining wait is exact for the exponential arrivals.
+        """
+        if factor == self.spawn_rate_factor:
+            return
+        current_time = simulation_clock.ticks()
+        ratio = self.spawn_rate_factor / factor
+        for key, next_time in self.next_spawn_times.items():
+            if current_time < next_time < float('inf'):
+                self.next_spawn_times[key] = current_time + (next_time - current_time) * ratio
+        self.spawn_rate_factor = factor
+
     def get_vehicles_per_interval(self, route):
         """
         Get the number of vehicles to spawn per interval based on the traffic level.
@@ -85,30 +154,41 @@ class VehicleSpawner:
     def spawn_priority_vehicle(self, vehicles, vehicle_type):
         """
         Attempt to spawn a priority vehicle (bus/emergency).
-        Only spawns if no collisions would occur.
+        Only spawns if the entry of the chosen route is clear.
 
-        :param vehicles: Current list of vehicles in the simulation
+        :param vehicles: VehicleRegistry of the simulation
         :param vehicle_type: Type of vehicle to spawn
         :return: The spawned vehicle or None
         """
         route = random.choice(self.car_routes)
 
         cls = self.vehicle_classes.get(vehicle_type)
-        path = Path(route["path"], self.config["route_components"])
-        vehicle = cls(self.vehicle_id_counter, path.get_pretty_path())
-
-        # Ensure the new vehicle does not collide with any existing vehicle
-        if not any(vehicle.collides_with(v) for v in vehicles):
-            self.assign_id(vehicle)
-            vehicle.after_create()
-            vehicles.append(vehicle)
-
-            # Register the vehicle in the priority queue
-            if self.priority_queue_manager and vehicle_type in ("bus", "emergency_vehicle"):
-                lane_id = path.get_associated_lane()
-                self.priority_queue_manager.add(lane_id, vehicle)
-            return vehicle
-        return None
+        path = self.route_graph.sample(route["name"])
+        pretty_path = path.get_pretty_path()
+
+        # Ensure the entry is free before building the vehicle
+        spawn_point = self.get_spawn_point(pretty_path[0], cls)
+        if not self.is_entry_clear(spawn_point, vehicles):
+            return None
+
+        vehicle = self.spawn_vehicle(cls, pretty_path, vehicles)
+
+        # Register the vehicle in the priority queue
+        if self.priority_queue_manager and vehicle_type in ("bus", "emergency_vehicle"):
+            lane_id = path.get_associated_lane()
+            self.priority_queue_manager.add(lane_id, vehicle)
+        return vehicle
+
+    def spawn_vehicle(self, cls, path, vehicles):
+        """
+        Construct a vehicle on the given path and add it to the simulation.
+        """
+        vehicle = cls(self.vehicle_id_counter, path)
+        self.claimed_spawn_points.add(tuple(path[0]))
+        self.assign_id(vehicle)
+        vehicle.after_create()
+        vehicles.add(vehicle)
+        return vehicle
 
     def update(self, vehicles):
         """
@@ -121,29 +201,41 @@ class VehicleSpawner:
         """
         Handles the logic for spawning new regular and priority vehicles.
         """
-        current_time = pygame.time.get_ticks()
+        current_time = simulation_clock.ticks()
+
+        # Vehicles spawned earlier are in the grid again, start a fresh frame
+        self.claimed_spawn_points.clear()
 
         # Spawn regular vehicles
         for route in self.config['routes']:
-            vpm = self.get_vehicles_per_interval(route)
-            if vpm <= 0:
-                continue
             key = tuple(route['name'])
-            if current_time >= self.next_spawn_times[key]:
-                cls = self.vehicle_classes.get(route['vehicle_type'])
-                path = Path(route['path'], self.config["route_components"])
-                vehicle = cls(self.vehicle_id_counter, path.get_pretty_path())
-
-                # Ensure vehicle can be spawned without collisions
-                if not any(vehicle.collides_with(v) for v in vehicles):
-                    self.assign_id(vehicle)
-                    vehicle.after_create()
-                    vehicles.append(vehicle)
-
-                # Schedule next spawn
+            queue = self.entry_queues[key]
+
+            # Add new demand to the route's entry queue
+            vpm = self.get_vehicles_per_interval(route) * self.spawn_rate_factor
+            if vpm > 0 and current_time >= self.next_spawn_times[key]:
+                if len(queue) < self.max_entry_queue_length:
+                    queue.append(self.route_graph.sample(route['name']))
+                else:
+                    self.dropped_demand += 1
+
+                # Schedule next arrival
                 delay = random.expovariate(vpm / 60) * 5000
                 self.next_spawn_times[key] = current_time + delay
 
+            if not queue:
+                continue
+
+            # Release the head of the queue once its entry is clear
+            cls = self.vehicle_classes.get(route['vehicle_type'])
+            pretty_path = queue[0].get_pretty_path()
+            spawn_point = self.get_spawn_point(pretty_path[0], cls)
+            if not self.is_entry_clear(spawn_point, vehicles):
+                continue
+
+            queue.popleft()
+            self.spawn_vehicle(cls, pretty_path, vehicles)
+
         # Spawn a bus if it's time
         if self.car_routes and current_time >= getattr(self, 'next_bus_spawn_time', 0):
             if self.spawn_priority_vehicle(vehicles, "bus"):
@@ -1,11 +1,24 @@
 import pygame
 import yaml
 import os
-from lib.fps_counter import FpsCounter
+from lib.async_runtime import AsyncRuntime
+from lib.frame_governor import FrameGovernor
+from lib.enums.topics import Topics
 from lib.messenger import Messenger
-from lib.screen import screen, WIDTH, update_screen_size
+from lib.messaging.message_log import MessageReplayer
+from lib.messaging.transports import NullTransport
+from lib.performance_hud import PerformanceHud
+from lib.rendering.camera import Camera
+from lib.rendering.dirty_rect_renderer import DirtyRectRenderer
+from lib.rendering.texture_renderer import TextureRenderer
+from lib.screen import screen, WIDTH, update_screen_size, open_texture_renderer
 from lib.simulation import Simulation
+from lib.simulation_clock import simulation_clock
+from lib.simulation_thread import SimulationThread
+from lib.vehicles.route_graph import RouteGraph
+from lib.vehicles.vehicle import Vehicle
 import argparse
+import time
 
 # Initialize pygame mixer (for audio) and pygame itself
 pygame.mixer.pre_init(44100, -16, 2, 512)
@@ -20,7 +33,17 @@ def load_and_scale_image(path):
 
 background_image = load_and_scale_image('assets/background.webp')
 overlay_image = load_and_scale_image('assets/overlay.webp')
-fps_counter = FpsCounter()
+hud = PerformanceHud()
+camera = Camera()
+renderer = DirtyRectRenderer(screen, background_image, overlay_image, camera)
+texture_renderer = None  # Replaces the renderer when drawing with textures, see use_textures
+
+# Draw with an SDL2 renderer and textures instead of surface blits
+def use_textures():
+    global texture_renderer
+    texture_renderer = TextureRenderer(open_texture_renderer(), background_image, overlay_image, camera)
+    # The renderer rotates the original images, so vehicles do not need rotated copies
+    Vehicle.rotate_images = False
 
 # Load all YAML configuration files from the config directory
 def load_config(config_dir="config"):
@@ -30,56 +53,186 @@ def load_config(config_dir="config"):
             filepath = os.path.join(config_dir, filename)
             with open(filepath, "r") as file:
                 config.update(yaml.safe_load(file) or {})
+
+    # Compile the routes once so spawning only samples variations and lanes
+    config["route_graph"] = RouteGraph.from_config(config)
     return config
 
+# Handle pygame events, returns False when the simulation should stop.
+# submit runs a change to the simulation, on the simulation thread when there is one
+def handle_events(simulation, last_press, now, cooldown=500, submit=None):
+    submit = submit or (lambda function, *args: function(*args))
+    running = True
+    for event in pygame.event.get():
+        if event.type in (pygame.QUIT, pygame.WINDOWCLOSE):
+            running = False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                running = False
+            elif event.key == pygame.K_b and now - last_press['b'] > cooldown:
+                submit(simulation.vehicle_spawner.spawn_priority_vehicle, simulation.vehicles, "bus")
+                last_press['b'] = now
+            elif event.key == pygame.K_e and now - last_press['e'] > cooldown:
+                submit(simulation.vehicle_spawner.spawn_priority_vehicle, simulation.vehicles, "emergency_vehicle")
+                last_press['e'] = now
+            elif event.key == pygame.K_HOME:
+                camera.reset()
+        elif event.type == pygame.MOUSEWHEEL:
+            # Zoom around the mouse position, like the coordinate picker
+            camera.zoom_at(pygame.mouse.get_pos(), event.y)
+        elif event.type == pygame.VIDEORESIZE:
+            update_screen_size()
+
+    # Pan with the arrow keys
+    camera.pan_with_keys(pygame.key.get_pressed())
+    return running
+
+# Replay: recorded controller messages take the place of the listener, returns False when done
+def replay_messages(simulation, replayer):
+    replayer.update(simulation.frame_count + 1)
+    if replayer.finished:
+        print("Afspelen voltooid.")
+        return False
+    return True
+
+# Draw a snapshot of the simulation
+def render_frame(simulation, snapshot):
+    hud.update()
+
+    if texture_renderer is not None:
+        texture_renderer.render(
+            simulation.vehicle_texture_sprites(snapshot, camera),
+            top_sprites=hud.sprites(),
+            static_sprites=simulation.bridge_texture_sprites(snapshot),
+            static_top_sprites=simulation.traffic_light_texture_sprites(snapshot),
+        )
+        return
+
+    # Draw the changed regions: the bridge is part of the background layer and the
+    # traffic lights of the overlay layer, the vehicles in between and the HUD on top.
+    # The camera zooms the layers and vehicles, the HUD stays in place
+    renderer.render(
+        simulation.vehicle_sprites(snapshot, camera),
+        top_sprites=hud.sprites(),
+        static_sprites=simulation.bridge_sprites(snapshot),
+        static_top_sprites=simulation.traffic_light_sprites(snapshot),
+    )
+
+# Run a single frame: events, simulation step and drawing. Shared by both runtimes.
+# The governor, if any, decides whether the frame is drawn and measures its cost
+def run_frame(simulation, messenger, last_press, replayer=None, governor=None):
+    started = time.perf_counter()
+    now = pygame.time.get_ticks()
+    running = handle_events(simulation, last_press, now)
+    if replayer is not None and not replay_messages(simulation, replayer):
+        running = False
+
+    simulation.update()
+    messenger.send(Topics.TIME.value, {"simulatie_tijd_ms": simulation_clock.ticks()})
+
+    render_time = None
+    if governor is None or governor.should_render():
+        render_started = time.perf_counter()
+        render_frame(simulation, simulation.snapshot())
+        render_time = time.perf_counter() - render_started
+    if governor is not None:
+        governor.frame_done(time.perf_counter() - started - (render_time or 0.0), render_time)
+    return running
+
+# Simulation on its own thread, this thread handles events and draws the latest snapshot
+def run_split(simulation, messenger, last_press, replayer=None, fps=60, governor=None):
+    def before_update():
+        messenger.send(Topics.TIME.value, {"simulatie_tijd_ms": simulation_clock.ticks()})
+        if replayer is not None and not replayer.finished:
+            replayer.update(simulation.frame_count + 1)
+
+    simulation_thread = SimulationThread(
+        simulation, tick_rate=fps, before_update=before_update,
+        after_update=governor.frame_done if governor is not None else None
+    )
+    simulation_thread.start()
+    clock = pygame.time.Clock()
+    running = True
+    try:
+        while running:
+            now = pygame.time.get_ticks()
+            running = handle_events(simulation, last_press, now, submit=simulation_thread.submit)
+            if replayer is not None and replayer.finished:
+                print("Afspelen voltooid.")
+                running = False
+            if not simulation_thread.is_alive():
+                print(f"Simulatie gestopt: {simulation_thread.error}")
+                running = False
+
+            snapshot = simulation_thread.snapshots.wait(timeout=1.0)
+            if snapshot is not None:
+                render_frame(simulation, snapshot)
+            clock.tick(60)  # Drawing is limited to 60 FPS, also during fast replay
+    finally:
+        simulation_thread.stop()
+
 # Main simulation runner
-def run_simulation(drukte="rustig", silent=False):
+def run_simulation(drukte="rustig", silent=False, use_asyncio=False, transport=None,
+                   record_path=None, replay_path=None, replay_speed=1.0, split=False, textures=False):
     # Silent mode: disable all sound playback
     if silent:
         pygame.mixer.stop()
         pygame.mixer.music.stop()
         pygame.mixer.quit()
 
+    # Before the simulation is created, so vehicles know whether to rotate their images
+    if textures:
+        use_textures()
+
+    # Replays run without a controller connection unless a transport is given
+    if replay_path and transport is None:
+        transport = NullTransport()
+
+    # Fast replay runs frames without the 60 FPS limit. Every frame is 1/60 second of simulation
+    # time, as in the recording, however fast the frames are really computed.
+    fast_replay = bool(replay_path) and not replay_speed
+    if fast_replay:
+        simulation_clock.use_fixed_step(1 / 60)
+
     config = load_config()
-    messenger = Messenger()
+    messenger = Messenger(threaded=not use_asyncio, transport=transport, record_path=record_path)
     simulation = Simulation(config, messenger, traffic_level=drukte)
-    clock = pygame.time.Clock()
-    running = True
-    start_time = pygame.time.get_ticks()
-    messenger.receive()
+    replayer = MessageReplayer(replay_path, messenger, replay_speed) if replay_path else None
+
+    fps = 0 if fast_replay else 60
+
+    # Sheds load when frames take longer than 1/fps, drawing is only skipped on the same thread
+    governor = FrameGovernor(simulation, messenger, budget=1 / fps, skip_rendering=not split) if fps else None
+    hud.simulation = simulation
+    hud.messenger = messenger
+    if fps:
+        hud.budget = 1 / fps
+    hud.line_source = lambda: (
+        (governor.hud_lines() if governor is not None else []) + messenger.latency_tracker.hud_lines()
+    )
 
     # Keyboard cooldown handling for spawning priority vehicles
     last_press = {'b': 0, 'e': 0}
-    cooldown = 500  # milliseconds
 
-    while running:
-        now = pygame.time.get_ticks()
+    if split:
+        if replayer is None:
+            messenger.receive()
+        run_split(simulation, messenger, last_press, replayer, fps=fps, governor=governor)
+    elif use_asyncio:
+        # Frames, inbound and outbound messages as coroutines on one event loop
+        runtime = AsyncRuntime(
+            messenger, lambda: run_frame(simulation, messenger, last_press, replayer, governor), fps=fps
+        )
+        runtime.run()
+    else:
+        clock = pygame.time.Clock()
+        running = True
+        if replayer is None:
+            messenger.receive()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    running = False
-                elif event.key == pygame.K_b and now - last_press['b'] > cooldown:
-                    simulation.vehicle_spawner.spawn_priority_vehicle(simulation.vehicles, "bus")
-                    last_press['b'] = now
-                elif event.key == pygame.K_e and now - last_press['e'] > cooldown:
-                    simulation.vehicle_spawner.spawn_priority_vehicle(simulation.vehicles, "emergency_vehicle")
-                    last_press['e'] = now
-            elif event.type == pygame.VIDEORESIZE:
-                update_screen_size()
-
-        # Draw everything to the screen
-        screen.blit(background_image, (0, 0))
-        fps_counter.update()
-        simulation.update()
-        simulation.draw()
-        screen.blit(overlay_image, (0, 0))
-        fps_counter.draw()
-        messenger.send("tijd", {"simulatie_tijd_ms": now})
-        pygame.display.flip()
-        clock.tick(60)  # Limit to 60 FPS
+        while running:
+            running = run_frame(simulation, messenger, last_press, replayer, governor)
+            clock.tick(fps)  # Limit to 60 FPS, unlimited for fast replay
 
     # Clean up on exit
     messenger.stop()
@@ -89,8 +242,11 @@ def run_simulation(drukte="rustig", silent=False):
 class CustomArgumentParser(argparse.ArgumentParser):
     def error(self, message):
         print(f"\n❌ Fout: {message}")
-        print("Gebruik: python main.py [drukte] [--stil]")
-        print("drukte: rustig, spits, stress; --stil: geen geluid")
+        print("Gebruik: python main.py [drukte] [--stil] [--asyncio | --simulatiethread] [--opnemen PAD] [--afspelen PAD] [--snelheid X] [--texturen]")
+        print("drukte: rustig, spits, stress; --stil: geen geluid; --asyncio: asyncio runtime")
+        print("--simulatiethread: simulatie op een eigen thread, los van het tekenen")
+        print("--opnemen/--afspelen: berichten opnemen of afspelen; --snelheid 0: zo snel mogelijk")
+        print("--texturen: tekenen met SDL2-texturen, met GPU of de software-renderer")
         super().print_help()
         exit(2)
 
@@ -107,13 +263,49 @@ if __name__ == '__main__':
         action='store_true',
         help='Start de simulatie zonder geluid'
     )
+    runtime = parser.add_mutually_exclusive_group()
+    runtime.add_argument(
+        "--asyncio",
+        action='store_true',
+        help='Gebruik de asyncio runtime in plaats van threads voor berichten'
+    )
+    runtime.add_argument(
+        "--simulatiethread",
+        action='store_true',
+        help='Voer de simulatie uit op een eigen thread en teken de laatste toestand'
+    )
+    parser.add_argument(
+        "--opnemen",
+        metavar="PAD",
+        help='Neem alle inkomende en uitgaande berichten op in dit bestand'
+    )
+    parser.add_argument(
+        "--afspelen",
+        metavar="PAD",
+        help='Speel de opgenomen stoplichtberichten af in plaats van een controller'
+    )
+    parser.add_argument(
+        "--snelheid",
+        type=float,
+        default=1.0,
+        help='Afspeelsnelheid, 1 is realtime en 0 is zo snel mogelijk'
+    )
+    parser.add_argument(
+        "--texturen",
+        action='store_true',
+        help='Teken met SDL2-texturen in plaats van surfaces, zonder GPU met de software-renderer'
+    )
     args = parser.parse_args()
 
     # Optional profiling of the simulation performance
     # profiler = cProfile.Profile()
     # profiler.enable()
 
-    run_simulation(drukte=args.drukte, silent=args.stil)
+    run_simulation(
+        drukte=args.drukte, silent=args.stil, use_asyncio=args.asyncio,
+        record_path=args.opnemen, replay_path=args.afspelen, replay_speed=args.snelheid,
+        split=args.simulatiethread, textures=args.texturen
+    )
 
     # profiler.disable()
     # s = io.StringIO()
@@ -1,6 +1,18 @@
+import argparse
 import json
-import zmq
+import random
 import time
+import yaml
+import zmq
+from lib.enums.topics import Topics
+from lib.enums.traffic_light_colors import TrafficLightColors
+from lib.messaging import wire_format
+from lib.messaging.latency_histogram import LatencyHistogram
+from lib.messaging.vehicle_stream import VehicleStreamDecoder
+
+RED = TrafficLightColors.RED.value
+GREEN = TrafficLightColors.GREEN.value
+ORANGE = TrafficLightColors.ORANGE.value
 
 def start_zeromq_publisher(bind_address="tcp://127.0.0.1:5555"):
     context = zmq.Context()
@@ -41,9 +53,449 @@ def start_zeromq_subscriber(server_address="tcp://10.121.17.84:5555"):
         message = socket.recv_string()
         print(f"Ontvangen: {message}")
 
+def start_binary_subscriber(bind_address="tcp://127.0.0.1:5555", server_address="tcp://127.0.0.1:5556"):
+    context = zmq.Context()
+    pub_socket = context.socket(zmq.PUB)
+    pub_socket.bind(bind_address)
+    sub_socket = context.socket(zmq.SUB)
+    sub_socket.connect(server_address)
+    sub_socket.setsockopt_string(zmq.SUBSCRIBE, "")
+
+    time.sleep(1)  # Geef de simulator tijd om te verbinden
+    request = {"formaat": "binair", "versie": wire_format.VERSION}
+    pub_socket.send_multipart([b"formaat", json.dumps(request).encode('utf-8')])
+    print(f"Binair formaat aangevraagd, wacht op antwoord van {server_address}...")
+
+    layout = None
+    vehicles = VehicleStreamDecoder()
+    while True:
+        frames = sub_socket.recv_multipart()
+        topic, payload = frames[0].decode('utf-8'), frames[1]
+        if topic == Topics.VEHICLE_STATES.value:
+            # Raw vehicle frames, neither JSON nor the binary wire format
+            vehicles.apply(payload)
+            print(f"Ontvangen (voertuigen, {len(payload)} bytes): {len(vehicles.vehicles)} voertuigen")
+        elif topic == "formaat":
+            reply = json.loads(payload)
+            print(f"Antwoord: formaat {reply['formaat']}")
+            if "indeling" in reply:
+                layout = wire_format.WireLayout.from_dict(reply["indeling"])
+        elif layout is not None and wire_format.is_binary(payload):
+            topic, message, _ = wire_format.decode(payload, layout)
+            print(f"Ontvangen (binair, {len(payload)} bytes): {topic} {message}")
+        else:
+            print(f"Ontvangen (JSON, {len(payload)} bytes): {topic} {payload.decode('utf-8')}")
+
+
+class SensorState:
+    """
+    Latest sensor, bridge and priority state as received from the simulator.
+    Accepts full messages as well as delta messages ({"volgnummer", "volledig", "data"}).
+    """
+
+    def __init__(self):
+        self.states = {topic.value: {} for topic in (
+            Topics.LANE_SENSORS_UPDATE,
+            Topics.SPECIAL_SENSORS_UPDATE,
+            Topics.BRIDGE_SENSORS_UPDATE,
+            Topics.PRIORITY_VEHICLE,
+        )}
+        self.lost_deltas = 0
+        self._sequences = {}
+
+    def apply(self, topic, message):
+        state = self.states.get(topic)
+        if state is None:
+            return
+
+        if "volgnummer" in message:
+            previous = self._sequences.get(topic)
+            if previous is not None and message["volgnummer"] != (previous + 1) & 0xFFFFFFFF:
+                self.lost_deltas += 1
+            self._sequences[topic] = message["volgnummer"]
+            if message["volledig"]:
+                state.clear()
+            state.update(message["data"])
+        else:
+            state.clear()
+            state.update(message)
+
+    def has_demand(self, lane_id):
+        sensors = self.states[Topics.LANE_SENSORS_UPDATE.value].get(lane_id)
+        return bool(sensors and (sensors.get("voor") or sensors.get("achter")))
+
+    def front_occupied(self, lane_id):
+        sensors = self.states[Topics.LANE_SENSORS_UPDATE.value].get(lane_id)
+        return bool(sensors and sensors.get("voor"))
+
+    def special(self, name):
+        return bool(self.states[Topics.SPECIAL_SENSORS_UPDATE.value].get(name))
+
+    def priority_lanes(self):
+        return {entry["baan"] for entry in self.states[Topics.PRIORITY_VEHICLE.value].get("queue", [])}
+
+
+class ActuatedController:
+    """
+    Simple actuated policy for all lanes in config/directions.yaml.
+    The intersection runs one phase at a time (car lanes per approach direction, then all
+    cyclists and pedestrians), skipping phases without demand and extending green while a
+    front sensor is occupied. The bridge opens for boats once the road over it is empty.
+    """
+    min_green = 6
+    max_green = 20
+    orange_time = 3
+    clearance_time = 2
+
+    min_road_open = 30
+    road_clearance = 6
+    bridge_move_time = 12
+    boat_green = 10
+
+    bridge_lane = "81.1"
+    bridge_directions = (41, 42, 51, 52, 53, 54)
+    boat_type = "boat"
+    send_every_step = False  # Only changes and heartbeats are sent
+
+    def __init__(self, directions_path="config/directions.yaml"):
+        with open(directions_path, 'r', encoding='utf-8') as file:
+            directions = yaml.safe_load(file)["directions"]
+
+        phases = {}
+        self.bridge_road_lanes = []
+        self.boat_lanes = []
+        for direction_type, entries in directions.items():
+            for direction in entries:
+                for light in direction["traffic_lights"]:
+                    lane_id = f"{direction['id']}.{light['id']}"
+                    if direction["id"] in self.bridge_directions:
+                        if lane_id not in self.bridge_road_lanes:
+                            self.bridge_road_lanes.append(lane_id)
+                    elif direction_type == self.boat_type:
+                        self.boat_lanes.append(lane_id)
+                    elif direction_type == "car":
+                        phases.setdefault(light["approach_direction"], []).append(lane_id)
+                    else:
+                        phases.setdefault("langzaam verkeer", []).append(lane_id)
+
+        self.phases = list(phases.values())
+        self.colors = {lane: RED for phase in self.phases for lane in phase}
+        self.colors.update({lane: GREEN for lane in self.bridge_road_lanes})
+        self.colors.update({lane: RED for lane in self.boat_lanes})
+        self.colors[self.bridge_lane] = RED
+
+        self.phase_index = len(self.phases) - 1
+        self.phase_state = "rust"
+        self.phase_since = 0
+        self.bridge_state = "weg_open"
+        self.bridge_since = 0
+        self.boat_queue = []
+
+    def step(self, now, sensors):
+        """Advance both state machines and return the full {lane_id: color} state."""
+        self._step_intersection(now, sensors)
+        self._step_bridge(now, sensors)
+        return self.colors
+
+    def _phase_has_demand(self, index, sensors):
+        return any(sensors.has_demand(lane) for lane in self.phases[index])
+
+    def _next_phase_with_demand(self, sensors):
+        for offset in range(1, len(self.phases) + 1):
+            index = (self.phase_index + offset) % len(self.phases)
+            if self._phase_has_demand(index, sensors):
+                return index
+        return None
+
+    def _set_phase(self, color):
+        for lane in self.phases[self.phase_index]:
+            self.colors[lane] = color
+
+    def _step_intersection(self, now, sensors):
+        elapsed = now - self.phase_since
+
+        if self.phase_state == "groen":
+            others_waiting = any(
+                self._phase_has_demand(i, sensors) for i in range(len(self.phases)) if i != self.phase_index
+            )
+            extend = any(sensors.front_occupied(lane) for lane in self.phases[self.phase_index])
+            if others_waiting and (elapsed >= self.max_green or (elapsed >= self.min_green and not extend)):
+                self._set_phase(ORANGE)
+                self.phase_state, self.phase_since = "oranje", now
+        elif self.phase_state == "oranje":
+            if elapsed >= self.orange_time:
+                self._set_phase(RED)
+                self.phase_state, self.phase_since = "ontruimen", now
+        elif elapsed >= self.clearance_time or self.phase_state == "rust":
+            next_phase = self._next_phase_with_demand(sensors)
+            if next_phase is None:
+                self.phase_state = "rust"
+            else:
+                self.phase_index = next_phase
+                self._set_phase(GREEN)
+                self.phase_state, self.phase_since = "groen", now
+
+    def _set_bridge_road(self, color):
+        for lane in self.bridge_road_lanes:
+            self.colors[lane] = color
+
+    def _step_bridge(self, now, sensors):
+        elapsed = now - self.bridge_since
+
+        if self.bridge_state == "weg_open":
+            boats_waiting = [lane for lane in self.boat_lanes if sensors.has_demand(lane)]
+            # Priority vehicles heading for the bridge go first
+            priority_waiting = sensors.priority_lanes() & set(self.bridge_road_lanes)
+            if boats_waiting and not priority_waiting and elapsed >= self.min_road_open:
+                self.boat_queue = boats_waiting
+                self._set_bridge_road(RED)
+                self.bridge_state, self.bridge_since = "weg_sluiten", now
+        elif self.bridge_state == "weg_sluiten":
+            if elapsed >= self.road_clearance and not sensors.special("brug_wegdek"):
+                self.colors[self.bridge_lane] = GREEN
+                self.bridge_state, self.bridge_since = "brug_openen", now
+        elif self.bridge_state == "brug_openen":
+            if elapsed >= self.bridge_move_time:
+                self.colors[self.boat_queue[0]] = GREEN
+                self.bridge_state, self.bridge_since = "boten", now
+        elif self.bridge_state == "boten":
+            if elapsed >= self.boat_green:
+                self.colors[self.boat_queue.pop(0)] = RED
+                if self.boat_queue:
+                    self.colors[self.boat_queue[0]] = GREEN
+                    self.bridge_since = now
+                else:
+                    self.bridge_state, self.bridge_since = "boten_weg", now
+        elif self.bridge_state == "boten_weg":
+            if not sensors.special("brug_water"):
+                self.colors[self.bridge_lane] = RED
+                self.bridge_state, self.bridge_since = "brug_sluiten", now
+        elif self.bridge_state == "brug_sluiten":
+            if elapsed >= self.bridge_move_time:
+                self._set_bridge_road(GREEN)
+                self.bridge_state, self.bridge_since = "weg_open", now
+
+
+class FloodGenerator:
+    """Load generator: random colors for random lanes, at a fixed number of messages per second."""
+    send_every_step = True
+
+    def __init__(self, lanes, lanes_per_message):
+        self.lanes = list(lanes)
+        self.lanes_per_message = min(lanes_per_message, len(self.lanes)) if lanes_per_message else len(self.lanes)
+        self.colors = [RED, GREEN, ORANGE]
+
+    def step(self, now, sensors):
+        lanes = random.sample(self.lanes, self.lanes_per_message)
+        return {lane: random.choice(self.colors) for lane in lanes}
+
+
+class MessagingStats:
+    """
+    Throughput per topic and the relative one-way delay of the simulator's 'tijd' topic.
+    The delay is measured against the fastest 'tijd' message seen, so the clocks of
+    simulator and controller do not have to be synchronised.
+    """
+
+    def __init__(self):
+        self.reset()
+        self.time_delay = LatencyHistogram("tijd vertraging")
+        self._base_offset = None
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.received = {}
+        self.received_bytes = {}
+        self.sent = 0
+
+    def record_received(self, topic, payload_size):
+        self.received[topic] = self.received.get(topic, 0) + 1
+        self.received_bytes[topic] = self.received_bytes.get(topic, 0) + payload_size
+
+    def record_time(self, simulation_ms, received):
+        offset = received - simulation_ms / 1000.0
+        if self._base_offset is None or offset < self._base_offset:
+            self._base_offset = offset
+        self.time_delay.record(offset - self._base_offset)
+
+    def report(self, lost_deltas=0, lost_vehicle_frames=0):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        lines = [f"--- {elapsed:.1f}s, verstuurd: {self.sent} ({self.sent / elapsed:.1f}/s) ---"]
+        for topic in sorted(self.received):
+            count = self.received[topic]
+            lines.append(
+                f"{topic:>20}: {count:>7} berichten {count / elapsed:>8.1f}/s "
+                f"{self.received_bytes[topic] / elapsed / 1024:>8.1f} KiB/s"
+            )
+        if lost_deltas:
+            lines.append(f"Verloren delta's: {lost_deltas}")
+        if lost_vehicle_frames:
+            lines.append(f"Verloren voertuigenframes: {lost_vehicle_frames}")
+        lines.append(self.time_delay.summary())
+        lines.append(self.time_delay.format_buckets())
+        print("\n".join(lines))
+        self.reset()
+
+
+def start_controller(policy, bind_address="tcp://127.0.0.1:5555", server_address="tcp://127.0.0.1:5556",
+                     rate=10.0, duration=None, report_interval=5.0, wire="json", delta=False, stamp=False, heartbeat=5.0):
+    """
+    Run a stand-in controller: subscribe to the simulator, run the policy rate times per second
+    and publish the traffic light changes. Prints throughput and latency every report_interval seconds.
+
+    Args:
+        policy: ActuatedController or FloodGenerator.
+        rate (float): Policy steps (and at most messages) per second.
+        duration (float, optional): Stop after this many seconds.
+        wire (str): 'json' or 'binair', requested in the handshake.
+        delta (bool): Request delta messages.
+        stamp (bool): Request stamp frames and echo the latest one with every light message.
+        heartbeat (float): Resend the full state after this many seconds without changes.
+    """
+    context = zmq.Context()
+    pub_socket = context.socket(zmq.PUB)
+    pub_socket.setsockopt(zmq.SNDHWM, 100000)
+    pub_socket.bind(bind_address)
+    sub_socket = context.socket(zmq.SUB)
+    sub_socket.connect(server_address)
+    sub_socket.setsockopt_string(zmq.SUBSCRIBE, "")
+
+    # The handshake is repeated until the simulator answers, it may start later than the controller
+    handshake = None
+    if wire != "json" or delta or stamp:
+        request = {"formaat": wire, "versie": wire_format.VERSION, "delta": delta, "stempel": stamp}
+        handshake = [Topics.WIRE_FORMAT.value.encode('utf-8'), json.dumps(request).encode('utf-8')]
+    last_handshake = 0
+    print(f"Controller publiceert op {bind_address}, luistert naar {server_address} ({rate:g} stappen/s)")
+
+    sensors = SensorState()
+    stats = MessagingStats()
+    layout = None
+    vehicles = VehicleStreamDecoder()
+    last_stamp = None
+    sent_state = {}
+    last_sent = 0
+    interval = 1.0 / rate
+    started = time.monotonic()
+    next_step = started
+    next_report = started + report_interval
+
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            # Handle everything that arrives until the next policy step
+            while True:
+                wait = next_step - time.monotonic()
+                if wait <= 0 or not sub_socket.poll(wait * 1000):
+                    break
+                while True:
+                    try:
+                        frames = sub_socket.recv_multipart(flags=zmq.NOBLOCK)
+                    except zmq.Again:
+                        break
+                    received = time.monotonic()
+                    topic, payload = frames[0].decode('utf-8'), frames[1]
+                    stats.record_received(topic, len(payload))
+
+                    if topic == Topics.WIRE_FORMAT.value:
+                        reply = json.loads(payload)
+                        print(f"Formaat: {reply.get('formaat')}, delta: {reply.get('delta')}, stempel: {reply.get('stempel')}")
+                        handshake = None
+                        if "indeling" in reply:
+                            layout = wire_format.WireLayout.from_dict(reply["indeling"])
+                        continue
+                    if topic == Topics.VEHICLE_STATES.value:
+                        # Raw vehicle frames, neither JSON nor the binary wire format
+                        vehicles.apply(payload)
+                        continue
+                    if layout is not None and wire_format.is_binary(payload):
+                        topic, message, _ = wire_format.decode(payload, layout)
+                    else:
+                        message = json.loads(payload)
+
+                    if topic == Topics.TIME.value:
+                        stats.record_time(message["simulatie_tijd_ms"], received)
+                    else:
+                        sensors.apply(topic, message)
+                        if len(frames) >= 3:
+                            last_stamp = frames[2]
+
+            now = time.monotonic()
+            next_step += interval
+            if next_step < now:
+                next_step = now  # Behind schedule, don't try to catch up
+
+            if handshake is not None and now - last_handshake >= 2:
+                pub_socket.send_multipart(handshake)
+                last_handshake = now
+
+            colors = policy.step(now, sensors)
+            changed = any(sent_state.get(lane) != color for lane, color in colors.items())
+            if policy.send_every_step or changed or now - last_sent >= heartbeat:
+                frames = [b"stoplichten", json.dumps(colors).encode('utf-8')]
+                if last_stamp is not None:
+                    frames.append(last_stamp)
+                    last_stamp = None
+                pub_socket.send_multipart(frames)
+                sent_state.update(colors)
+                stats.sent += 1
+                last_sent = now
+
+            if now >= next_report:
+                stats.report(sensors.lost_deltas, vehicles.lost_frames)
+                next_report = now + report_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stats.report(sensors.lost_deltas, vehicles.lost_frames)
+        sub_socket.close()
+        pub_socket.close()
+        context.term()
+
+
+def all_lanes(directions_path="config/directions.yaml"):
+    with open(directions_path, 'r', encoding='utf-8') as file:
+        directions = yaml.safe_load(file)["directions"]
+    lanes = [
+        f"{direction['id']}.{light['id']}"
+        for entries in directions.values()
+        for direction in entries
+        for light in direction["traffic_lights"]
+    ]
+    return list(dict.fromkeys(lanes + [ActuatedController.bridge_lane]))
+
+
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) > 1 and sys.argv[1] == "server":
+    parser = argparse.ArgumentParser(description="Lokale stand-in voor de verkeerslichtcontroller")
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        default="subscriber",
+        choices=["subscriber", "server", "binair", "controller", "flood"],
+        help="controller: actuated regeling, flood: willekeurige lichtwijzigingen als belasting"
+    )
+    parser.add_argument("--pub", default="tcp://127.0.0.1:5555", help="Adres waarop de controller publiceert")
+    parser.add_argument("--sub", default="tcp://127.0.0.1:5556", help="Adres van de simulator")
+    parser.add_argument("--rate", type=float, default=None, help="Stappen per seconde (controller 10, flood 100)")
+    parser.add_argument("--banen", type=int, default=0, help="flood: banen per bericht, 0 = alle banen")
+    parser.add_argument("--duur", type=float, default=None, help="Stop na dit aantal seconden")
+    parser.add_argument("--rapport", type=float, default=5.0, help="Seconden tussen rapporten")
+    parser.add_argument("--formaat", choices=["json", "binair"], default="json", help="Gevraagd berichtformaat")
+    parser.add_argument("--delta", action="store_true", help="Vraag delta berichten aan")
+    parser.add_argument("--stempel", action="store_true", help="Vraag stempels aan en stuur ze terug voor latentiemetingen")
+    args = parser.parse_args()
+
+    if args.mode == "server":
         start_zeromq_publisher()
+    elif args.mode == "binair":
+        start_binary_subscriber()
+    elif args.mode in ("controller", "flood"):
+        if args.mode == "controller":
+            policy, rate = ActuatedController(), args.rate or 10.0
+        else:
+            policy, rate = FloodGenerator(all_lanes(), args.banen), args.rate or 100.0
+        start_controller(
+            policy, args.pub, args.sub, rate=rate, duration=args.duur,
+            report_interval=args.rapport, wire=args.formaat, delta=args.delta, stamp=args.stempel
+        )
     else:
         start_zeromq_subscriber()